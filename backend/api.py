@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 import sys
 import requests
 import secrets
@@ -7,20 +8,27 @@ from typing import Any, Dict, List, Optional
 import json
 from fastapi import FastAPI, HTTPException, Request, Form, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from passlib.context import CryptContext
 
 # Importações existentes do seu projeto
-from .core.errors import init_error_bus, get_errors, push_error
+from .core.errors import init_error_bus, get_errors
 from .core.domain import (
     get_app_config, update_config_pairs,
     run_collect, get_items_for_group, update_items,
     delete_items_by_uids, clear_all_items, get_diag_providers,
 )
+from .core.item_store import get_sync_status
+from .core.llm_cache import get_cache_stats
 from .core.perplexity_core import call_perplexity_chat, count_tokens_from_url
-from .core.sheets import read_links, add_link, update_link, delete_link
-from .core.universal_extractor import extract_from_url, extract_from_links
+from .core.sheets import read_links, add_link, update_link, update_links, delete_link, refresh_items_from_sheet
+from .core.sheets_quota import get_quota_stats, render_prometheus
+from .core.workers import run_blocking, get_worker_status, shutdown_workers
+from .core.collect_jobs import (
+    ACTIVE_STATES, ActiveJobError, select_links_for_collect, start_collect_job,
+    get_job, get_active_job, list_jobs, cancel_job, resume_job,
+)
 
 # --- AJUSTE DE CAMINHOS PARA EXECUTÁVEL (PyInstaller) ---
 # --- AJUSTE DE CAMINHOS PARA EXECUTÁVEL ---
@@ -67,6 +75,10 @@ FRONTEND_DIR = INTERNAL_DIR / "frontend"
 
 app = FastAPI(title="Editais Watcher API", version="1.0.0")
 
+@app.on_event("shutdown")
+def _shutdown_workers():
+    shutdown_workers()
+
 # Servir arquivos estáticos (CSS/JS)
 app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="static")
 
@@ -110,7 +122,7 @@ def get_remote_users():
 
 @app.post("/api/login")
 async def login(email: str = Form(...), password: str = Form(...)):
-    users = get_remote_users()
+    users = await run_blocking("auth", get_remote_users)
     print("DEBUG: loaded users count:", len(users))  # temporary
     user_found = next((u for u in users if u.get("email","").strip() == email.strip()), None)
     print("DEBUG: user_found keys:", list(user_found.keys()) if user_found else None)
@@ -218,6 +230,18 @@ class LinkUpdateRequest(BaseModel):
     ativo: Optional[str] = None
 
 
+class LinksBulkUpdateItem(BaseModel):
+    uid: str
+    url: Optional[str] = None
+    grupo: Optional[str] = None
+    nome: Optional[str] = None
+    ativo: Optional[str] = None
+
+
+class LinksBulkUpdateRequest(BaseModel):
+    updates: List[LinksBulkUpdateItem]
+
+
 class PerplexityRequest(BaseModel):
     prompt: str
     modelo_api: str
@@ -248,6 +272,7 @@ class UniversalCollectRequest(BaseModel):
     groups: Optional[List[str]] = None
     max_links: int = 0  # 0 = todos os links; >0 = limita a N links
     skip_already_run: bool = True  # True = não reprocessa links já executados
+    rerun_after_days: int = 0  # >0 = com skip_already_run, reprocessa links executados há mais de N dias
 
 
 #---------- ENDPOINTS DE CONFIG ----------
@@ -260,7 +285,7 @@ async def api_get_config(request: Request):
         raise HTTPException(status_code=401, detail="Não autenticado")
 
     init_error_bus()
-    cfg = get_app_config()
+    cfg = await run_blocking("sheets", get_app_config)
     return {
         "config": cfg,
         "errors": get_errors(),
@@ -276,8 +301,10 @@ async def api_update_config(request: Request, req: ConfigUpdateRequest):
         raise HTTPException(status_code=401, detail="Não autenticado")
 
     init_error_bus()
-    cfg = update_config_pairs(
-        [{"key": item.key, "value": item.value} for item in req.updates]
+    cfg = await run_blocking(
+        "sheets",
+        update_config_pairs,
+        [{"key": item.key, "value": item.value} for item in req.updates],
     )
     return {
         "config": cfg,
@@ -301,13 +328,13 @@ async def api_collect(request: Request, req: CollectRequest):
         raise HTTPException(status_code=401, detail="Não autenticado")
 
     init_error_bus()
-    cfg = get_app_config()["config"]
+    cfg = (await run_blocking("sheets", get_app_config))["config"]
     if req.min_days is not None:
         min_days = int(req.min_days)
     else:
         min_days = int(cfg.get("MIN_DAYS", "21"))
 
-    result = run_collect(min_days=min_days, groups_filter=req.groups)
+    result = await run_blocking("collect", run_collect, min_days=min_days, groups_filter=req.groups)
     return {
         "result": result,
         "errors": get_errors(),
@@ -316,6 +343,14 @@ async def api_collect(request: Request, req: CollectRequest):
 
 # ============= ENDPOINT DE COLETA UNIVERSAL (VIA IA) =============
 
+def _job_conflict(active: Dict[str, Any]) -> HTTPException:
+    """409 com a coleta que já está rodando (o frontend passa a acompanhá-la)."""
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Já existe uma coleta em andamento", "job": active},
+    )
+
+
 @app.post("/api/collect/universal")
 async def api_collect_universal(request: Request, req: UniversalCollectRequest):
     """
@@ -323,6 +358,11 @@ async def api_collect_universal(request: Request, req: UniversalCollectRequest):
     
     Esta é a coleta inteligente que extrai editais de qualquer site
     usando processamento de linguagem natural.
+
+    A coleta roda em segundo plano: a resposta traz o job criado ('job.id');
+    o progresso vem por SSE em /api/collect/jobs/{id}/events e o resultado
+    final fica em job.result. Se já houver uma coleta rodando, responde 409
+    com a coleta ativa em detail.job.
     
     - min_days: prazo mínimo em dias para filtrar editais
     - max_value: valor máximo em R$ (opcional)
@@ -333,191 +373,180 @@ async def api_collect_universal(request: Request, req: UniversalCollectRequest):
         raise HTTPException(status_code=401, detail="Não autenticado")
     
     init_error_bus()
-    
-    # Carrega links cadastrados
-    links = read_links()
-    
-    if not links:
-        return {
-            "result": {
-                "all_items": [],
-                "stats_by_group": {},
-                "errors": [],
-                "processed": 0,
-                "total": 0,
-                "message": "Nenhum link cadastrado para coleta."
-            },
-            "errors": get_errors(),
-        }
-    
-    # Se link_uid fornecido, filtra para coletar só esse
-    if req.link_uid:
-        links = [l for l in links if l.get("uid") == req.link_uid]
-        if not links:
-            raise HTTPException(status_code=404, detail="Link não encontrado")
-    
-    # Se groups fornecido, filtra por grupos selecionados
-    if req.groups:
-        links = [l for l in links if l.get("grupo") in req.groups]
-        if not links:
-            return {
-                "result": {
-                    "all_items": [],
-                    "stats_by_group": {},
-                    "errors": [],
-                    "processed": 0,
-                    "total": 0,
-                    "message": "Nenhum link cadastrado nos grupos selecionados."
-                },
-                "errors": get_errors(),
-            }
-
-    # Filtra apenas links ativos (ativo == 'true'), igual ao frontend
-    links = [l for l in links if l.get("ativo", "true") == "true"]
-    if not links:
-        return {
-            "result": {
-                "all_items": [],
-                "stats_by_group": {},
-                "errors": [],
-                "processed": 0,
-                "total": 0,
-                "message": "Nenhum link ativo para processar."
-            },
-            "errors": get_errors(),
-        }
 
-    skipped_already_run = 0
-    if req.skip_already_run:
-        # Regra de economia: não reprocessa links com last_run preenchido.
-        not_processed_links = []
-        for link in links:
-            if (link.get("last_run") or "").strip():
-                skipped_already_run += 1
-                continue
-            not_processed_links.append(link)
-        links = not_processed_links
-
-        if not links:
-            return {
-                "result": {
-                    "all_items": [],
-                    "stats_by_group": {},
-                    "errors": [],
-                    "processed": 0,
-                    "total": 0,
-                    "skipped_already_run": skipped_already_run,
-                    "message": "Todos os links ativos selecionados já foram processados anteriormente."
-                },
-                "errors": get_errors(),
-            }
-
-    # Limita quantidade de links se max_links > 0
-    links_to_process = links
-    if req.max_links and req.max_links > 0:
-        links_to_process = links[:req.max_links]
-    
-    result = extract_from_links(
-        links=links_to_process,
-        min_days=req.min_days,
-        max_value=req.max_value,
-        model_id=req.model_id,
-    )
-    result["skipped_already_run"] = skipped_already_run
-    
-    # Se encontrou itens, grava na planilha
-    if result.get("all_items"):
-        from .core.domain import add_row, sha_id
-        from .core.sheets import open_sheet, append_items_dedup, read_items_cached, invalidate_items_cache
-        
-        try:
-            _, _, ws_items, _ = open_sheet()
-            header, body = read_items_cached()
-            
-            new_rows = []
-            for item in result["all_items"]:
-                row = [
-                    sha_id(
-                        item.get("group", ""),
-                        item.get("source", ""),
-                        item.get("title", ""),
-                        item.get("link", ""),
-                    ),
-                    item.get("group", ""),
-                    item.get("source", ""),
-                    item.get("title", ""),
-                    item.get("link", ""),
-                    item.get("deadline", ""),
-                    item.get("published", ""),
-                    item.get("agency", ""),
-                    "",  # region
-                    "{}",  # raw_json
-                    "",  # created_at será preenchido
-                    "",  # seen
-                    "pendente",  # status
-                    item.get("description", ""),  # notes
-                    "",  # do_not_show
-                ]
-                new_rows.append(row)
-            
-            if new_rows:
-                from datetime import datetime
-                for row in new_rows:
-                    row[10] = datetime.utcnow().isoformat()  # created_at
-                
-                append_items_dedup(ws_items, header, body, new_rows)
-                result["items_saved"] = len(new_rows)
-        except Exception as e:
-            push_error("api_collect_universal_save", e)
-            result["save_error"] = str(e)
-    
-    # Calcula custo em USD e BRL
-    # Preços Perplexity (janeiro 2026):
-    # sonar: $1/milhão tokens (input e output)
-    # sonar-pro: $3/milhão input, $15/milhão output
-    input_tokens = result.get("total_input_tokens", 0)
-    output_tokens = result.get("total_output_tokens", 0)
-    
-    # Preços por modelo (USD por milhão de tokens)
-    model_prices = {
-        "sonar": {"input": 1.0, "output": 1.0},
-        "sonar-pro": {"input": 3.0, "output": 15.0},
-        "sonar-reasoning": {"input": 1.0, "output": 5.0},
-    }
-    
-    prices = model_prices.get(req.model_id, {"input": 1.0, "output": 1.0})
-    cost_usd = (input_tokens * prices["input"] / 1_000_000) + (output_tokens * prices["output"] / 1_000_000)
-    
-    # Cotação USD/BRL - usa valor padrão para não fazer leitura extra na planilha durante a coleta
-    usd_brl = 5.5  # fallback; o frontend aplica a cotação real do state
-    cost_brl = cost_usd * usd_brl
-    
-    result["cost"] = {
-        "input_tokens": input_tokens,
-        "output_tokens": output_tokens,
-        "total_tokens": input_tokens + output_tokens,
-        "cost_usd": round(cost_usd, 6),
-        "cost_brl": round(cost_brl, 4),
-        "usd_brl": usd_brl,
-        "model": req.model_id,
-    }
-    
+    # Atalho para não ler os links à toa; a checagem que vale é a de start_collect_job
+    active = await run_blocking("jobs", get_active_job)
+    if active is not None:
+        raise _job_conflict(active)
+
+    # Carrega links cadastrados e aplica os filtros da coleta
+    links = await run_blocking("sheets", read_links)
+    try:
+        links_to_process, skipped_already_run, message = select_links_for_collect(
+            links,
+            link_uid=req.link_uid,
+            groups=req.groups,
+            skip_already_run=req.skip_already_run,
+            max_links=req.max_links,
+            rerun_after_days=req.rerun_after_days,
+        )
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Link não encontrado")
+
+    try:
+        job = await run_blocking(
+            "jobs",
+            start_collect_job,
+            links_to_process,
+            min_days=req.min_days,
+            max_value=req.max_value,
+            model_id=req.model_id,
+            skipped_already_run=skipped_already_run,
+            message=message,
+        )
+    except ActiveJobError as e:
+        raise _job_conflict(e.job)
     return {
-        "result": result,
+        "job": job,
         "errors": get_errors(),
     }
 
 
+@app.get("/api/collect/jobs")
+async def api_collect_jobs(request: Request, limit: int = 20):
+    """
+    Lista os jobs de coleta mais recentes (o primeiro é o mais novo).
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    return {"jobs": await run_blocking("jobs", list_jobs, limit)}
+
+
+@app.get("/api/collect/jobs/{job_id}")
+async def api_collect_job(request: Request, job_id: str):
+    """
+    Estado atual de um job de coleta (progresso e, ao final, o resultado).
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    job = await run_blocking("jobs", get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"job": job}
+
+
+@app.get("/api/collect/jobs/{job_id}/events")
+async def api_collect_job_events(request: Request, job_id: str):
+    """
+    Stream SSE do job: evento 'progress' a cada mudança e 'done' ao terminar
+    (done/cancelled/error/interrupted), com o job completo no 'data'.
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    if await run_blocking("jobs", get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    async def _stream():
+        last_version = None
+        idle = 0.0
+        while True:
+            job = await run_blocking("jobs", get_job, job_id)
+            if job is None:
+                return
+            finished = job["state"] not in ACTIVE_STATES
+            if job["version"] != last_version or finished:
+                last_version = job["version"]
+                idle = 0.0
+                event = "done" if finished else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                if finished:
+                    return
+            elif idle >= 15:
+                # Comentário SSE: mantém a conexão viva em proxies
+                idle = 0.0
+                yield ": ping\n\n"
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(0.5)
+            idle += 0.5
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/collect/jobs/{job_id}/cancel")
+async def api_collect_job_cancel(request: Request, job_id: str):
+    """
+    Cancela um job: links ainda não iniciados são descartados e o que já
+    foi extraído é salvo.
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    job = await run_blocking("jobs", cancel_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"job": job}
+
+
+@app.post("/api/collect/jobs/{job_id}/resume")
+async def api_collect_job_resume(request: Request, job_id: str):
+    """
+    Retoma um job interrompido (ex.: servidor reiniciado) ou cancelado,
+    processando apenas os links que ainda não foram concluídos.
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    try:
+        job = await run_blocking("jobs", resume_job, job_id)
+    except ActiveJobError as e:
+        raise _job_conflict(e.job)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"job": job}
+
+
 @app.get("/api/items")
-async def api_get_items(request: Request, group: str, status: Optional[str] = None):
+async def api_get_items(
+    request: Request,
+    group: str,
+    status: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 0,
+    cursor: Optional[int] = None,
+    per_source_limit: int = 0,
+    deadline_from: Optional[str] = None,
+    deadline_to: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
     Retorna itens de um grupo, agrupados por fonte, com filtro opcional de status.
+
+    Parâmetros opcionais:
+    - limit / offset (ou cursor = 'next_offset' da página anterior)
+    - per_source_limit: máximo de itens por fonte
+    - deadline_from / deadline_to: janela de prazo (YYYY-MM-DD)
+    - fields: lista separada por vírgula dos campos de cada item
     """
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
 
     init_error_bus()
-    data = get_items_for_group(group, status_filter=status)
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    data = await run_blocking(
+        "items_read",
+        get_items_for_group,
+        group,
+        status_filter=status,
+        offset=cursor if cursor is not None else offset,
+        limit=limit,
+        per_source_limit=per_source_limit,
+        deadline_from=deadline_from or None,
+        deadline_to=deadline_to or None,
+        fields=field_list,
+    )
     return {
         "items": data,
         "errors": get_errors(),
@@ -534,7 +563,7 @@ async def api_update_items(request: Request, req: ItemsUpdateRequest):
     
     init_error_bus()
     updates_dicts = [item.dict() for item in req.updates]
-    result = update_items(updates_dicts)
+    result = await run_blocking("items_write", update_items, updates_dicts)
     return {
         "result": result,
         "errors": get_errors(),
@@ -550,13 +579,32 @@ async def api_delete_items(request: Request, req: ItemsDeleteRequest):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    result = delete_items_by_uids(req.uids)
+    result = await run_blocking("items_write", delete_items_by_uids, req.uids)
     return {
         "result": result,
         "errors": get_errors(),
     }
 
 
+@app.post("/api/items/reconcile")
+async def api_reconcile_items(request: Request):
+    """
+    Reconcilia a base local de itens com a aba 'items' (edições manuais na planilha).
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    init_error_bus()
+    stats = await run_blocking("sheets", refresh_items_from_sheet)
+    return {
+        "result": {
+            "reconciled": stats is not None,
+            "stats": stats,
+            "pending_ops": get_sync_status().get("pending_ops"),
+        },
+        "errors": get_errors(),
+    }
+
+
 @app.post("/api/items/clear")
 async def api_clear_items(request: Request):
     """
@@ -565,7 +613,7 @@ async def api_clear_items(request: Request):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    result = clear_all_items()
+    result = await run_blocking("items_write", clear_all_items)
     return {
         "result": result,
         "errors": get_errors(),
@@ -583,7 +631,7 @@ async def api_get_links(request: Request):
         raise HTTPException(status_code=401, detail="Não autenticado")
     
     init_error_bus()
-    links = read_links()
+    links = await run_blocking("sheets", read_links)
     return {
         "links": links,
         "errors": get_errors(),
@@ -607,8 +655,7 @@ async def api_add_link(request: Request, req: LinkCreateRequest):
     
     init_error_bus()
     try:
-        link = add_link(req.url, req.grupo, req.nome)
-        clear_groups_cache()  # Limpa cache para refletir novo grupo
+        link = await run_blocking("sheets", add_link, req.url, req.grupo, req.nome)
         return {
             "link": link,
             "errors": get_errors(),
@@ -617,6 +664,30 @@ async def api_add_link(request: Request, req: LinkCreateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/links/update")
+async def api_update_links(request: Request, req: LinksBulkUpdateRequest):
+    """
+    Atualiza vários links de uma vez (uma única escrita na planilha).
+
+    Body: { "updates": [ { "uid": "...", "ativo": "false", ... }, ... ] }
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+
+    init_error_bus()
+    # Apenas os campos fornecidos de cada link
+    updates = [item.dict(exclude_none=True) for item in req.updates]
+    try:
+        result = await run_blocking("sheets", update_links, updates)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "result": result,
+        "errors": get_errors(),
+    }
+
+
 @app.put("/api/links/{uid}")
 async def api_update_link(request: Request, uid: str, req: LinkUpdateRequest):
     """
@@ -644,12 +715,10 @@ async def api_update_link(request: Request, uid: str, req: LinkUpdateRequest):
     if not updates:
         raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
     
-    success = update_link(uid, updates)
+    success = await run_blocking("sheets", update_link, uid, updates)
     if not success:
         raise HTTPException(status_code=404, detail="Link não encontrado")
     
-    clear_groups_cache()  # Limpa cache caso grupo tenha sido alterado
-    
     return {
         "success": True,
         "errors": get_errors(),
@@ -668,12 +737,10 @@ async def api_delete_link(request: Request, uid: str):
     
     init_error_bus()
     
-    success = delete_link(uid)
+    success = await run_blocking("sheets", delete_link, uid)
     if not success:
         raise HTTPException(status_code=404, detail="Link não encontrado")
     
-    clear_groups_cache()  # Limpa cache pois grupo pode não ter mais links
-    
     return {
         "success": True,
         "errors": get_errors(),
@@ -691,7 +758,7 @@ async def api_diag_providers(request: Request):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    data = get_diag_providers()
+    data = await run_blocking("collect", get_diag_providers)
     return {
         "diag": data,
         "errors": get_errors(),
@@ -706,13 +773,49 @@ async def api_diag_logs(request: Request):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    data = get_diag_providers()
+    data = await run_blocking("sheets", get_diag_providers)
     return {
         "logs": data["logs"],
         "errors": get_errors(),
     }
 
 
+@app.get("/api/diag/items_sync")
+async def api_diag_items_sync(request: Request):
+    """
+    Estado da replicação da base local de itens para a aba 'items'.
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    init_error_bus()
+    return {
+        "sync": get_sync_status(),
+        "workers": get_worker_status(),
+        "errors": get_errors(),
+    }
+
+
+@app.get("/api/diag/sheets_quota")
+async def api_diag_sheets_quota(request: Request, format: Optional[str] = None):
+    """
+    Contadores do controle de cota do Google Sheets (chamadas, tentativas
+    extras, tempo esperando). format=prometheus devolve no formato texto.
+    """
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    if format == "prometheus":
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+    return {"quota": get_quota_stats()}
+
+
+@app.get("/api/diag/llm_cache")
+async def api_diag_llm_cache(request: Request):
+    """Acertos/erros do cache de respostas da Perplexity e tokens economizados."""
+    if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    return {"llm_cache": get_cache_stats()}
+
+
 # ---------- ENDPOINT PERPLEXITY ----------
 @app.post("/api/perplexity/count_tokens")
 async def api_perplexity_count_tokens(request: Request, req: TokenCountRequest):
@@ -723,7 +826,7 @@ async def api_perplexity_count_tokens(request: Request, req: TokenCountRequest):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    tokens, chars, error = count_tokens_from_url(req.url)
+    tokens, chars, error = await run_blocking("perplexity", count_tokens_from_url, req.url)
     return {
         "ok": error is None,
         "tokens": tokens,
@@ -745,7 +848,9 @@ async def api_perplexity_search(request: Request, req: PerplexityRequest):
     if request.cookies.get(SECRET_COOKIE_NAME) != "authenticated":
         raise HTTPException(status_code=401, detail="Não autenticado")
     init_error_bus()
-    result = call_perplexity_chat(
+    result = await run_blocking(
+        "perplexity",
+        call_perplexity_chat,
         prompt=req.prompt,
         model_id=req.modelo_api,
         temperature=req.temperature,
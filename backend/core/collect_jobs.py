@@ -0,0 +1,675 @@
+# -*- coding: utf-8 -*-
+"""
+Jobs de coleta universal em segundo plano.
+
+A coleta universal pode levar muitos minutos; rodá-la dentro da requisição
+HTTP esbarrava em timeouts do navegador/proxy. Agora:
+
+- POST /api/collect/universal cria um job e responde na hora com o id
+- o job roda numa thread própria, em fluxo contínuo: cada link que termina
+  entrega seus itens a um buffer, gravado em micro-lotes (a cada
+  COLLECT_JOB_CHUNK links, padrão 10, COLLECT_SAVE_ITEMS itens, padrão 50,
+  ou COLLECT_SAVE_SECONDS segundos, padrão 15). Após cada gravação o status
+  dos links é atualizado e o job é salvo em disco (data/jobs/); nada fica
+  acumulado em memória até o fim
+- cada link tem um checkpoint no job: pending -> fetched -> extracted ->
+  saved (ou error), com content_hash e tokens gastos. Os itens de um link
+  'extracted' ficam no checkpoint até serem gravados, então uma retomada
+  grava esses itens direto, sem baixar a página nem pagar a Perplexity de novo
+- o progresso (processados/total, url atual, tokens) é lido pelo endpoint
+  SSE /api/collect/jobs/{id}/events
+- cancelar descarta os links ainda não iniciados; o que já foi extraído é salvo
+- jobs que estavam rodando quando o servidor parou ficam 'interrupted' e
+  podem ser retomados (só os links pendentes são processados)
+- só um job ativo por vez: criar ou retomar outro levanta ActiveJobError
+  (conferido e registrado sob o mesmo lock)
+- ao criar um job, além dele só os COLLECT_JOBS_KEEP jobs encerrados mais recentes
+  (padrão 50) são mantidos; os demais saem da memória e de data/jobs/
+
+As funções públicas leem/gravam data/jobs/: nos endpoints, chame-as via
+run_blocking (faixa "jobs").
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_int_setting
+from .errors import get_errors, init_error_bus, push_error
+from .local_cache import JsonCache
+
+ACTIVE_STATES = ("queued", "running", "cancelling")
+RESUMABLE_STATES = ("interrupted", "cancelled", "error")
+
+# Estados de cada link dentro de um job
+LINK_STATES = ("pending", "fetched", "extracted", "saved", "error")
+LINK_FINAL_STATES = ("saved", "error")
+
+# Preços Perplexity (USD por milhão de tokens, janeiro 2026)
+MODEL_PRICES = {
+    "sonar": {"input": 1.0, "output": 1.0},
+    "sonar-pro": {"input": 3.0, "output": 15.0},
+    "sonar-reasoning": {"input": 1.0, "output": 5.0},
+}
+
+_job_files = JsonCache("jobs")
+_jobs: Dict[str, Dict[str, Any]] = {}
+_cancel_events: Dict[str, threading.Event] = {}
+_jobs_lock = threading.RLock()
+_loaded = False
+
+
+class ActiveJobError(RuntimeError):
+    """Já existe uma coleta ativa; 'job' é a versão pública dela."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__("Já existe uma coleta em andamento")
+        self.job = job
+
+
+# ---------- Regras da coleta (compartilhadas com o endpoint) ----------
+
+def select_links_for_collect(
+    links: List[Dict[str, Any]],
+    link_uid: Optional[str] = None,
+    groups: Optional[List[str]] = None,
+    skip_already_run: bool = True,
+    max_links: int = 0,
+    rerun_after_days: int = 0,
+) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """
+    Aplica os filtros da coleta universal aos links cadastrados.
+    Com skip_already_run, links com last_run são pulados; se rerun_after_days
+    > 0, só os executados há menos que esse número de dias.
+    Retorna (links_a_processar, pulados_por_ja_executados, mensagem).
+    'mensagem' vem preenchida quando não sobra nenhum link.
+    Levanta LookupError se 'link_uid' não existir.
+    """
+    if not links:
+        return [], 0, "Nenhum link cadastrado para coleta."
+
+    # Se link_uid fornecido, filtra para coletar só esse
+    if link_uid:
+        links = [l for l in links if l.get("uid") == link_uid]
+        if not links:
+            raise LookupError("Link não encontrado")
+
+    # Se groups fornecido, filtra por grupos selecionados
+    if groups:
+        links = [l for l in links if l.get("grupo") in groups]
+        if not links:
+            return [], 0, "Nenhum link cadastrado nos grupos selecionados."
+
+    # Filtra apenas links ativos (ativo == 'true'), igual ao frontend
+    links = [l for l in links if l.get("ativo", "true") == "true"]
+    if not links:
+        return [], 0, "Nenhum link ativo para processar."
+
+    skipped_already_run = 0
+    if skip_already_run:
+        # Regra de economia: não reprocessa links com last_run preenchido
+        # (ou, com rerun_after_days, executados recentemente).
+        cutoff = ""
+        if rerun_after_days and rerun_after_days > 0:
+            cutoff = (datetime.utcnow() - timedelta(days=rerun_after_days)).isoformat()
+        not_processed_links = []
+        for link in links:
+            last_run = (link.get("last_run") or "").strip()
+            if last_run and (not cutoff or last_run >= cutoff):
+                skipped_already_run += 1
+                continue
+            not_processed_links.append(link)
+        links = not_processed_links
+
+        if not links:
+            return [], skipped_already_run, (
+                "Todos os links ativos selecionados já foram processados anteriormente."
+            )
+
+    # Limita quantidade de links se max_links > 0
+    if max_links and max_links > 0:
+        links = links[:max_links]
+    return links, skipped_already_run, None
+
+
+def save_collected_items(items: List[Dict[str, Any]]) -> int:
+    """Converte itens extraídos em linhas da aba 'items' e grava (com dedup por uid)."""
+    from .domain import sha_id
+    from .sheets import append_items_dedup, read_items_cached
+
+    if not items:
+        return 0
+
+    header, body = read_items_cached()
+    created_at = datetime.utcnow().isoformat()
+    new_rows = []
+    for item in items:
+        new_rows.append([
+            sha_id(
+                item.get("group", ""),
+                item.get("source", ""),
+                item.get("title", ""),
+                item.get("link", ""),
+            ),
+            item.get("group", ""),
+            item.get("source", ""),
+            item.get("title", ""),
+            item.get("link", ""),
+            item.get("deadline", ""),
+            item.get("published", ""),
+            item.get("agency", ""),
+            "",  # region
+            "{}",  # raw_json
+            created_at,
+            "",  # seen
+            "pendente",  # status
+            item.get("description", ""),  # notes
+            "",  # do_not_show
+        ])
+
+    # A base local ignora ws_items (a planilha é atualizada pelo sync)
+    append_items_dedup(None, header, body, new_rows)
+    return len(new_rows)
+
+
+def collect_cost(
+    input_tokens: int,
+    output_tokens: int,
+    model_id: str,
+    llm_cache: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Custo estimado em USD e BRL de uma coleta.
+    Com 'llm_cache' (contadores do cache de respostas), inclui os acertos e
+    os tokens/custo economizados.
+    """
+    prices = MODEL_PRICES.get(model_id, {"input": 1.0, "output": 1.0})
+
+    def _usd(tin: int, tout: int) -> float:
+        return (tin * prices["input"] / 1_000_000) + (tout * prices["output"] / 1_000_000)
+
+    cost_usd = _usd(input_tokens, output_tokens)
+
+    # Cotação USD/BRL - usa valor padrão para não fazer leitura extra na planilha durante a coleta
+    usd_brl = 5.5  # fallback; o frontend aplica a cotação real do state
+    cost_brl = cost_usd * usd_brl
+
+    cost = {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "cost_usd": round(cost_usd, 6),
+        "cost_brl": round(cost_brl, 4),
+        "usd_brl": usd_brl,
+        "model": model_id,
+    }
+    if llm_cache:
+        saved_in = llm_cache.get("saved_input_tokens", 0)
+        saved_out = llm_cache.get("saved_output_tokens", 0)
+        saved_usd = _usd(saved_in, saved_out)
+        cost.update(
+            cache_hits=llm_cache.get("hits", 0),
+            cache_misses=llm_cache.get("misses", 0),
+            tokens_saved=saved_in + saved_out,
+            saved_usd=round(saved_usd, 6),
+            saved_brl=round(saved_usd * usd_brl, 4),
+        )
+    return cost
+
+
+def empty_collect_result(message: Optional[str] = None, skipped_already_run: int = 0) -> Dict[str, Any]:
+    """Resultado no mesmo formato de extract_from_links, sem nenhum link processado."""
+    result = {
+        "all_items": [],
+        "stats_by_group": {},
+        "errors": [],
+        "processed": 0,
+        "total": 0,
+        "total_input_tokens": 0,
+        "total_output_tokens": 0,
+        "cache_hits": 0,
+        "items_saved": 0,
+        "items_found": 0,
+        "skipped_already_run": skipped_already_run,
+    }
+    if message:
+        result["message"] = message
+    return result
+
+
+def _merge_result(acc: Dict[str, Any], part: Dict[str, Any]) -> None:
+    """Soma o resultado de um lote de links ao acumulado do job."""
+    for key in ("processed", "total_input_tokens", "total_output_tokens", "cache_hits",
+                "structured_hits"):
+        acc[key] = acc.get(key, 0) + part.get(key, 0)
+    acc["errors"].extend(part.get("errors", []))
+    acc.setdefault("content_kept", {}).update(part.get("content_kept", {}))
+    cache = acc.setdefault("llm_cache", {})
+    for key, value in part.get("llm_cache", {}).items():
+        cache[key] = cache.get(key, 0) + value
+    for grupo, st in part.get("stats_by_group", {}).items():
+        dst = acc["stats_by_group"].setdefault(
+            grupo, {"total": 0, "links": 0, "input_tokens": 0, "output_tokens": 0}
+        )
+        for k in dst:
+            dst[k] += st.get(k, 0)
+
+
+# ---------- Persistência ----------
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _link_key(link: Dict[str, Any]) -> str:
+    return link.get("uid") or link.get("url", "")
+
+
+def _save(job: Dict[str, Any]) -> None:
+    with _jobs_lock:
+        _job_files.set(job["id"], job)
+
+
+def _new_checkpoints(links: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        _link_key(l): {"state": "pending", "content_hash": "", "input_tokens": 0, "output_tokens": 0}
+        for l in links
+    }
+
+
+def _checkpoint(job: Dict[str, Any], key: str, **fields: Any) -> None:
+    """Atualiza o checkpoint de um link (não salva em disco)."""
+    with _jobs_lock:
+        cp = job.setdefault("checkpoints", {}).setdefault(key, {"state": "pending"})
+        cp.update(fields)
+        cp["updated_at"] = _now()
+
+
+def _count_processed(job: Dict[str, Any]) -> int:
+    """Links que já passaram pela extração (gravados ou não)."""
+    return sum(
+        1 for cp in job.get("checkpoints", {}).values()
+        if cp.get("state") in ("extracted",) + LINK_FINAL_STATES
+    )
+
+
+def _load_jobs() -> None:
+    """Carrega os jobs do disco; os que estavam ativos viram 'interrupted'."""
+    global _loaded
+    with _jobs_lock:
+        if _loaded:
+            return
+        _loaded = True
+        for job_id, job in _job_files.items():
+            if not isinstance(job, dict):
+                continue
+            if "checkpoints" not in job:
+                # Jobs antigos: só a lista de links concluídos
+                job["checkpoints"] = _new_checkpoints(job.get("links", []))
+                for key in job.pop("done_keys", []):
+                    job["checkpoints"].setdefault(key, {})["state"] = "saved"
+            if job.get("state") in ACTIVE_STATES:
+                job["state"] = "interrupted"
+                job["finished_at"] = job.get("finished_at") or _now()
+                _save(job)
+            _jobs[job_id] = job
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia do job para a API (sem a lista de links nem os checkpoints)."""
+    out = {k: v for k, v in job.items() if k not in ("links", "checkpoints")}
+    counts = {state: 0 for state in LINK_STATES}
+    for cp in job.get("checkpoints", {}).values():
+        state = cp.get("state", "pending")
+        counts[state] = counts.get(state, 0) + 1
+    out["link_states"] = counts
+    out["remaining"] = sum(n for state, n in counts.items() if state not in LINK_FINAL_STATES)
+    out["resumable"] = job.get("state") in RESUMABLE_STATES and out["remaining"] > 0
+    return out
+
+
+def _touch(job: Dict[str, Any], **fields: Any) -> None:
+    with _jobs_lock:
+        job.update(fields)
+        job["version"] = job.get("version", 0) + 1
+
+
+# ---------- API de jobs ----------
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    _load_jobs()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _public(job) if job else None
+
+
+def list_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+    """Jobs mais recentes primeiro."""
+    _load_jobs()
+    with _jobs_lock:
+        jobs = sorted(_jobs.values(), key=lambda j: j.get("created_at", ""), reverse=True)
+        return [_public(j) for j in jobs[:limit]]
+
+
+def _find_active(exclude: str = "") -> Optional[Dict[str, Any]]:
+    """Job ativo (chamar com _jobs_lock)."""
+    for job in _jobs.values():
+        if job.get("state") in ACTIVE_STATES and job["id"] != exclude:
+            return job
+    return None
+
+
+def get_active_job() -> Optional[Dict[str, Any]]:
+    _load_jobs()
+    with _jobs_lock:
+        job = _find_active()
+        return _public(job) if job else None
+
+
+def _prune_jobs(exclude: str = "") -> None:
+    """
+    Apaga os jobs encerrados além dos COLLECT_JOBS_KEEP mais recentes
+    (chamar com _jobs_lock). 'exclude' é o job recém-criado, que sempre fica.
+    """
+    keep = max(0, get_int_setting("COLLECT_JOBS_KEEP", 50))
+    finished = sorted(
+        (j for j in _jobs.values() if j.get("state") not in ACTIVE_STATES and j["id"] != exclude),
+        key=lambda j: j.get("created_at", ""),
+        reverse=True,
+    )
+    for job in finished[keep:]:
+        job_id = job["id"]
+        _jobs.pop(job_id, None)
+        _cancel_events.pop(job_id, None)
+        _job_files.delete(job_id)
+
+
+def start_collect_job(
+    links: List[Dict[str, Any]],
+    min_days: int,
+    max_value: Optional[float],
+    model_id: str,
+    skipped_already_run: int = 0,
+    message: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Cria e inicia um job de coleta para 'links'.
+    Sem links, o job já nasce concluído (com 'message' no resultado).
+    Levanta ActiveJobError se já houver uma coleta ativa.
+    """
+    _load_jobs()
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "id": job_id,
+        "kind": "universal_collect",
+        "state": "queued",
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "params": {"min_days": min_days, "max_value": max_value, "model_id": model_id},
+        "links": links,
+        "checkpoints": _new_checkpoints(links),
+        "progress": {
+            "processed": 0,
+            "total": len(links),
+            "current_url": "",
+            "input_tokens": 0,
+            "output_tokens": 0,
+        },
+        "result": empty_collect_result(message, skipped_already_run),
+        "errors": [],
+        "version": 0,
+    }
+    job["result"]["total"] = len(links)
+    if not links:
+        job["state"] = "done"
+        job["finished_at"] = _now()
+        job["result"]["cost"] = collect_cost(0, 0, model_id)
+
+    with _jobs_lock:
+        # Confere e registra juntos: duas requisições simultâneas não criam dois jobs
+        active = _find_active()
+        if active is not None:
+            raise ActiveJobError(_public(active))
+        _jobs[job_id] = job
+        _prune_jobs(exclude=job_id)
+    _save(job)
+    if links:
+        _launch(job_id)
+    return _public(job)
+
+
+def cancel_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Pede o cancelamento: links não iniciados são descartados."""
+    _load_jobs()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        if job.get("state") in ("queued", "running"):
+            _touch(job, state="cancelling")
+            ev = _cancel_events.get(job_id)
+            if ev is not None:
+                ev.set()
+        return _public(job)
+
+
+def resume_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retoma um job interrompido/cancelado, processando só os links pendentes.
+    Levanta ActiveJobError se outra coleta estiver ativa.
+    """
+    _load_jobs()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        if job.get("state") not in RESUMABLE_STATES:
+            return _public(job)
+        active = _find_active(exclude=job_id)
+        if active is not None:
+            raise ActiveJobError(_public(active))
+        _touch(job, state="queued", finished_at=None)
+    _save(job)
+    _launch(job_id)
+    return _public(job)
+
+
+def _launch(job_id: str) -> None:
+    with _jobs_lock:
+        _cancel_events[job_id] = threading.Event()
+    threading.Thread(
+        target=_run_job, args=(job_id,), name=f"collect-job-{job_id}", daemon=True
+    ).start()
+
+
+def _run_job(job_id: str) -> None:
+    """
+    Executa os links pendentes do job em fluxo contínuo
+    (download -> limpeza -> extração -> normalização -> dedup/gravação),
+    salvando itens e progresso em micro-lotes. Links que já estavam
+    'extracted' numa execução anterior são gravados sem nova extração.
+    """
+    from .sheets import update_link_run_status_batch
+    from .universal_extractor import extract_from_links
+
+    init_error_bus()
+    job = _jobs[job_id]
+    cancel = _cancel_events[job_id]
+    params = job["params"]
+    acc = job["result"]
+    progress = job["progress"]
+
+    checkpoints = job["checkpoints"]
+    ready: List[Dict[str, Any]] = []    # já extraídos: só falta gravar
+    pending: List[Dict[str, Any]] = []  # precisam de download/extração
+    for link in job["links"]:
+        cp = checkpoints.get(_link_key(link), {})
+        if cp.get("state") in LINK_FINAL_STATES:
+            continue
+        if cp.get("state") == "extracted" and "items" in cp:
+            ready.append(link)
+        else:
+            pending.append(link)
+    max_links = max(1, get_int_setting("COLLECT_JOB_CHUNK", 10))
+    max_items = max(1, get_int_setting("COLLECT_SAVE_ITEMS", 50))
+    max_wait = max(1, get_int_setting("COLLECT_SAVE_SECONDS", 15))
+    checkpoint_every = max(0, get_int_setting("COLLECT_CHECKPOINT_SECONDS", 5))
+    acc.pop("save_error", None)
+    _touch(
+        job,
+        state="cancelling" if cancel.is_set() else "running",
+        started_at=job.get("started_at") or _now(),
+    )
+
+    base = {
+        "processed": _count_processed(job),
+        "input_tokens": acc["total_input_tokens"],
+        "output_tokens": acc["total_output_tokens"],
+    }
+    buffer: Dict[str, Any] = {"items": [], "statuses": [], "keys": [], "since": time.monotonic()}
+    last_save = {"at": time.monotonic()}
+    now_iso = _now()
+
+    def _save_job() -> None:
+        last_save["at"] = time.monotonic()
+        _save(job)
+
+    def _flush() -> None:
+        """Grava o micro-lote: itens, status dos links e o job em disco."""
+        if not buffer["keys"]:
+            return
+        items, statuses, keys = buffer["items"], buffer["statuses"], buffer["keys"]
+        buffer.update(items=[], statuses=[], keys=[], since=time.monotonic())
+        try:
+            saved = save_collected_items(items)
+        except Exception as e:
+            # Os checkpoints continuam 'extracted' (com os itens): a retomada grava de novo
+            push_error("collect_job.save", e)
+            with _jobs_lock:
+                acc["save_error"] = str(e)
+            _save_job()
+            return
+        if statuses:
+            try:
+                update_link_run_status_batch(statuses)
+            except Exception as e:
+                push_error("collect_job.status", e)
+        with _jobs_lock:
+            acc["items_saved"] = acc.get("items_saved", 0) + saved
+            acc["items_found"] = acc.get("items_found", 0) + len(items)
+            job["version"] = job.get("version", 0) + 1
+        with _jobs_lock:
+            for key, ok, n_items in keys:
+                if ok:
+                    checkpoints.get(key, {}).pop("items", None)
+                    _checkpoint(job, key, state="saved", items_count=n_items)
+                else:
+                    _checkpoint(job, key, state="error")
+        _save_job()
+
+    def _sink(out: Dict[str, Any]) -> None:
+        buffer["items"].extend(out["items"])
+        if out["status"]:
+            buffer["statuses"].append(out["status"])
+        buffer["keys"].append((_link_key(out["link"]), out["ok"], len(out["items"])))
+        if (
+            len(buffer["keys"]) >= max_links
+            or len(buffer["items"]) >= max_items
+            or time.monotonic() - buffer["since"] >= max_wait
+        ):
+            _flush()
+
+    def _on_stage(link: Dict[str, Any], stage: str, info: Dict[str, Any]) -> None:
+        # Roda nas threads do pool
+        key = _link_key(link)
+        if stage == "fetched":
+            _checkpoint(job, key, state="fetched", content_hash=info.get("content_hash", ""))
+        elif stage == "extracted":
+            _checkpoint(
+                job, key,
+                state="extracted",
+                content_hash=info.get("content_hash", ""),
+                input_tokens=info.get("input_tokens", 0),
+                output_tokens=info.get("output_tokens", 0),
+                cached=info.get("cached", False),
+                items=list(info.get("items", [])),
+            )
+            # Salva logo (no máximo a cada COLLECT_CHECKPOINT_SECONDS): se o
+            # servidor cair, os links já extraídos não pagam a Perplexity de novo
+            if time.monotonic() - last_save["at"] >= checkpoint_every:
+                _save_job()
+
+    def _on_progress(p: Dict[str, Any]) -> None:
+        with _jobs_lock:
+            progress.update(
+                processed=base["processed"] + p["processed"],
+                current_url=p.get("url", ""),
+                input_tokens=base["input_tokens"] + p["input_tokens"],
+                output_tokens=base["output_tokens"] + p["output_tokens"],
+            )
+            job["version"] = job.get("version", 0) + 1
+
+    try:
+        # Retomada: grava o que já tinha sido extraído antes da interrupção
+        for link in ready:
+            cp = checkpoints[_link_key(link)]
+            status = None
+            if link.get("uid"):
+                status = {
+                    "uid": link["uid"],
+                    "status": "ok",
+                    "items_count": len(cp["items"]),
+                    "last_run": now_iso,
+                    "content_hash": cp.get("content_hash", ""),
+                }
+            _sink({"link": link, "ok": True, "items": cp["items"], "status": status})
+
+        part = extract_from_links(
+            links=pending,
+            min_days=params["min_days"],
+            max_value=params["max_value"],
+            model_id=params["model_id"],
+            on_progress=_on_progress,
+            cancel_event=cancel,
+            sink=_sink,
+            on_stage=_on_stage,
+        )
+        _flush()
+        with _jobs_lock:
+            _merge_result(acc, part)
+            acc["processed"] = _count_processed(job)
+        if cancel.is_set():
+            final_state = "cancelled"
+        elif acc.get("save_error"):
+            # Itens extraídos mas não gravados: fica retomável
+            final_state = "error"
+        else:
+            final_state = "done"
+    except Exception as e:
+        push_error("collect_job", e)
+        acc["job_error"] = str(e)
+        try:
+            _flush()
+        except Exception as flush_error:
+            push_error("collect_job.save", flush_error)
+        final_state = "error"
+
+    with _jobs_lock:
+        acc["cost"] = collect_cost(
+            acc["total_input_tokens"], acc["total_output_tokens"], params["model_id"], acc.get("llm_cache"),
+        )
+        progress["current_url"] = ""
+    _touch(
+        job,
+        state=final_state,
+        finished_at=_now(),
+        errors=job.get("errors", []) + get_errors(),
+    )
+    _save(job)
+    with _jobs_lock:
+        _cancel_events.pop(job_id, None)
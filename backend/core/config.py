@@ -196,6 +196,48 @@ def get_perplexity_api_key() -> Optional[str]:
     return os.getenv("PERPLEXITY_API_KEY")
 
 
+# =============================================================================
+# AJUSTES DE DESEMPENHO (opcionais, via .env)
+# =============================================================================
+
+def get_int_setting(name: str, default: int) -> int:
+    """
+    Lê um ajuste inteiro do ambiente (.env).
+    Retorna 'default' se a variável não existir ou for inválida.
+    """
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+def get_bool_setting(name: str, default: bool) -> bool:
+    """
+    Lê um ajuste booleano do ambiente (.env): true/1/sim/yes ou false/0/nao/no.
+    Retorna 'default' se a variável não existir ou for inválida.
+    """
+    raw = (os.getenv(name) or "").strip().lower()
+    if raw in ("1", "true", "sim", "yes", "on"):
+        return True
+    if raw in ("0", "false", "nao", "não", "no", "off"):
+        return False
+    return default
+
+
+def get_data_dir() -> Path:
+    """
+    Retorna (e cria se preciso) a pasta de dados locais: caches e banco SQLite.
+    Fica ao lado do executável (BASE_DIR/data), ou em DATA_DIR se definido no .env.
+    """
+    custom = os.getenv("DATA_DIR")
+    path = Path(custom) if custom else BASE_DIR / "data"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 # =============================================================================
 # DIAGNÓSTICO
 # =============================================================================
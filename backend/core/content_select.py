@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Seleção do trecho da página que vai para a Perplexity.
+
+Antes o prompt levava só os primeiros 6000 caracteres do texto limpo, e
+editais listados mais abaixo na página se perdiam. Agora:
+
+- o texto é dividido em blocos de ~EXTRACT_BLOCK_CHARS caracteres (padrão
+  500), cortando em quebras de linha ou fim de frase
+- cada bloco recebe uma nota por heurísticas locais baratas: datas,
+  palavras como "edital", "chamada", "prazo", "inscrições" e valores em
+  dinheiro (R$, US$, €)
+- os melhores blocos entram até o orçamento de EXTRACT_PREVIEW_TOKENS tokens
+  (padrão 1500, ~6000 caracteres) e voltam na ordem original da página,
+  com "[...]" onde houve corte
+
+Páginas que cabem no orçamento vão inteiras, como antes.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Tuple
+
+from .config import get_int_setting
+
+# Estimativa de caracteres por token (texto em português/inglês)
+CHARS_PER_TOKEN = 4
+
+GAP_MARKER = "[...]"
+
+_DATE_RE = re.compile(
+    r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b"
+    r"|\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b\d{1,2}\s+de\s+(?:jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez)[a-zç]*\b"
+    r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b",
+    re.IGNORECASE,
+)
+
+_KEYWORD_RE = re.compile(
+    r"\b(?:edita(?:l|is)|chamadas?|prazos?|inscri[cç](?:ão|ões|ao|oes)|submiss(?:ão|ões|ao|oes)"
+    r"|sele[cç](?:ão|ao)|propostas?|premia[cç](?:ão|ao)|fomento|financiamento|encerra\w*"
+    r"|call for|deadline|grants?|funding|applications?|open call)\b",
+    re.IGNORECASE,
+)
+
+_MONEY_RE = re.compile(
+    r"(?:R\$|US\$|U\$|€|£|\$)\s?\d"
+    r"|\b\d[\d.,]*\s?(?:mil|milhões|milhoes|bilhões|million|thousand)\b",
+    re.IGNORECASE,
+)
+
+# Corte preferido dentro de um trecho longo: fim de frase
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;:])\s+")
+
+_WEIGHTS = {"date": 3.0, "keyword": 2.0, "money": 2.0}
+
+
+def split_blocks(text: str, block_chars: int) -> List[str]:
+    """Divide o texto em blocos de até ~'block_chars' caracteres."""
+    blocks: List[str] = []
+    current = ""
+    for line in text.splitlines():
+        for piece in _SENTENCE_END_RE.split(line):
+            piece = piece.strip()
+            while len(piece) > block_chars:
+                # Frase enorme (texto sem pontuação): corta no último espaço
+                cut = piece.rfind(" ", 0, block_chars)
+                cut = cut if cut > 0 else block_chars
+                if current:
+                    blocks.append(current)
+                    current = ""
+                blocks.append(piece[:cut].strip())
+                piece = piece[cut:].strip()
+            if not piece:
+                continue
+            if current and len(current) + 1 + len(piece) > block_chars:
+                blocks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def score_block(block: str) -> float:
+    """Nota de relevância de um bloco (0 = nada que lembre um edital)."""
+    hits = (
+        _WEIGHTS["date"] * len(_DATE_RE.findall(block))
+        + _WEIGHTS["keyword"] * len(_KEYWORD_RE.findall(block))
+        + _WEIGHTS["money"] * len(_MONEY_RE.findall(block))
+    )
+    # Densidade: blocos curtos e cheios de sinais valem mais que longos com um só
+    return hits * 500.0 / max(len(block), 100)
+
+
+def select_content(text: str, budget_tokens: int = 0) -> Tuple[str, Dict[str, Any]]:
+    """
+    Escolhe os blocos mais relevantes do texto dentro do orçamento de tokens.
+
+    Retorna: (texto_selecionado, stats) com stats = {chars_total, chars_kept,
+    blocks_total, blocks_kept, truncated}.
+    """
+    budget_tokens = budget_tokens or get_int_setting("EXTRACT_PREVIEW_TOKENS", 1500)
+    budget_chars = max(1, budget_tokens) * CHARS_PER_TOKEN
+    text = text or ""
+    stats: Dict[str, Any] = {
+        "chars_total": len(text),
+        "chars_kept": len(text),
+        "blocks_total": 1 if text else 0,
+        "blocks_kept": 1 if text else 0,
+        "truncated": False,
+    }
+    if len(text) <= budget_chars:
+        return text, stats
+
+    block_chars = max(100, get_int_setting("EXTRACT_BLOCK_CHARS", 500))
+    blocks = split_blocks(text, min(block_chars, budget_chars))
+    # Maior nota primeiro; o início da página desempata (título, contexto)
+    ranked = sorted(
+        range(len(blocks)),
+        key=lambda i: (-(score_block(blocks[i]) + (1.0 if i == 0 else 0.0)), i),
+    )
+
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        cost = len(blocks[i]) + len(GAP_MARKER) + 2
+        if used + cost > budget_chars:
+            continue
+        chosen.append(i)
+        used += cost
+
+    parts: List[str] = []
+    previous = -1
+    for i in sorted(chosen):
+        if i != previous + 1:
+            parts.append(GAP_MARKER)
+        parts.append(blocks[i])
+        previous = i
+    if previous != len(blocks) - 1:
+        parts.append(GAP_MARKER)
+
+    selected = " ".join(parts)
+    stats.update(
+        chars_kept=sum(len(blocks[i]) for i in chosen),
+        blocks_total=len(blocks),
+        blocks_kept=len(chosen),
+        truncated=True,
+    )
+    return selected, stats
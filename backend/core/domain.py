@@ -10,16 +10,25 @@ Lógica de domínio principal do Editais Watcher:
 
 from __future__ import annotations
 
+import contextvars
 import hashlib
+import importlib.util
 import json
+import os
 import re
+import threading
+import time
 import unicodedata
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
 from dateutil import parser as date_parser
 
+from .config import BASE_DIR, get_int_setting
 from .errors import push_error
 from .sheets import (
     ITEMS_HEADER,
@@ -27,16 +36,16 @@ from .sheets import (
     STATUS_BG,
     STATUS_COLORS,
     open_sheet,
-    values_batch_update,
     read_items_cached,
-    invalidate_items_cache,
     append_items_dedup,
     read_config,
     upsert_config,
     clear_items_sheet,
     sheet_log,
+    sheet_operation,
     get_logs_tail,
 )
+from .item_store import ensure_loaded as ensure_items_loaded, get_item_store, request_sync
 
 
 
@@ -129,37 +138,35 @@ def _canon_group(s: str) -> str:
 def _migrate_relative_links() -> int:
     """
     Conserta links relativos já salvos (ex.: '?1dmy=...') na aba 'items'.
+    Passa pela base local, como as demais escritas: a planilha é atualizada
+    pela thread de sincronização.
     Retorna a quantidade de links corrigidos.
     """
     try:
-        _, _, ws_items_admin, _ = open_sheet()
-        rows = ws_items_admin.get_all_values()
-        if not rows:
-            return 0
-        header = rows[0]
-        body = rows[1:]
-        if "link" not in header or "source" not in header:
+        header, body = read_items_cached()
+        if "uid" not in header or "link" not in header or "source" not in header:
             return 0
+        idx_uid = header.index("uid")
         idx_link = header.index("link")
         idx_source = header.index("source")
-        updates: List[Tuple[str, List[List[str]]]] = []
-        for i, r in enumerate(body, start=2):
-            if len(r) <= max(idx_link, idx_source):
+        cells: Dict[str, Dict[str, str]] = {}
+        for r in body:
+            if len(r) <= max(idx_uid, idx_link, idx_source):
                 continue
+            uid = (r[idx_uid] or "").strip()
             old_link = (r[idx_link] or "").strip()
             source = (r[idx_source] or "").strip()
-            if not old_link:
+            if not uid or not old_link:
                 continue
             if urlparse(old_link).scheme in ("http", "https"):
                 continue
             new_link = absolutize_for_source(old_link, source)
             if new_link and new_link != old_link:
-                cell = f"items!{col_letter(idx_link)}{i}"
-                updates.append((cell, [[new_link]]))
-        if updates:
-            values_batch_update(ws_items_admin, updates)
-            invalidate_items_cache()
-        return len(updates)
+                cells[uid] = {"link": new_link}
+        if cells:
+            get_item_store().update_cells(cells)
+            request_sync()
+        return len(cells)
     except Exception as e:
         push_error("migrate_relative_links", e)
         return 0
@@ -198,6 +205,125 @@ def add_row(rows: List[List[str]], group: str, it: Dict[str, Any]) -> None:
     )
 
 
+# ---------- Providers (coletores por fonte) ----------
+# Cada arquivo .py da pasta de providers (PROVIDERS_DIR no .env, padrão
+# BASE_DIR/providers) com um dict PROVIDER ({"name", "group"}) e uma função
+# fetch(cfg) -> lista de itens é um provider. Sem a pasta, não há providers
+# e a coleta por providers não traz nada (a coleta universal não depende dela).
+
+_provider_modules: Optional[List[Any]] = None
+_provider_lock = threading.Lock()
+
+
+def _providers_dir():
+    custom = os.getenv("PROVIDERS_DIR")
+    return Path(custom) if custom else BASE_DIR / "providers"
+
+
+def load_providers() -> List[Any]:
+    """Módulos de provider da pasta, em ordem de nome (carregados uma vez)."""
+    global _provider_modules
+    with _provider_lock:
+        if _provider_modules is not None:
+            return list(_provider_modules)
+        mods: List[Any] = []
+        folder = _providers_dir()
+        for path in sorted(folder.glob("*.py")) if folder.is_dir() else []:
+            if path.name.startswith("_"):
+                continue
+            try:
+                spec = importlib.util.spec_from_file_location(f"providers.{path.stem}", path)
+                mod = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(mod)
+            except Exception as e:
+                push_error(f"load_providers {path.name}", e)
+                continue
+            if isinstance(getattr(mod, "PROVIDER", None), dict) and callable(getattr(mod, "fetch", None)):
+                mods.append(mod)
+        _provider_modules = mods
+        return list(mods)
+
+
+def reload_provider_modules() -> None:
+    """Esquece os providers carregados: a próxima load_providers relê a pasta."""
+    global _provider_modules
+    with _provider_lock:
+        _provider_modules = None
+
+
+def _fetch_providers(providers: List[Any], cfg: Dict[str, str], label: str = "fetch") -> List[Dict[str, Any]]:
+    """
+    Executa p.fetch(cfg) de todos os providers em paralelo (PROVIDER_WORKERS,
+    padrão 8), com limite de tempo por provider (PROVIDER_TIMEOUT_S, padrão 120).
+    Um provider que estoura o limite é abandonado (a thread termina sozinha)
+    e não segura os demais. Como threads abandonadas continuam ocupando o
+    pool, há também um limite total (PROVIDER_TIMEOUT_S vezes o número de
+    "rodadas" do pool, contado da submissão): o que não terminou até lá,
+    inclusive providers que nem chegaram a começar, é abandonado.
+    Retorna um resultado por provider, na mesma ordem de 'providers':
+    {"provider", "items" (None em erro/timeout), "error", "timeout", "seconds"}.
+    """
+    results: List[Dict[str, Any]] = [
+        {"provider": p, "items": None, "error": "", "timeout": False, "seconds": 0.0}
+        for p in providers
+    ]
+    if not providers:
+        return results
+
+    timeout_s = max(1, get_int_setting("PROVIDER_TIMEOUT_S", 120))
+    workers = max(1, get_int_setting("PROVIDER_WORKERS", 8))
+    started: Dict[int, float] = {}
+
+    def _run(pos: int) -> List[Dict[str, Any]]:
+        started[pos] = time.monotonic()
+        return providers[pos].fetch(cfg) or []
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provider")
+    try:
+        # copy_context: erros das threads caem no Error Bus da requisição
+        pending = {
+            pool.submit(contextvars.copy_context().run, _run, pos): pos
+            for pos in range(len(providers))
+        }
+        total_s = timeout_s * -(-len(providers) // workers)
+        deadline = time.monotonic() + total_s
+        while pending:
+            done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for fut in done:
+                pos = pending.pop(fut)
+                res = results[pos]
+                res["seconds"] = now - started.get(pos, now)
+                src_name = providers[pos].PROVIDER.get("name", "(sem nome)")
+                try:
+                    res["items"] = fut.result()
+                except Exception as e:
+                    push_error(f"{src_name} {label}", e)
+                    res["error"] = f"{type(e).__name__}: {e}"
+            for fut, pos in list(pending.items()):
+                t0 = started.get(pos)
+                if t0 is not None and now - t0 > timeout_s:
+                    error = f"Timeout após {timeout_s}s"
+                elif now > deadline:
+                    error = (
+                        f"Timeout: limite total de {total_s}s da coleta"
+                        if t0 is not None
+                        else f"Timeout: não começou dentro do limite total de {total_s}s"
+                    )
+                else:
+                    continue
+                pending.pop(fut)
+                fut.cancel()
+                res = results[pos]
+                res.update(timeout=True, seconds=now - t0 if t0 is not None else 0.0, error=error)
+                src_name = providers[pos].PROVIDER.get("name", "(sem nome)")
+                push_error(f"{src_name} {label}", TimeoutError(error))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+@sheet_operation()
 def run_collect(
     min_days: int,
     groups_filter: Optional[List[str]] = None,
@@ -230,42 +356,44 @@ def run_collect(
     grouped: Dict[str, List[Dict[str, Any]]] = {}
     provider_stats: List[Dict[str, Any]] = []
 
-    for p in providers:
+    # Providers rodam em paralelo; o resultado é juntado na ordem original
+    for res in _fetch_providers(providers, cfg):
+        p = res["provider"]
         gname = p.PROVIDER.get("group", "")
         grouped.setdefault(gname, [])
         src_name = p.PROVIDER.get("name", "(sem nome)")
-        try:
-            items_raw = p.fetch(cfg) or []
-            n_raw = len(items_raw)
-
-            grouped[gname].extend(items_raw)
-
-            # Conta quantos passam no filtro de prazo mínimo
-            n_pos_prazo = 0
-            for it in items_raw:
-                dl_iso = _to_iso(it.get("deadline"))
-                if within_min_days(dl_iso, int(min_days)):
-                    n_pos_prazo += 1
-
+        items_raw = res["items"]
+        if items_raw is None:
+            marker = "timeout" if res["timeout"] else "erro"
             provider_stats.append(
                 {
                     "grupo": gname,
                     "fonte": src_name,
-                    "itens_fetch": n_raw,
-                    "itens_pos_prazo": n_pos_prazo,
+                    "itens_fetch": marker,
+                    "itens_pos_prazo": marker,
+                    "tempo_s": round(res["seconds"], 2),
                 }
             )
+            continue
 
-        except Exception as e:
-            push_error(f"{src_name} fetch", e)
-            provider_stats.append(
-                {
-                    "grupo": gname,
-                    "fonte": src_name,
-                    "itens_fetch": "erro",
-                    "itens_pos_prazo": "erro",
-                }
-            )
+        grouped[gname].extend(items_raw)
+
+        # Conta quantos passam no filtro de prazo mínimo
+        n_pos_prazo = 0
+        for it in items_raw:
+            dl_iso = _to_iso(it.get("deadline"))
+            if within_min_days(dl_iso, int(min_days)):
+                n_pos_prazo += 1
+
+        provider_stats.append(
+            {
+                "grupo": gname,
+                "fonte": src_name,
+                "itens_fetch": len(items_raw),
+                "itens_pos_prazo": n_pos_prazo,
+                "tempo_s": round(res["seconds"], 2),
+            }
+        )
 
     # Loga estatísticas na aba 'logs'
     if provider_stats:
@@ -312,6 +440,7 @@ def run_collect(
     }
 
 
+@sheet_operation()
 def get_app_config() -> Dict[str, Any]:
     """
     Retorna a configuração geral para o frontend.
@@ -331,6 +460,7 @@ def get_app_config() -> Dict[str, Any]:
     }
 
 
+@sheet_operation()
 def update_config_pairs(updates: List[Dict[str, str]]) -> Dict[str, Any]:
     """
     Atualiza várias chaves na aba 'config' de uma vez.
@@ -348,80 +478,197 @@ def update_config_pairs(updates: List[Dict[str, str]]) -> Dict[str, Any]:
 
 
 
-def get_items_for_group(group: str, status_filter: Optional[str] = None) -> Dict[str, Any]:
+# Índice de itens por grupo/fonte/status, reconstruído só quando a base muda
+_items_index: Dict[str, Any] = {"generation": None, "groups": {}}
+_items_index_lock = threading.Lock()
+
+
+def _build_items_index(header: List[str], body: List[List[str]]) -> Dict[str, Dict[str, Any]]:
     """
-    Retorna itens de um grupo já transformados em estrutura amigável para o frontend.
-    - Agrupa por 'source'
-    - Remove itens marcados como 'do_not_show'
-    - Aplica filtro de status se fornecido
+    Monta, numa única passada, o índice:
+        grupo canônico -> {
+            "sources": [{"source", "items", "_keys"}...],   # todos os status
+            "by_status": {status: [{"source", "items", "_keys"}...]},
+            "status_counts": {status: n},
+        }
+    Fontes em ordem alfabética e itens ordenados por deadline dentro de cada fonte.
+    Itens marcados como 'do_not_show' ficam de fora.
     """
-    header, body = read_items_cached()
     idx: Dict[str, int] = {
         name: header.index(name) for name in ITEMS_HEADER if name in header
     }
+    i_dns = idx.get("do_not_show")
 
-    target_canon = _canon_group(group)
-    items_raw = [
-        r
-        for r in body
-        if r
-        and _canon_group(r[idx["group"]]) == target_canon
-        and (r[idx.get("do_not_show", len(r) - 1)] != "1")
-    ]
+    def cell(r: List[str], name: str) -> str:
+        i = idx.get(name)
+        return r[i] if i is not None and i < len(r) else ""
 
-    meta: Dict[str, Dict[str, Any]] = {}
-    for r in items_raw:
-        uid = r[idx["uid"]]
-        meta[uid] = {
+    # (grupo canônico, uid) -> info; uid repetido no grupo: vale a última linha
+    canon_cache: Dict[str, str] = {}
+    meta: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for r in body:
+        if not r:
+            continue
+        if i_dns is not None and i_dns < len(r) and r[i_dns] == "1":
+            continue
+        raw_group = cell(r, "group")
+        canon = canon_cache.get(raw_group)
+        if canon is None:
+            canon = canon_cache[raw_group] = _canon_group(raw_group)
+        uid = cell(r, "uid")
+        meta[(canon, uid)] = {
             "uid": uid,
-            "group": r[idx["group"]],
-            "source": r[idx["source"]],
-            "title": r[idx["title"]],
-            "link": absolutize_for_source(r[idx["link"]], r[idx["source"]]),
-            "seen": r[idx["seen"]],
-            "status": r[idx["status"]] or "pendente",
-            "notes": r[idx["notes"]],
-            "deadline_iso": r[idx["deadline_iso"]],
-            "published_iso": r[idx["published_iso"]],
-            "agency": r[idx["agency"]],
-            "region": r[idx["region"]],
-            "do_not_show": r[idx["do_not_show"]] == "1",
+            "group": raw_group,
+            "source": cell(r, "source"),
+            "title": cell(r, "title"),
+            "link": absolutize_for_source(cell(r, "link"), cell(r, "source")),
+            "seen": cell(r, "seen"),
+            "status": cell(r, "status") or "pendente",
+            "notes": cell(r, "notes"),
+            "deadline_iso": cell(r, "deadline_iso"),
+            "published_iso": cell(r, "published_iso"),
+            "agency": cell(r, "agency"),
+            "region": cell(r, "region"),
+            "do_not_show": cell(r, "do_not_show") == "1",
         }
 
-    # Agrupa por source
-    by_source: Dict[str, List[Dict[str, Any]]] = {}
-    for uid, info in meta.items():
-        current_status = info["status"] or "pendente"
+    # grupo -> fonte -> itens, e grupo -> status -> fonte -> itens
+    tree_all: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    tree: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {}
+    for (canon, _uid), info in meta.items():
+        current_status = info["status"]
         if current_status not in STATUS_CHOICES:
             current_status = "pendente"
-        if status_filter and status_filter != "Todos":
-            if current_status != status_filter:
-                continue
         src = info.get("source") or "—"
-        by_source.setdefault(src, []).append(info)
+        tree_all.setdefault(canon, {}).setdefault(src, []).append(info)
+        tree.setdefault(canon, {}).setdefault(current_status, {}).setdefault(src, []).append(info)
+
+    def _deadline_key(info: Dict[str, Any]) -> str:
+        return info.get("deadline_iso") or "9999-12-31T00:00:00"
+
+    def _sources_list(by_source: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        out = []
+        for src in sorted(by_source.keys(), key=lambda s: s.lower()):
+            items = sorted(by_source[src], key=_deadline_key)
+            # '_keys': deadlines ordenados, para filtrar janelas de prazo por bisect
+            out.append({"source": src, "items": items, "_keys": [_deadline_key(i) for i in items]})
+        return out
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for canon, by_status in tree.items():
+        groups[canon] = {
+            "sources": _sources_list(tree_all[canon]),
+            "by_status": {st: _sources_list(bs) for st, bs in by_status.items()},
+            "status_counts": {
+                st: sum(len(v) for v in bs.values()) for st, bs in by_status.items()
+            },
+        }
+    return groups
 
-    # Ordena por deadline dentro de cada fonte
-    for src, items in by_source.items():
-        items.sort(
-            key=lambda info: info.get("deadline_iso") or "9999-12-31T00:00:00"
-        )
 
-    # Constrói lista ordenada de fontes
+def _get_items_index() -> Dict[str, Dict[str, Any]]:
+    """Retorna o índice atual, reconstruindo se a base de itens mudou."""
+    try:
+        generation, header, body = ensure_items_loaded().snapshot()
+    except Exception as e:
+        push_error("items_index", e)
+        return {}
+    with _items_index_lock:
+        if _items_index["generation"] != generation:
+            _items_index["groups"] = _build_items_index(header, body)
+            _items_index["generation"] = generation
+        return _items_index["groups"]
+
+
+# Campos que o frontend pode pedir via 'fields=' (uid vem sempre)
+ITEM_FIELDS = [
+    "uid", "group", "source", "title", "link", "seen", "status", "notes",
+    "deadline_iso", "published_iso", "agency", "region", "do_not_show",
+]
+
+
+def get_items_for_group(
+    group: str,
+    status_filter: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 0,
+    per_source_limit: int = 0,
+    deadline_from: Optional[str] = None,
+    deadline_to: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Retorna itens de um grupo já transformados em estrutura amigável para o frontend.
+    - Agrupa por 'source'
+    - Remove itens marcados como 'do_not_show'
+    - Aplica filtro de status se fornecido
+    Usa o índice pré-calculado (custo proporcional ao resultado).
+
+    Paginação e filtros opcionais (sem montar o grupo inteiro):
+    - offset/limit: janela sobre a sequência (fonte, prazo); limit=0 = tudo.
+      'next_offset' indica a próxima página (None quando acabou).
+    - per_source_limit: máximo de itens por fonte (0 = sem limite)
+    - deadline_from/deadline_to: janela de prazo (YYYY-MM-DD, inclusiva)
+    - fields: campos a devolver por item (uid sempre incluído)
+    """
+    entry = _get_items_index().get(_canon_group(group), {})
+
+    if status_filter and status_filter != "Todos":
+        indexed_sources = entry.get("by_status", {}).get(status_filter, [])
+    else:
+        indexed_sources = entry.get("sources", [])
+
+    projection = None
+    if fields:
+        projection = ["uid"] + [f for f in fields if f in ITEM_FIELDS and f != "uid"]
+
+    offset = max(0, int(offset or 0))
+    budget = int(limit) if limit and int(limit) > 0 else None
+    to_key = f"{deadline_to}\uffff" if deadline_to else None
+
+    skip = offset
+    total_items = 0
+    returned = 0
     sources_list = []
-    for src in sorted(by_source.keys(), key=lambda s: s.lower()):
-        sources_list.append(
-            {
-                "source": src,
-                "items": by_source[src],
-            }
-        )
+    for src_entry in indexed_sources:
+        items, keys = src_entry["items"], src_entry["_keys"]
+        lo = bisect_left(keys, deadline_from) if deadline_from else 0
+        hi = bisect_right(keys, to_key) if to_key else len(items)
+        n = max(0, hi - lo)
+        if per_source_limit and per_source_limit > 0:
+            n = min(n, int(per_source_limit))
+        total_items += n
+
+        # Pula fontes inteiras até chegar ao offset
+        if skip >= n:
+            skip -= n
+            continue
+        start = lo + skip
+        stop = lo + n
+        skip = 0
+        if budget is not None:
+            stop = min(stop, start + budget - returned)
+        if start >= stop:
+            continue
 
-    total_items = sum(len(x["items"]) for x in sources_list)
+        page = items[start:stop]
+        if projection is not None:
+            page = [{k: it[k] for k in projection if k in it} for it in page]
+        sources_list.append({"source": src_entry["source"], "items": page})
+        returned += len(page)
+
+    next_offset = offset + returned
+    if next_offset >= total_items:
+        next_offset = None
 
     return {
         "group": group,
         "items_count": total_items,
+        "returned": returned,
+        "offset": offset,
+        "next_offset": next_offset,
         "status_choices": STATUS_CHOICES,
+        "status_counts": dict(entry.get("status_counts", {})),
         "sources": sources_list,
     }
 
@@ -431,86 +678,48 @@ def update_items(updates: List[Dict[str, Any]]) -> Dict[str, Any]:
     Aplica atualizações de campos (seen, status, notes, do_not_show)
     com base no uid dos itens.
     'updates' é lista de dicts: { uid, seen(bool), status, notes, do_not_show(bool) }.
+    Grava na base local; a planilha é atualizada em segundo plano.
     """
     if not updates:
         return {"updated": 0}
 
-    header, body = read_items_cached()
-    idx: Dict[str, int] = {
-        name: header.index(name) for name in ITEMS_HEADER if name in header
-    }
-    _, _, ws_items, _ = open_sheet()
-
-    uid_to_rownum: Dict[str, int] = {}
-    for i, r in enumerate(body, start=2):  # linha 2 em diante
-        if r and r[0]:
-            uid_to_rownum[r[0]] = i
-
-    batch: List[Tuple[str, List[List[str]]]] = []
-
+    changes: Dict[str, Dict[str, str]] = {}
     for u in updates:
         uid = u.get("uid")
         if not uid:
             continue
-        rownum = uid_to_rownum.get(uid)
-        if not rownum:
-            continue
-
-        seen_val = "1" if u.get("seen") else ""
-        status_val = u.get("status") or "pendente"
-        notes_val = u.get("notes") or ""
-        dns_val = "1" if u.get("do_not_show") else ""
-
-        rng_seen = f"items!{col_letter(idx['seen'])}{rownum}"
-        rng_stat = f"items!{col_letter(idx['status'])}{rownum}"
-        rng_notes = f"items!{col_letter(idx['notes'])}{rownum}"
-        rng_dns = f"items!{col_letter(idx['do_not_show'])}{rownum}"
-
-        batch += [
-            (rng_seen, [[seen_val]]),
-            (rng_stat, [[status_val]]),
-            (rng_notes, [[notes_val]]),
-            (rng_dns, [[dns_val]]),
-        ]
+        changes[uid] = {
+            "seen": "1" if u.get("seen") else "",
+            "status": u.get("status") or "pendente",
+            "notes": u.get("notes") or "",
+            "do_not_show": "1" if u.get("do_not_show") else "",
+        }
 
-    if not batch:
+    if not changes:
         return {"updated": 0}
 
     try:
-        values_batch_update(ws_items, batch)
-        invalidate_items_cache()
+        updated = get_item_store().update_cells(changes)
+        request_sync()
     except Exception as e:
         push_error("update_items", e)
         return {"updated": 0}
 
-    return {"updated": len(updates)}
+    return {"updated": updated}
 
 
 def delete_items_by_uids(uids: List[str]) -> Dict[str, Any]:
     """
-    Remove da planilha os itens cujo uid esteja em 'uids'.
-    A exclusão é feita linha a linha, de baixo para cima.
+    Remove os itens cujo uid esteja em 'uids'.
+    Remove da base local; as linhas da planilha são apagadas em segundo plano.
     """
     if not uids:
         return {"deleted": 0}
 
-    header, body = read_items_cached()
-    uid_to_rownum: Dict[str, int] = {}
-    for i, r in enumerate(body, start=2):
-        if r and r[0]:
-            uid_to_rownum[r[0]] = i
-
-    _, _, ws_items, _ = open_sheet()
-
-    rownums = [uid_to_rownum[u] for u in uids if u in uid_to_rownum]
-    rownums = sorted(set(rownums), reverse=True)
-
     deleted = 0
     try:
-        for rn in rownums:
-            ws_items.delete_rows(rn)
-            deleted += 1
-        invalidate_items_cache()
+        deleted = get_item_store().delete_uids(uids)
+        request_sync()
     except Exception as e:
         push_error("delete_items_by_uids", e)
 
@@ -526,6 +735,7 @@ def clear_all_items() -> Dict[str, Any]:
     return {"cleared": True}
 
 
+@sheet_operation()
 def get_diag_providers() -> Dict[str, Any]:
     """
     Executa o diagnóstico dos providers.
@@ -537,29 +747,16 @@ def get_diag_providers() -> Dict[str, Any]:
     cfg = read_config()
 
     rows = []
-    import time
-
-    for mod in mods:
-        g = mod.PROVIDER.get("group", "")
-        t0 = time.time()
-        err = ""
-        n = 0
-        url_hint = getattr(mod, "URL_HINT", "")
-        try:
-            data = mod.fetch(cfg) or []
-            n = len(data)
-        except Exception as e:
-            push_error(f"{mod.PROVIDER.get('name')} fetch (diag)", e)
-            err = f"{type(e).__name__}: {e}"
-        dt = time.time() - t0
+    for res in _fetch_providers(mods, cfg, label="fetch (diag)"):
+        mod = res["provider"]
         rows.append(
             {
-                "Grupo": g,
+                "Grupo": mod.PROVIDER.get("group", ""),
                 "Fonte": mod.PROVIDER.get("name", ""),
-                "Itens": n,
-                "Tempo (s)": f"{dt:.2f}",
-                "Erro": err,
-                "Hint": url_hint,
+                "Itens": len(res["items"] or []),
+                "Tempo (s)": f"{res['seconds']:.2f}",
+                "Erro": res["error"],
+                "Hint": getattr(mod, "URL_HINT", ""),
             }
         )
 
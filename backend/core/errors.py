@@ -6,19 +6,32 @@ o backend deve chamar `init_error_bus()`.
 
 Todas as funções de domínio chamam `push_error()` em caso de exceção,
 e o endpoint pode ler depois com `get_errors()`.
+
+A lista fica num ContextVar: cada requisição tem a sua, inclusive quando o
+trabalho roda em threads (workers.run_blocking copia o contexto). Erros de
+threads sem contexto (ex.: sincronização em segundo plano) vão para uma
+lista global, que não é zerada por requisição e guarda só os mais recentes.
 """
 
+import contextvars
 import traceback
 from datetime import datetime
 from typing import List, Dict, Any
 
-_error_bus: List[Dict[str, Any]] = []
+_GLOBAL_BUS_MAX = 200
+
+_global_bus: List[Dict[str, Any]] = []
+_error_bus: contextvars.ContextVar = contextvars.ContextVar("error_bus", default=None)
+
+
+def _current_bus() -> List[Dict[str, Any]]:
+    bus = _error_bus.get()
+    return _global_bus if bus is None else bus
 
 
 def init_error_bus() -> None:
-    """Limpa a lista de erros da execução atual."""
-    global _error_bus
-    _error_bus = []
+    """Limpa a lista de erros da execução atual (a global fica intacta)."""
+    _error_bus.set([])
 
 
 def push_error(where: str, exc: Exception) -> None:
@@ -27,10 +40,10 @@ def push_error(where: str, exc: Exception) -> None:
 
     As funções de domínio devem chamar isso em vez de dar print.
     """
-    global _error_bus
     stack = traceback.format_exc()
     msg = f"{type(exc).__name__}: {exc}"
-    _error_bus.append(
+    bus = _current_bus()
+    bus.append(
         {
             "ts": datetime.utcnow().isoformat(),
             "where": where,
@@ -38,8 +51,10 @@ def push_error(where: str, exc: Exception) -> None:
             "stack": stack,
         }
     )
+    if bus is _global_bus and len(bus) > _GLOBAL_BUS_MAX:
+        del bus[:-_GLOBAL_BUS_MAX]
 
 
 def get_errors() -> List[Dict[str, Any]]:
     """Retorna a lista de erros registrados nesta execução."""
-    return list(_error_bus)
+    return list(_current_bus())
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Limpeza de HTML para a coleta universal: remove menus, rodapés, scripts,
+banners de cookie etc. e devolve só o texto que vai para a Perplexity.
+
+Três implementações com a mesma saída (texto separado por espaço, trechos
+com strip, conteúdo de <main>/<article> quando tiver mais de 200 caracteres):
+
+- "selectolax": parser Lexbor (C), um único seletor CSS combinado (mais rápida)
+- "lxml": parser libxml2, um único XPath combinado
+- "bs4": BeautifulSoup + html.parser (implementação original, puro Python)
+
+HTML_CLEAN_BACKEND no .env escolhe uma delas; o padrão "auto" usa a mais
+rápida instalada. Se a escolhida falhar numa página, cai para a bs4.
+Comparação de tempo e de texto: `python bench_clean.py`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Callable, Dict, List
+
+# Tags irrelevantes a remover do HTML antes de enviar ao Perplexity
+TAGS_TO_REMOVE = [
+    "script", "style", "nav", "footer", "header", "aside",
+    "noscript", "iframe", "svg", "form", "button",
+]
+
+# Seletores CSS de elementos de cookie/banner a remover
+SELECTORS_TO_REMOVE = [
+    "[class*='cookie']", "[id*='cookie']",
+    "[class*='banner']", "[class*='popup']",
+    "[class*='gdpr']", "[class*='consent']",
+    "[class*='newsletter']", "[class*='subscribe']",
+    "[role='navigation']", "[role='banner']",
+    "[role='complementary']",
+]
+
+# Tamanho mínimo do texto de <main>/<article> para usá-lo no lugar da página toda
+MAIN_MIN_CHARS = 200
+
+_SPACES_RE = re.compile(r"\s{3,}")
+
+# Mesmos seletores acima, num único XPath para o lxml
+_ATTR_SELECTOR_RE = re.compile(r"\[(\w+)([*]?)='([^']*)'\]")
+
+
+def _selectors_to_xpath() -> str:
+    conds: List[str] = []
+    for sel in SELECTORS_TO_REMOVE:
+        m = _ATTR_SELECTOR_RE.fullmatch(sel)
+        if not m:
+            continue
+        attr, op, value = m.groups()
+        if op == "*":
+            conds.append(f"contains(@{attr}, '{value}')")
+        else:
+            conds.append(f"@{attr}='{value}'")
+    parts = [f"//{tag}" for tag in TAGS_TO_REMOVE]
+    if conds:
+        parts.append(f"//*[{' or '.join(conds)}]")
+    return " | ".join(parts)
+
+
+_REMOVE_XPATH = _selectors_to_xpath()
+_REMOVE_CSS = ", ".join(TAGS_TO_REMOVE + SELECTORS_TO_REMOVE)
+
+
+def _squeeze(text: str) -> str:
+    """Comprime espaços múltiplos."""
+    return _SPACES_RE.sub("  ", text)
+
+
+def clean_bs4(raw: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw, "html.parser")
+
+    # Remove tags irrelevantes (nav, footer, scripts, etc)
+    for tag_name in TAGS_TO_REMOVE:
+        for el in soup.find_all(tag_name):
+            el.decompose()
+
+    # Remove banners de cookie, pop-ups, etc
+    for selector in SELECTORS_TO_REMOVE:
+        try:
+            for el in soup.select(selector):
+                el.decompose()
+        except Exception:
+            pass
+
+    # Tenta pegar só o conteúdo principal
+    main = soup.find("main") or soup.find("article") or soup.find(role="main")
+    if main and len(main.get_text(strip=True)) > MAIN_MIN_CHARS:
+        text = main.get_text(separator=" ", strip=True)
+    else:
+        text = soup.get_text(separator=" ", strip=True)
+    return _squeeze(text)
+
+
+def _lxml_parts(el) -> List[str]:
+    """Trechos de texto (com strip, sem vazios) de um elemento lxml, como o get_text do bs4."""
+    parts = []
+    for s in el.itertext():
+        s = s.strip()
+        if s:
+            parts.append(s)
+    return parts
+
+
+def clean_lxml(raw: str) -> str:
+    import lxml.html
+
+    root = lxml.html.document_fromstring(raw)
+    # Uma passada: todos os elementos a remover (tags + seletores de banner)
+    for el in root.xpath(_REMOVE_XPATH):
+        if el.getparent() is not None:
+            el.drop_tree()  # mantém o texto que vem depois do elemento (tail)
+
+    found = root.xpath("(//main)[1] | (//article)[1] | (//*[@role='main'])[1]")
+    main = None
+    for tag in ("main", "article"):
+        main = next((el for el in found if el.tag == tag), None)
+        if main is not None:
+            break
+    if main is None:
+        main = next((el for el in found if el.get("role") == "main"), None)
+
+    if main is not None:
+        parts = _lxml_parts(main)
+        if len("".join(parts)) > MAIN_MIN_CHARS:
+            return _squeeze(" ".join(parts))
+    return _squeeze(" ".join(_lxml_parts(root)))
+
+
+def _selectolax_parts(node) -> List[str]:
+    parts = []
+    for child in node.traverse(include_text=True):
+        if child.tag == "-text":
+            s = (child.text_content or "").strip()
+            if s:
+                parts.append(s)
+    return parts
+
+
+def clean_selectolax(raw: str) -> str:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(raw)
+    # Uma passada: um único seletor CSS combinado. Só os nós mais externos
+    # são removidos (remover um nó libera os filhos; tocar neles depois não é seguro).
+    matched = tree.css(_REMOVE_CSS)
+    matched_ids = {node.mem_id for node in matched}
+    outermost = []
+    for node in matched:
+        parent = node.parent
+        while parent is not None and parent.mem_id not in matched_ids:
+            parent = parent.parent
+        if parent is None:
+            outermost.append(node)
+    for node in outermost:
+        node.decompose()
+
+    main = tree.css_first("main") or tree.css_first("article") or tree.css_first("[role='main']")
+    if main is not None:
+        parts = _selectolax_parts(main)
+        if len("".join(parts)) > MAIN_MIN_CHARS:
+            return _squeeze(" ".join(parts))
+    return _squeeze(" ".join(_selectolax_parts(tree.root)))
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {
+    "selectolax": clean_selectolax,
+    "lxml": clean_lxml,
+    "bs4": clean_bs4,
+}
+
+
+def _installed(name: str) -> bool:
+    try:
+        if name == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif name == "lxml":
+            import lxml.html  # noqa: F401
+        else:
+            import bs4  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_resolved: Dict[str, str] = {}
+
+
+def get_backend_name() -> str:
+    """Implementação em uso (HTML_CLEAN_BACKEND, ou a mais rápida instalada)."""
+    wanted = (os.getenv("HTML_CLEAN_BACKEND") or "auto").strip().lower()
+    if wanted not in _resolved:
+        order = [wanted] if wanted in BACKENDS else []
+        order += [n for n in BACKENDS if n not in order]
+        _resolved[wanted] = next((n for n in order if _installed(n)), "bs4")
+    return _resolved[wanted]
+
+
+def clean_html(raw: str, backend: str = "") -> str:
+    """Texto limpo de uma página HTML."""
+    name = backend or get_backend_name()
+    if name != "bs4":
+        try:
+            return BACKENDS[name](raw)
+        except Exception:
+            pass
+    return clean_bs4(raw)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartilhado para download de páginas.
+
+Todas as páginas (coleta universal e contagem de tokens) passam por aqui,
+reaproveitando conexões keep-alive em vez de abrir um TCP+TLS novo a cada
+`requests.get`.
+
+- Backend principal: httpx.AsyncClient (asyncio), com pool de conexões,
+  HTTP/2 quando o pacote 'h2' está instalado e limite de conexões por host.
+- O event loop roda numa thread de fundo própria; `fetch_url` é síncrona e
+  pode ser chamada de qualquer thread (ex.: pool de extract_from_links).
+- Se httpx não estiver instalado, cai para requests.Session (também keep-alive).
+
+Ajustes opcionais (.env):
+- HTTP_MAX_CONNECTIONS: conexões simultâneas no pool (padrão 20)
+- HTTP_PER_HOST: conexões simultâneas por host (padrão 4)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .config import get_int_setting
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+
+class FetchResponse:
+    """
+    Resposta mínima, independente do backend HTTP usado.
+    Expõe os mesmos atributos que o código antigo usava de requests.Response.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Any, content: bytes, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers  # dict case-insensitive (httpx.Headers / CaseInsensitiveDict)
+        self.content = content
+        self.text = text
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code} para {self.url}")
+
+
+def _host_of(url: str) -> str:
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+
+class _AsyncFetcher:
+    """Pool httpx assíncrono rodando num event loop dedicado."""
+
+    def __init__(self):
+        import httpx
+
+        self._httpx = httpx
+        self._per_host = max(1, get_int_setting("HTTP_PER_HOST", 4))
+        max_conn = max(1, get_int_setting("HTTP_MAX_CONNECTIONS", 20))
+        self._limits = httpx.Limits(
+            max_connections=max_conn,
+            max_keepalive_connections=max_conn,
+            keepalive_expiry=60.0,
+        )
+        try:
+            import h2  # noqa: F401
+            self._http2 = True
+        except ImportError:
+            self._http2 = False
+
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+        self._client = None
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="http-client-loop", daemon=True
+        )
+        self._thread.start()
+        self._submit(self._open()).result()
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _open(self) -> None:
+        self._client = self._httpx.AsyncClient(
+            http2=self._http2,
+            limits=self._limits,
+            follow_redirects=True,
+            headers=DEFAULT_HEADERS,
+        )
+
+    async def afetch(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        host = _host_of(url)
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self._per_host)
+        async with slot:
+            resp = await self._client.get(url, headers=headers, timeout=timeout)
+        return FetchResponse(str(resp.url), resp.status_code, resp.headers, resp.content, resp.text)
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        return self._submit(self.afetch(url, headers, timeout)).result()
+
+    async def afetch_from_any_loop(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        return await asyncio.wrap_future(self._submit(self.afetch(url, headers, timeout)))
+
+    def fetch_many(self, urls: List[str], timeout: float) -> List[Any]:
+        async def _gather():
+            return await asyncio.gather(
+                *(self.afetch(u, None, timeout) for u in urls), return_exceptions=True
+            )
+
+        return self._submit(_gather()).result()
+
+    def close(self) -> None:
+        if self._client is not None:
+            try:
+                self._submit(self._client.aclose()).result(timeout=5)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class _SessionFetcher:
+    """Fallback sem httpx: requests.Session com pool keep-alive por host."""
+
+    def __init__(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._per_host = max(1, get_int_setting("HTTP_PER_HOST", 4))
+        max_conn = max(1, get_int_setting("HTTP_MAX_CONNECTIONS", 20))
+        self._session = requests.Session()
+        self._session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=max_conn, pool_maxsize=self._per_host)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        host = _host_of(url)
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self._per_host)
+        with slot:
+            resp = self._session.get(url, headers=headers, timeout=timeout)
+        return FetchResponse(resp.url, resp.status_code, resp.headers, resp.content, resp.text or "")
+
+    async def afetch_from_any_loop(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> FetchResponse:
+        return await asyncio.to_thread(self.fetch, url, headers, timeout)
+
+    def fetch_many(self, urls: List[str], timeout: float) -> List[Any]:
+        from concurrent.futures import ThreadPoolExecutor
+
+        def _one(u: str) -> Any:
+            try:
+                return self.fetch(u, None, timeout)
+            except Exception as e:
+                return e
+
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as pool:
+            return list(pool.map(_one, urls))
+
+    def close(self) -> None:
+        self._session.close()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Retorna o fetcher compartilhado (criado na primeira chamada)."""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                try:
+                    _fetcher = _AsyncFetcher()
+                except ImportError:
+                    _fetcher = _SessionFetcher()
+    return _fetcher
+
+
+def fetch_url(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> FetchResponse:
+    """
+    Baixa uma URL usando o pool compartilhado (síncrono, thread-safe).
+    Levanta exceção em erro de rede; o status HTTP fica em resp.status_code.
+    """
+    return get_fetcher().fetch(url, headers, timeout)
+
+
+async def afetch_url(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> FetchResponse:
+    """Versão assíncrona de `fetch_url`, para uso dentro de qualquer event loop."""
+    return await get_fetcher().afetch_from_any_loop(url, headers, timeout)
+
+
+def fetch_many(urls: List[str], timeout: float = 30) -> List[Any]:
+    """
+    Baixa várias URLs em paralelo pelo pool compartilhado.
+    Retorna, na mesma ordem, FetchResponse ou a exceção levantada.
+
+    Roda no event loop de fundo do pool (como `fetch_url`), então pode ser
+    chamada de qualquer thread, inclusive de dentro de um loop em execução
+    (ela bloqueia; dentro de handlers async use `afetch_url` ou run_blocking).
+    """
+    return get_fetcher().fetch_many(urls, timeout)
+
+
+def close_fetcher() -> None:
+    """Fecha o pool compartilhado (chamado automaticamente na saída)."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is not None:
+            _fetcher.close()
+            _fetcher = None
+
+
+atexit.register(close_fetcher)
@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+"""
+Base local de itens (SQLite em modo WAL).
+
+É a fonte de leitura dos itens: `read_items_cached` e `/api/items` leem
+daqui, sem baixar a aba 'items' a cada requisição.
+
+A planilha vira uma réplica:
+- toda escrita (append, update, delete, clear) é aplicada primeiro aqui
+  e registrada numa fila persistente ('outbox');
+- uma thread de fundo replica a fila para a aba 'items', em ordem,
+  agrupando operações do mesmo tipo numa única chamada ao Sheets;
+- se o Sheets falhar, as operações ficam na fila e são reenviadas depois
+  (inclusive após reiniciar o programa).
+
+As leituras são servidas por uma cópia em memória indexada por uid, que as
+escritas atualizam no lugar (sem reler a base inteira).
+
+Na primeira leitura de cada execução, periodicamente e sob demanda (botão
+"Recarregar itens"), a base é reconciliada com a planilha para refletir
+edições feitas direto no Sheets, desde que não haja escritas pendentes.
+Se alguma escrita local acontecer enquanto a aba está sendo baixada, a
+reconciliação é descartada (tenta de novo na próxima rodada).
+
+Uma operação que falha ITEMS_SYNC_MAX_ATTEMPTS vezes seguidas sai da fila e
+vai para a tabela 'outbox_dead' (com o erro), para não travar as demais nem
+a reconciliação. A contagem aparece em `get_sync_status()["dead_ops"]`.
+
+Ajustes opcionais (.env):
+- ITEMS_SYNC_INTERVAL: segundos entre rodadas de sincronização (padrão 5;
+  após falhas, o intervalo dobra até 5 minutos)
+- ITEMS_RECONCILE_INTERVAL: segundos entre reconciliações com a planilha
+  (padrão 600; 0 desliga)
+- ITEMS_SYNC_MAX_ATTEMPTS: tentativas por operação antes de ir para
+  'outbox_dead' (padrão 10)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_data_dir, get_int_setting
+from .errors import push_error
+from .sheets import (
+    ITEMS_HEADER,
+    fetch_items_from_sheet,
+    read_items_tab,
+    sheet_operation,
+    sheet_items_append,
+    sheet_items_clear,
+    sheet_items_delete,
+    sheet_items_update,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    uid TEXT PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    grp TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    row_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_pos ON items(pos);
+CREATE INDEX IF NOT EXISTS idx_items_grp ON items(grp);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items(status);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS outbox_dead (
+    id INTEGER PRIMARY KEY,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    failed_at TEXT NOT NULL,
+    error TEXT NOT NULL DEFAULT ''
+);
+"""
+
+
+class ItemStore:
+    """
+    Acesso à base SQLite de itens. Uma conexão por thread.
+
+    Mantém também uma cópia em memória (header, linhas e índice uid -> posição)
+    que as escritas atualizam no lugar, em vez de descartar e reler tudo.
+    As listas entregues por `read_all` nunca são alteradas depois: cada escrita
+    monta uma lista nova (cópia rasa), então leitores concorrentes ficam seguros.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._header: Optional[List[str]] = None
+        self._rows: Optional[List[List[str]]] = None
+        self._index: Dict[str, int] = {}
+        self._generation = 0
+        # Conta só as escritas locais (não muda na reconciliação)
+        self._local_writes = 0
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(_SCHEMA)
+            cols = {r[1] for r in conn.execute("PRAGMA table_info(outbox)")}
+            if "attempts" not in cols:
+                with conn:
+                    conn.execute("ALTER TABLE outbox ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- metadados ----------
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def header(self) -> List[str]:
+        if self._header is not None:
+            return self._header
+        raw = self.get_meta("header")
+        return json.loads(raw) if raw else list(ITEMS_HEADER)
+
+    # ---------- cópia em memória ----------
+
+    def _set_rows(self, rows: List[List[str]]) -> None:
+        """Troca a lista em memória, reconstrói o índice e avança a geração."""
+        i_uid = self._cols(self.header())[0]
+        self._rows = rows
+        self._index = {self._cell(r, i_uid): i for i, r in enumerate(rows)}
+        self._generation += 1
+
+    def _ensure_mem(self) -> None:
+        if self._rows is None:
+            raw = self.get_meta("header")
+            self._header = json.loads(raw) if raw else list(ITEMS_HEADER)
+            self._set_rows([
+                json.loads(r[0])
+                for r in self._conn().execute("SELECT row_json FROM items ORDER BY pos")
+            ])
+
+    def write_mark(self) -> int:
+        """Marca das escritas locais; compare depois para saber se houve alguma."""
+        with self._write_lock:
+            return self._local_writes
+
+    @property
+    def generation(self) -> int:
+        """Contador que muda a cada alteração dos itens (para caches derivados)."""
+        return self._generation
+
+    # ---------- leitura ----------
+
+    def read_all(self) -> Tuple[List[str], List[List[str]]]:
+        """Retorna (header, body) na mesma ordem da planilha."""
+        _, header, body = self.snapshot()
+        return header, body
+
+    def snapshot(self) -> Tuple[int, List[str], List[List[str]]]:
+        """Retorna (geração, header, body) lidos de forma consistente."""
+        with self._write_lock:
+            self._ensure_mem()
+            return self._generation, self._header, self._rows
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def has_pulled(self) -> bool:
+        return bool(self.get_meta("last_pull"))
+
+    # ---------- escrita (local + fila para a planilha) ----------
+
+    @staticmethod
+    def _cols(header: List[str]) -> Tuple[int, int, int]:
+        def _idx(name: str) -> int:
+            return header.index(name) if name in header else -1
+        return _idx("uid"), _idx("group"), _idx("status")
+
+    @staticmethod
+    def _cell(row: List[str], i: int) -> str:
+        return row[i] if 0 <= i < len(row) else ""
+
+    def _enqueue(self, conn: sqlite3.Connection, op: str, payload: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO outbox(op, payload, created_at) VALUES(?, ?, ?)",
+            (op, json.dumps(payload, ensure_ascii=False), datetime.utcnow().isoformat()),
+        )
+
+    def apply_snapshot(
+        self,
+        header: List[str],
+        body: List[List[str]],
+        write_mark: Optional[int] = None,
+        require_empty_outbox: bool = False,
+    ) -> Optional[Dict[str, int]]:
+        """
+        Reconcilia a base com o conteúdo lido da planilha (sem enfileirar nada).
+        Só grava o que mudou. Retorna contagens: added, removed, changed.
+
+        'write_mark' (de `write_mark()`, tirado antes de baixar a aba) e
+        'require_empty_outbox' são conferidos já com a base travada: se houve
+        escrita local desde a marca, ou se há operações na fila, não aplica
+        nada e retorna None (a leitura da planilha pode não ter essas escritas).
+        """
+        i_uid, i_grp, i_status = self._cols(header)
+        rows = [r for r in body if self._cell(r, i_uid)]
+        with self._write_lock:
+            if write_mark is not None and write_mark != self._local_writes:
+                return None
+            if require_empty_outbox and self.pending_count():
+                return None
+            self._ensure_mem()
+            i_cur = self._cols(self._header)[0]
+            current = {self._cell(r, i_cur): r for r in self._rows}
+            incoming = {self._cell(r, i_uid): r for r in rows}
+            added = [u for u in incoming if u not in current]
+            removed = [u for u in current if u not in incoming]
+            changed = [u for u in incoming if u in current and current[u] != incoming[u]]
+
+            conn = self._conn()
+            with conn:
+                # Comparação direta também detecta mudança de ordem/cabeçalho
+                if header != self._header or rows != self._rows:
+                    conn.execute("DELETE FROM items")
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO items(uid, pos, grp, status, row_json) VALUES(?, ?, ?, ?, ?)",
+                        [
+                            (
+                                self._cell(r, i_uid), pos,
+                                self._cell(r, i_grp), self._cell(r, i_status),
+                                json.dumps(r, ensure_ascii=False),
+                            )
+                            for pos, r in enumerate(rows)
+                        ],
+                    )
+                    self._set_meta(conn, "header", json.dumps(header, ensure_ascii=False))
+                    self._header = list(header)
+                    self._set_rows(rows)
+                self._set_meta(conn, "last_pull", datetime.utcnow().isoformat())
+
+        return {"added": len(added), "removed": len(removed), "changed": len(changed)}
+
+    def insert_rows(self, rows: List[List[str]]) -> List[List[str]]:
+        """
+        Insere linhas novas (ignora uids já existentes) e enfileira o append.
+        Retorna as linhas efetivamente inseridas.
+        """
+        header = self.header()
+        i_uid, i_grp, i_status = self._cols(header)
+        added: List[List[str]] = []
+        with self._write_lock:
+            self._ensure_mem()
+            conn = self._conn()
+            with conn:
+                pos = conn.execute("SELECT COALESCE(MAX(pos), -1) FROM items").fetchone()[0]
+                for r in rows:
+                    uid = self._cell(r, i_uid)
+                    if not uid:
+                        continue
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO items(uid, pos, grp, status, row_json) VALUES(?, ?, ?, ?, ?)",
+                        (uid, pos + 1, self._cell(r, i_grp), self._cell(r, i_status),
+                         json.dumps(r, ensure_ascii=False)),
+                    )
+                    if cur.rowcount:
+                        pos += 1
+                        added.append(r)
+                if added:
+                    self._enqueue(conn, "append", {"rows": added})
+            if added:
+                self._local_writes += 1
+                base = len(self._rows)
+                self._rows = self._rows + added
+                for k, r in enumerate(added):
+                    self._index[self._cell(r, i_uid)] = base + k
+                self._generation += 1
+        return added
+
+    def update_cells(self, changes: Dict[str, Dict[str, str]]) -> int:
+        """
+        Atualiza campos por uid: {uid: {coluna: valor}} e enfileira o update.
+        Retorna quantos uids existiam na base.
+        """
+        header = self.header()
+        _, i_grp, i_status = self._cols(header)
+        applied: Dict[str, Dict[str, str]] = {}
+        with self._write_lock:
+            self._ensure_mem()
+            new_rows = list(self._rows)
+            conn = self._conn()
+            with conn:
+                for uid, fields in changes.items():
+                    i = self._index.get(uid)
+                    if i is None:
+                        continue
+                    row = list(new_rows[i])
+                    cols = {k: v for k, v in fields.items() if k in header}
+                    for col, val in cols.items():
+                        j = header.index(col)
+                        if j >= len(row):
+                            row += [""] * (j + 1 - len(row))
+                        row[j] = val
+                    conn.execute(
+                        "UPDATE items SET grp = ?, status = ?, row_json = ? WHERE uid = ?",
+                        (self._cell(row, i_grp), self._cell(row, i_status),
+                         json.dumps(row, ensure_ascii=False), uid),
+                    )
+                    new_rows[i] = row
+                    applied[uid] = cols
+                if applied:
+                    self._enqueue(conn, "update", {"cells": applied})
+            if applied:
+                self._local_writes += 1
+                self._rows = new_rows
+                self._generation += 1
+        return len(applied)
+
+    def delete_uids(self, uids: List[str]) -> int:
+        """Remove itens por uid e enfileira a remoção. Retorna quantos existiam."""
+        removed: List[str] = []
+        with self._write_lock:
+            self._ensure_mem()
+            conn = self._conn()
+            with conn:
+                for uid in dict.fromkeys(uids):
+                    cur = conn.execute("DELETE FROM items WHERE uid = ?", (uid,))
+                    if cur.rowcount:
+                        removed.append(uid)
+                if removed:
+                    self._enqueue(conn, "delete", {"uids": removed})
+            if removed:
+                self._local_writes += 1
+                gone = set(removed)
+                i_uid = self._cols(self.header())[0]
+                self._set_rows([r for r in self._rows if self._cell(r, i_uid) not in gone])
+        return len(removed)
+
+    def clear(self) -> None:
+        """Remove todos os itens e enfileira a limpeza da aba."""
+        with self._write_lock:
+            self._ensure_mem()
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM items")
+                # Operações pendentes ficam sem efeito: a aba será limpa
+                conn.execute("DELETE FROM outbox")
+                self._enqueue(conn, "clear", {})
+            self._local_writes += 1
+            self._set_rows([])
+
+    # ---------- fila de sincronização ----------
+
+    def pending_ops(self, limit: int = 500) -> List[Tuple[int, str, Dict[str, Any]]]:
+        return [
+            (r[0], r[1], json.loads(r[2]))
+            for r in self._conn().execute(
+                "SELECT id, op, payload FROM outbox ORDER BY id LIMIT ?", (limit,)
+            )
+        ]
+
+    def pending_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM outbox_dead").fetchone()[0]
+
+    def record_failure(self, ids: List[int], error: str, max_attempts: int) -> List[int]:
+        """
+        Conta mais uma falha para as operações 'ids'. As que chegarem a
+        'max_attempts' vão para 'outbox_dead'. Retorna os ids movidos.
+        """
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(f"UPDATE outbox SET attempts = attempts + 1 WHERE id IN ({marks})", ids)
+                dead = [
+                    r[0] for r in conn.execute(
+                        f"SELECT id FROM outbox WHERE id IN ({marks}) AND attempts >= ?",
+                        (*ids, max_attempts),
+                    )
+                ]
+                if dead:
+                    dmarks = ",".join("?" * len(dead))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO outbox_dead(id, op, payload, created_at, failed_at, error) "
+                        f"SELECT id, op, payload, created_at, ?, ? FROM outbox WHERE id IN ({dmarks})",
+                        (datetime.utcnow().isoformat(), error[:2000], *dead),
+                    )
+                    conn.execute(f"DELETE FROM outbox WHERE id IN ({dmarks})", dead)
+        return dead
+
+    def ack(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+
+_store: Optional[ItemStore] = None
+_store_lock = threading.Lock()
+_pull_lock = threading.Lock()
+_pulled_this_run = False
+
+
+def get_item_store() -> ItemStore:
+    """Retorna a base local de itens (criada na primeira chamada)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ItemStore(get_data_dir() / "items.db")
+    return _store
+
+
+def pull_from_sheet(force: bool = False) -> Optional[Dict[str, int]]:
+    """
+    Reconcilia a base local com a aba 'items' (pega edições feitas direto no Sheets).
+    Só aplica se não houver escritas pendentes de envio (para não perdê-las).
+    Retorna as contagens da reconciliação, ou None se não reconciliou.
+    """
+    global _pulled_this_run
+    store = get_item_store()
+    if store.pending_count() and not force:
+        return None
+    # Escritas locais durante o download invalidam a leitura (conferido em apply_snapshot)
+    mark = store.write_mark()
+    try:
+        header, body = fetch_items_from_sheet()
+    except Exception as e:
+        push_error("item_store.pull_from_sheet", e)
+        return None
+    stats = store.apply_snapshot(header, body, write_mark=mark, require_empty_outbox=not force)
+    if stats is not None:
+        _pulled_this_run = True
+    return stats
+
+
+def ensure_loaded() -> ItemStore:
+    """
+    Garante que a base foi carregada da planilha nesta execução
+    (quando não há escritas pendentes) e que o sync está rodando.
+    """
+    store = get_item_store()
+    if not _pulled_this_run:
+        with _pull_lock:
+            if not _pulled_this_run:
+                if pull_from_sheet() is None and not store.has_pulled():
+                    push_error("item_store.ensure_loaded", RuntimeError("base local vazia e planilha indisponível"))
+    ensure_sync_worker()
+    return store
+
+
+# ---------- replicação para a planilha ----------
+
+_sync_wakeup = threading.Event()
+_sync_thread: Optional[threading.Thread] = None
+_sync_lock = threading.Lock()
+_sync_status: Dict[str, Any] = {
+    "last_sync": "",
+    "last_error": "",
+    "ops_synced": 0,
+    "last_reconcile": "",
+    "last_reconcile_stats": None,
+}
+
+
+def _apply_group(layout: Dict[str, Any], op: str, payloads: List[Dict[str, Any]]) -> None:
+    if op == "append":
+        rows: List[List[str]] = []
+        for p in payloads:
+            rows.extend(p.get("rows", []))
+        sheet_items_append(layout, rows)
+    elif op == "update":
+        cells: Dict[str, Dict[str, str]] = {}
+        for p in payloads:
+            for uid, fields in p.get("cells", {}).items():
+                cells.setdefault(uid, {}).update(fields)
+        sheet_items_update(layout, cells)
+    elif op == "delete":
+        uids: List[str] = []
+        for p in payloads:
+            uids.extend(p.get("uids", []))
+        sheet_items_delete(layout, uids)
+    elif op == "clear":
+        sheet_items_clear(layout)
+
+
+def sync_once() -> int:
+    """
+    Envia as operações pendentes para a planilha, em ordem.
+    Operações consecutivas do mesmo tipo viram uma única chamada.
+    Retorna quantas operações foram confirmadas.
+    """
+    with _sync_lock:
+        store = get_item_store()
+        ops = store.pending_ops()
+        if not ops:
+            return 0
+
+        # Agrupa operações consecutivas do mesmo tipo
+        groups: List[Tuple[str, List[int], List[Dict[str, Any]]]] = []
+        for op_id, op, payload in ops:
+            if groups and groups[-1][0] == op:
+                groups[-1][1].append(op_id)
+                groups[-1][2].append(payload)
+            else:
+                groups.append((op, [op_id], [payload]))
+
+        done = 0
+        current: List[int] = []
+        try:
+            # Uma leitura da aba por rodada: os helpers de escrita mantêm o
+            # layout (linhas, última linha) atualizado entre os grupos
+            with sheet_operation():
+                layout = read_items_tab()
+                for op, ids, payloads in groups:
+                    current = ids
+                    _apply_group(layout, op, payloads)
+                    store.ack(ids)
+                    done += len(ids)
+            _sync_status["last_error"] = ""
+        except Exception as e:
+            push_error("item_store.sync_once", e)
+            error = f"{type(e).__name__}: {e}"
+            _sync_status["last_error"] = error
+            # Falha na leitura da aba conta para o primeiro grupo
+            failed = current or groups[0][1]
+            max_attempts = max(1, get_int_setting("ITEMS_SYNC_MAX_ATTEMPTS", 10))
+            dead = store.record_failure(failed, error, max_attempts)
+            if dead:
+                push_error(
+                    "item_store.dead_letter",
+                    RuntimeError(f"{len(dead)} operação(ões) movida(s) para outbox_dead após "
+                                 f"{max_attempts} falhas: {error}"),
+                )
+
+        _sync_status["last_sync"] = datetime.utcnow().isoformat()
+        _sync_status["ops_synced"] += done
+        return done
+
+
+def _sync_loop() -> None:
+    interval = max(1, get_int_setting("ITEMS_SYNC_INTERVAL", 5))
+    reconcile_every = get_int_setting("ITEMS_RECONCILE_INTERVAL", 600)
+    last_reconcile = time.monotonic()
+    wait_s = interval
+    while True:
+        _sync_wakeup.wait(timeout=wait_s)
+        _sync_wakeup.clear()
+        try:
+            sync_once()
+            # Falhou: espera mais até a próxima rodada (dobra, até 5 min)
+            wait_s = min(300, wait_s * 2) if _sync_status["last_error"] else interval
+            # Reconciliação periódica com a planilha (edições manuais no Sheets)
+            if reconcile_every > 0 and time.monotonic() - last_reconcile >= reconcile_every:
+                last_reconcile = time.monotonic()
+                stats = pull_from_sheet()
+                if stats is not None:
+                    _sync_status["last_reconcile"] = datetime.utcnow().isoformat()
+                    _sync_status["last_reconcile_stats"] = stats
+        except Exception as e:
+            push_error("item_store.sync_loop", e)
+            time.sleep(interval)
+
+
+def ensure_sync_worker() -> None:
+    """Inicia a thread de sincronização com a planilha (uma por processo)."""
+    global _sync_thread
+    if _sync_thread is not None and _sync_thread.is_alive():
+        return
+    with _store_lock:
+        if _sync_thread is None or not _sync_thread.is_alive():
+            _sync_thread = threading.Thread(target=_sync_loop, name="items-sheet-sync", daemon=True)
+            _sync_thread.start()
+
+
+def request_sync() -> None:
+    """Acorda a thread de sincronização (chamado após cada escrita)."""
+    ensure_sync_worker()
+    _sync_wakeup.set()
+
+
+def get_sync_status() -> Dict[str, Any]:
+    """Estado da replicação: pendências, último envio e último erro."""
+    status = dict(_sync_status)
+    try:
+        store = get_item_store()
+        status["pending_ops"] = store.pending_count()
+        status["dead_ops"] = store.dead_count()
+    except Exception:
+        status["pending_ops"] = None
+        status["dead_ops"] = None
+    return status
+
+
+def _flush_on_exit() -> None:
+    if _store is not None:
+        try:
+            sync_once()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_on_exit)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Cache em disco das respostas da Perplexity.
+
+Prompts idênticos (mesmo preset rodado de novo na aba Perplexity, mesmo
+conteúdo extraído de novo na coleta) não vão mais para a rede:
+
+- chave = hash de (modelo, temperatura, max_tokens, prompt de sistema, prompt)
+- cada resposta vale por LLM_CACHE_TTL_HOURS (padrão 24)
+- o diretório fica limitado a LLM_CACHE_MAX_MB (padrão 50): passando disso,
+  as entradas usadas há mais tempo são apagadas (LRU pela data do arquivo,
+  que é atualizada a cada acerto)
+- LLM_CACHE=false no .env desliga o cache
+
+Contadores de acertos/erros e tokens economizados: globais em
+`get_cache_stats()` e por execução com `start_run_stats()` (ContextVar,
+como o Error Bus: vale também para as threads que copiam o contexto).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import get_bool_setting, get_int_setting
+from .errors import push_error
+from .local_cache import JsonCache
+
+
+def _new_stats() -> Dict[str, int]:
+    return {"hits": 0, "misses": 0, "saved_input_tokens": 0, "saved_output_tokens": 0}
+
+
+_stats_lock = threading.Lock()
+_global_stats: Dict[str, int] = _new_stats()
+_run_stats: contextvars.ContextVar = contextvars.ContextVar("llm_cache_stats", default=None)
+
+
+class _ResponseCache(JsonCache):
+    """JsonCache com validade por entrada e limite de tamanho (LRU)."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._files: Optional[Dict[Path, Dict[str, float]]] = None
+        self._files_lock = threading.Lock()
+
+    def _index(self) -> Dict[Path, Dict[str, float]]:
+        """Tamanho e data de uso de cada arquivo (lido do disco uma vez)."""
+        if self._files is None:
+            files = {}
+            for path in self.dir.glob("*.json"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                files[path] = {"size": st.st_size, "used": st.st_mtime}
+            self._files = files
+        return self._files
+
+    def lookup(self, key: str, ttl_s: float) -> Optional[Dict[str, Any]]:
+        value = self.get(key)
+        if value is None:
+            return None
+        path = self._path(key)
+        if time.time() - value.get("created_at", 0) > ttl_s:
+            self.delete(key)
+            with self._files_lock:
+                self._index().pop(path, None)
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._files_lock:
+            entry = self._index().get(path)
+            if entry is not None:
+                entry["used"] = now
+        return value
+
+    def forget(self, key: str) -> None:
+        self.delete(key)
+        with self._files_lock:
+            self._index().pop(self._path(key), None)
+
+    def store(self, key: str, value: Dict[str, Any], max_bytes: int) -> None:
+        self.set(key, value)
+        path = self._path(key)
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        with self._files_lock:
+            files = self._index()
+            files[path] = {"size": st.st_size, "used": st.st_mtime}
+            total = sum(f["size"] for f in files.values())
+            if total <= max_bytes:
+                return
+            # Apaga as menos usadas até ficar em 90% do limite
+            for old in sorted(files, key=lambda p: files[p]["used"]):
+                if total <= max_bytes * 0.9 or old == path:
+                    continue
+                try:
+                    old.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    push_error("llm_cache.evict", e)
+                    continue
+                total -= files.pop(old)["size"]
+
+
+_cache = _ResponseCache("llm_cache")
+
+
+def cache_key(model_id: str, temperature: float, max_tokens: int, system_prompt: str, prompt: str) -> str:
+    payload = json.dumps(
+        [model_id, round(float(temperature), 4), int(max_tokens), system_prompt, prompt],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _record(key: str, value: int = 1) -> None:
+    with _stats_lock:
+        _global_stats[key] += value
+        run = _run_stats.get()
+        if run is not None:
+            run[key] += value
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Resposta salva para a chave ({"content", "usage"}), ou None.
+    Conta o acerto/erro e os tokens economizados.
+    """
+    if not get_bool_setting("LLM_CACHE", True):
+        return None
+    ttl_s = max(0, get_int_setting("LLM_CACHE_TTL_HOURS", 24)) * 3600
+    try:
+        value = _cache.lookup(key, ttl_s)
+    except Exception as e:
+        push_error("llm_cache.lookup", e)
+        value = None
+    if value is None:
+        _record("misses")
+        return None
+    usage = value.get("usage") or {}
+    _record("hits")
+    _record("saved_input_tokens", int(usage.get("input_tokens", 0) or 0))
+    _record("saved_output_tokens", int(usage.get("output_tokens", 0) or 0))
+    return value
+
+
+def store(key: str, content: Any, usage: Dict[str, int]) -> None:
+    """Guarda uma resposta bem-sucedida."""
+    if not get_bool_setting("LLM_CACHE", True):
+        return
+    max_bytes = max(1, get_int_setting("LLM_CACHE_MAX_MB", 50)) * 1024 * 1024
+    try:
+        _cache.store(key, {"content": content, "usage": usage, "created_at": time.time()}, max_bytes)
+    except Exception as e:
+        push_error("llm_cache.store", e)
+
+
+def forget(key: str) -> None:
+    """Descarta uma resposta guardada (ex.: não passou mais na validação)."""
+    try:
+        _cache.forget(key)
+    except Exception as e:
+        push_error("llm_cache.forget", e)
+
+
+def start_run_stats() -> Dict[str, int]:
+    """Zera e devolve os contadores da execução atual (coleta, chamada da aba Perplexity)."""
+    stats = _new_stats()
+    _run_stats.set(stats)
+    return stats
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Contadores acumulados desde o início do processo."""
+    with _stats_lock:
+        return dict(_global_stats)
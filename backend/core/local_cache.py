@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Cache local em disco (um arquivo JSON por chave).
+
+Usado para guardar entre execuções dados que não precisam ir para a
+planilha: validadores HTTP das páginas, texto limpo e o último resultado
+de extração de cada link.
+
+Os arquivos ficam em config.get_data_dir()/<nome>/, com o nome derivado
+de um hash da chave. A escrita é atômica (arquivo temporário + replace).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import get_data_dir
+from .errors import push_error
+
+
+class JsonCache:
+    """Dicionário persistente chave -> dict, seguro para uso entre threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._dir: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    @property
+    def dir(self) -> Path:
+        if self._dir is None:
+            self._dir = get_data_dir() / self.name
+            self._dir.mkdir(parents=True, exist_ok=True)
+        return self._dir
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return self.dir / f"{digest}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna o valor salvo para 'key', ou None se não existir/estiver corrompido."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        # Confere a chave para não confundir colisões de hash
+        if not isinstance(data, dict) or data.get("_key") != key:
+            return None
+        return data.get("value")
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Grava 'value' para 'key' (sobrescreve)."""
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with self._lock:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"_key": key, "value": value}, f, ensure_ascii=False)
+                os.replace(tmp, path)
+        except Exception as e:
+            push_error(f"local_cache.set ({self.name})", e)
+
+    def delete(self, key: str) -> None:
+        """Remove a entrada de 'key', se existir."""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            push_error(f"local_cache.delete ({self.name})", e)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Percorre todas as entradas salvas como (chave, valor)."""
+        for path in sorted(self.dir.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            if isinstance(data, dict) and "_key" in data:
+                yield data["_key"], data.get("value")
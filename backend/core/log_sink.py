@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Escrita em lote da aba 'logs'.
+
+Antes, cada `sheet_log` baixava a aba 'logs' inteira só para achar a próxima
+linha vazia — e a aba só cresce. Agora:
+
+- `sheet_log` apenas enfileira a linha (retorna na hora)
+- a fila é enviada numa única chamada `values_batch_update` quando junta
+  LOG_FLUSH_ENTRIES linhas (padrão 20) ou a cada LOG_FLUSH_SECONDS (padrão 10)
+- a próxima linha livre fica guardada em memória (ponteiro do fim da aba);
+  a aba só é lida na primeira vez e depois de uma falha de escrita
+- toda linha também vai na hora para data/logs/sheet_log.jsonl (arquivo
+  rotativo), então nada se perde se o Google Sheets estiver fora do ar;
+  linhas que falharem ficam na fila para a próxima tentativa
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from .config import get_data_dir, get_int_setting
+from .errors import push_error
+from .sheets import _col_letter, tab_snapshot, values_batch_update
+
+# Linhas guardadas no máximo enquanto a planilha estiver indisponível
+_MAX_PENDING = 2000
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_pending: List[List[str]] = []
+_ws_log = None
+_tail: Dict[str, Any] = {"next_row": None, "col_start": 1, "formatted": True}
+_wakeup = threading.Event()
+_thread: Optional[threading.Thread] = None
+_file_logger: Optional[logging.Logger] = None
+
+
+def _get_file_logger() -> logging.Logger:
+    """Logger do espelho local (JSONL rotativo em data/logs/)."""
+    global _file_logger
+    if _file_logger is None:
+        logger = logging.getLogger("quintessa.sheet_log")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            log_dir = get_data_dir() / "logs"
+            log_dir.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                str(log_dir / "sheet_log.jsonl"),
+                maxBytes=max(1, get_int_setting("LOG_FILE_MAX_KB", 5120)) * 1024,
+                backupCount=max(0, get_int_setting("LOG_FILE_BACKUPS", 3)),
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _file_logger = logger
+    return _file_logger
+
+
+def enqueue(ws_log, row: List[str]) -> None:
+    """Guarda a linha [ts, level, msg] no arquivo local e na fila da planilha."""
+    global _ws_log
+    try:
+        _get_file_logger().info(
+            json.dumps({"ts": row[0], "level": row[1], "msg": row[2]}, ensure_ascii=False)
+        )
+    except Exception as e:
+        push_error("log_sink.file", e)
+
+    with _lock:
+        _ws_log = ws_log
+        _pending.append(row)
+        if len(_pending) > _MAX_PENDING:
+            del _pending[: len(_pending) - _MAX_PENDING]
+        full = len(_pending) >= max(1, get_int_setting("LOG_FLUSH_ENTRIES", 20))
+    _ensure_worker()
+    if full:
+        _wakeup.set()
+
+
+def _locate_tail(ws) -> None:
+    """Lê a aba uma vez para achar a próxima linha livre (e o layout)."""
+    snap = tab_snapshot(ws, "ts")
+    if snap["hdr_idx"] < 0:
+        _tail.update(next_row=None, formatted=False)
+        return
+    _tail.update(next_row=snap["last_row"] + 1, col_start=snap["col_start"], formatted=True)
+
+
+def flush() -> int:
+    """
+    Envia as linhas pendentes numa única chamada.
+    Retorna quantas linhas foram gravadas (0 se não havia nada ou se falhou).
+    """
+    global _pending
+    with _flush_lock:
+        # Troca a fila por uma nova: o que chegar durante o envio fica na nova
+        # e o corte de _MAX_PENDING não apaga linhas que estão sendo enviadas
+        with _lock:
+            ws = _ws_log
+            if not _pending or ws is None:
+                return 0
+            rows, _pending = _pending, []
+
+        try:
+            if _tail["next_row"] is None and _tail["formatted"]:
+                _locate_tail(ws)
+
+            if not _tail["formatted"]:
+                # Aba sem cabeçalho reconhecível: append simples
+                ws.append_rows(rows, value_input_option="RAW")
+            else:
+                start = _tail["next_row"]
+                end = start + len(rows) - 1
+                if end > ws.row_count:
+                    ws.add_rows(end - ws.row_count + 500)
+                col_start = _tail["col_start"]
+                rng = f"{ws.title}!{_col_letter(col_start)}{start}:{_col_letter(col_start + 2)}{end}"
+                values_batch_update(ws, [(rng, rows)])
+                _tail["next_row"] = end + 1
+        except Exception as e:
+            push_error("log_sink.flush", e)
+            # Outra pessoa pode ter mexido na aba: relocaliza o fim na próxima vez
+            _tail.update(next_row=None, formatted=True)
+            with _lock:
+                # Devolve as linhas para a frente da fila (mais antigas primeiro)
+                _pending = rows + _pending
+                if len(_pending) > _MAX_PENDING:
+                    del _pending[: len(_pending) - _MAX_PENDING]
+            return 0
+        return len(rows)
+
+
+def pending_count() -> int:
+    with _lock:
+        return len(_pending)
+
+
+def _flush_loop() -> None:
+    while True:
+        _wakeup.wait(timeout=max(1, get_int_setting("LOG_FLUSH_SECONDS", 10)))
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as e:
+            push_error("log_sink.loop", e)
+
+
+def _ensure_worker() -> None:
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_flush_loop, name="sheet-log-flush", daemon=True)
+            _thread.start()
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -5,6 +5,7 @@ Mantém a lógica:
 - cálculo aproximado de tokens de entrada
 - estimativa de custo (US$ e R$)
 - gravação do resultado na aba 'perplexity' se solicitado
+- cache em disco das respostas (prompt repetido não vai para a rede; ver llm_cache)
 """
 
 from __future__ import annotations
@@ -15,8 +16,10 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
+from . import llm_cache
 from .config import get_perplexity_api_key
 from .errors import push_error
+from .http_client import fetch_url
 from .sheets import ensure_ws_perplexity
 
 
@@ -40,7 +43,7 @@ def count_tokens_from_url(url: str) -> Tuple[int, int, Optional[str]]:
     estima a partir do tamanho em bytes.
     """
     try:
-        resp = requests.get(url, timeout=30)
+        resp = fetch_url(url, timeout=30)
     except Exception as e:
         push_error("count_tokens_from_url", e)
         return 0, 0, str(e)
@@ -119,9 +122,19 @@ def call_perplexity_chat(
       Para o modelo sonar-deep-research há custos adicionais
       (citation/reasoning/search queries) que NÃO são contabilizados aqui.
       Use este valor como estimativa conservadora.
+    - Resposta vinda do cache (mesmo modelo, temperatura, max_tokens e prompt
+      dentro da validade) tem custo zero; o que teria custado vai em
+      saved_cost_usd/saved_cost_brl e tokens_saved.
     """
+    sysmsg = (
+        "Você é um pesquisador especializado em editais. "
+        "Responda em português, forneça bullets claros e liste as fontes (links)."
+    )
+    cache_key = llm_cache.cache_key(model_id, float(temperature), int(max_out), sysmsg, prompt)
+    cached = llm_cache.lookup(cache_key)
+
     api_key = get_perplexity_api_key()
-    if not api_key:
+    if not api_key and cached is None:
         return {"error": "API key da Perplexity não configurada no backend."}
 
     url = "https://api.perplexity.ai/chat/completions"
@@ -129,10 +142,6 @@ def call_perplexity_chat(
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
-    sysmsg = (
-        "Você é um pesquisador especializado em editais. "
-        "Responda em português, forneça bullets claros e liste as fontes (links)."
-    )
     body: Dict[str, Any] = {
         "model": model_id,
         "temperature": float(temperature),
@@ -152,14 +161,17 @@ def call_perplexity_chat(
     custo_usd = (tin_est / 1_000_000.0) * pin + (max_out / 1_000_000.0) * pout
     custo_brl = custo_usd * float(usd_brl)
 
-    try:
-        resp = requests.post(url, headers=headers, json=body, timeout=120)
-        if resp.status_code >= 400:
-            return {"error": f"{resp.status_code} {resp.text}"}
-        data = resp.json()
-    except Exception as e:
-        push_error("call_perplexity_chat", e)
-        return {"error": f"exception: {e}"}
+    if cached is not None:
+        data = cached["content"]
+    else:
+        try:
+            resp = requests.post(url, headers=headers, json=body, timeout=120)
+            if resp.status_code >= 400:
+                return {"error": f"{resp.status_code} {resp.text}"}
+            data = resp.json()
+        except Exception as e:
+            push_error("call_perplexity_chat", e)
+            return {"error": f"exception: {e}"}
 
     resumo = ""
     links_list: List[str] = []
@@ -194,6 +206,20 @@ def call_perplexity_chat(
         )
         custo_brl = custo_usd_real * float(usd_brl)
 
+    # Cache: guarda a resposta nova; numa resposta do cache nada foi gasto
+    saved_usd = saved_brl = 0.0
+    tokens_saved = 0
+    if cached is None:
+        if resumo:
+            llm_cache.store(cache_key, data, {
+                "input_tokens": tokens_in_real if isinstance(tokens_in_real, int) else tin_est,
+                "output_tokens": tokens_out_real if isinstance(tokens_out_real, int) else 0,
+            })
+    else:
+        tokens_saved = tin_for_return + (tokens_out_real if isinstance(tokens_out_real, int) else 0)
+        saved_usd, saved_brl = custo_usd_real, custo_brl
+        custo_usd_real = custo_brl = 0.0
+
     # Grava na planilha se solicitado
     if save:
         try:
@@ -236,6 +262,10 @@ def call_perplexity_chat(
         "tokens_in": tin_for_return,
         "estimated_cost_usd": custo_usd_real,
         "estimated_cost_brl": custo_brl,
+        "cached": cached is not None,
+        "tokens_saved": tokens_saved,
+        "saved_cost_usd": saved_usd,
+        "saved_cost_brl": saved_brl,
         "raw": data,
         "error": None,
     }
@@ -13,8 +13,10 @@ Suporta dois modos de autenticação (em ordem de prioridade):
 
 from __future__ import annotations
 
+import contextvars
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import gspread
 from google.oauth2.service_account import Credentials as ServiceAccountCredentials
@@ -23,8 +25,8 @@ from google.auth.transport.requests import Request
 
 from . import config
 from .errors import push_error
+from .sheets_quota import authorize_with_quota
 from datetime import datetime
-import time
 
 # Cabeçalho padrão da aba 'items'
 ITEMS_HEADER: List[str] = [
@@ -90,7 +92,7 @@ def get_gspread_client() -> gspread.Client:
                 scopes=config.SCOPES
             )
             print(f"[AUTH] Usando Service Account: {sa_path.name}")
-            return gspread.authorize(creds)
+            return authorize_with_quota(creds)
         except Exception as e:
             push_error("Service Account auth", e)
             raise RuntimeError(
@@ -113,7 +115,7 @@ def get_gspread_client() -> gspread.Client:
             if not creds.valid:
                 creds.refresh(Request())
             print("[AUTH] Usando OAuth pessoal (modo legado)")
-            return gspread.authorize(creds)
+            return authorize_with_quota(creds)
         except Exception as e:
             push_error("OAuth refresh", e)
             raise
@@ -229,63 +231,384 @@ def _find_data_in_tab(rows: List[List[str]], header_marker: str = ""):
     return hdr_idx, col_start, header, data_rows
 
 
+# ---------- Snapshot das abas por operação ----------
+# Cada função de leitura/escrita precisa do conteúdo da aba para achar o
+# cabeçalho e as linhas. Dentro de um `with sheet_operation():` a aba é
+# baixada no máximo uma vez; as escritas feitas pelos helpers deste módulo
+# atualizam o snapshot (linhas, última linha com dados), então as funções
+# seguintes da mesma operação não precisam reler a planilha.
+# Fora de um escopo, cada chamada lê a aba como antes.
+
+_snapshot_scope: contextvars.ContextVar = contextvars.ContextVar("sheet_snapshot_scope", default=None)
+
+
+@contextmanager
+def sheet_operation():
+    """
+    Escopo de uma operação lógica: cada aba é lida no máximo uma vez.
+    Escopos aninhados reaproveitam o escopo externo.
+    Também pode ser usado como decorador: @sheet_operation()
+    """
+    if _snapshot_scope.get() is not None:
+        yield
+        return
+    token = _snapshot_scope.set({})
+    try:
+        yield
+    finally:
+        _snapshot_scope.reset(token)
+
+
+def _last_data_row(hdr_idx: int, data_rows: List[List[str]]) -> int:
+    """Numero (1-indexed) da ultima linha com dados; a do header se nao houver dados."""
+    last = hdr_idx + 1
+    for i, r in enumerate(data_rows):
+        if any(cell.strip() for cell in r):
+            last = hdr_idx + 1 + i + 1
+    return last
+
+
+def tab_snapshot(ws, header_marker: str = "") -> Dict[str, Any]:
+    """
+    Conteudo e layout de uma aba, lidos uma vez por operacao.
+    Retorna dict: ws, rows (como lidas), hdr_idx, col_start, header,
+    data_rows (alinhadas com o header) e last_row (1-indexed).
+    """
+    scope = _snapshot_scope.get()
+    if scope is not None and ws.title in scope:
+        return scope[ws.title]
+
+    rows = ws.get_all_values()
+    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, header_marker)
+    snap = {
+        "ws": ws,
+        "rows": rows,
+        "hdr_idx": hdr_idx,
+        "col_start": col_start,
+        "header": header,
+        "data_rows": data_rows,
+        "last_row": _last_data_row(hdr_idx, data_rows) if hdr_idx >= 0 else len(rows),
+    }
+    if scope is not None:
+        scope[ws.title] = snap
+    return snap
+
+
+def _forget_snapshot(ws) -> None:
+    """Descarta o snapshot da aba (ex.: apos uma escrita que nao sabemos refletir)."""
+    scope = _snapshot_scope.get()
+    if scope is not None:
+        scope.pop(ws.title, None)
+
+
+def _snapshot_append(snap: Dict[str, Any], start_row: int, new_rows: List[List[str]]) -> None:
+    """Reflete no snapshot linhas escritas a partir de start_row (1-indexed)."""
+    data = snap["data_rows"]
+    first = start_row - snap["hdr_idx"] - 2  # indice em data_rows
+    while len(data) < first:
+        data.append([])
+    for k, r in enumerate(new_rows):
+        if first + k < len(data):
+            data[first + k] = list(r)
+        else:
+            data.append(list(r))
+    snap["last_row"] = max(snap["last_row"], start_row + len(new_rows) - 1)
+    index = snap.get("uid_index")
+    if index is not None:
+        col = index["col"]
+        for k, r in enumerate(new_rows):
+            uid = r[col].strip() if col < len(r) else ""
+            if uid:
+                index["rows"][uid] = start_row + k
+
+
+def _snapshot_set(snap: Dict[str, Any], rownum: int, col: int, value: str) -> None:
+    """Reflete no snapshot a escrita de uma celula (col = indice no header)."""
+    pos = rownum - snap["hdr_idx"] - 2
+    if 0 <= pos < len(snap["data_rows"]):
+        r = snap["data_rows"][pos]
+        if len(r) <= col:
+            r.extend([""] * (col + 1 - len(r)))
+        r[col] = value
+        index = snap.get("uid_index")
+        if index is not None and index["col"] == col:
+            snap.pop("uid_index", None)
+
+
+def _snapshot_delete_rows(snap: Dict[str, Any], rownums: List[int]) -> None:
+    """Reflete no snapshot a remocao de linhas (numeros 1-indexed)."""
+    for rn in sorted(set(rownums), reverse=True):
+        pos = rn - snap["hdr_idx"] - 2
+        if 0 <= pos < len(snap["data_rows"]):
+            del snap["data_rows"][pos]
+    snap["last_row"] = _last_data_row(snap["hdr_idx"], snap["data_rows"])
+    snap.pop("uid_index", None)  # linhas abaixo mudaram de numero
+
+
 def sheet_log(ws_log, level: str, msg: str) -> None:
-    """Registra uma linha na aba 'logs' no layout formatado (coluna B)."""
+    """
+    Registra uma linha na aba 'logs' (layout formatado, coluna B).
+    A linha entra numa fila enviada em lote e espelhada em arquivo local
+    (ver log_sink); a aba nao e lida a cada chamada.
+    """
+    from .log_sink import enqueue
+
     try:
-        rows = ws_log.get_all_values()
-        hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "ts")
-        if hdr_idx < 0:
-            # Fallback: appende normalmente
-            ws_log.append_row([datetime.utcnow().isoformat(), level, msg])
-            return
-        # Encontra proxima linha livre
-        last_data_row = hdr_idx + 1  # 1-indexed
-        for i, r in enumerate(data_rows):
-            if any(cell.strip() for cell in r):
-                last_data_row = hdr_idx + 1 + i + 1
-        next_row = last_data_row + 1
-        col_letter = _col_letter(col_start)
-        end_col = _col_letter(col_start + 2)  # ts, level, msg = 3 colunas
-        rng = f"{col_letter}{next_row}:{end_col}{next_row}"
-        ws_log.update([[datetime.utcnow().isoformat(), level, msg]], rng, value_input_option="RAW")
+        enqueue(ws_log, [datetime.utcnow().isoformat(), level, msg])
     except Exception as e:
         push_error("sheet_log", e)
 
 
-@lru_cache(maxsize=1)
-def read_items_cached():
+def read_items_tab() -> Dict[str, Any]:
+    """
+    Le a aba 'items' direto da planilha (uma vez por operacao, ver tab_snapshot)
+    e devolve o layout encontrado.
+    Retorna dict: ws, hdr_idx (0-based, -1 se aba vazia), col_start, header,
+    data_rows e last_row.
+    """
+    _, _, ws_items, _ = open_sheet()
+    snap = tab_snapshot(ws_items, "uid")
+    rows = snap["rows"]
+    if snap["hdr_idx"] < 0 and rows:
+        # Fallback: formato antigo (header na linha 1, coluna A)
+        data_rows = [list(r) for r in rows[1:]]
+        snap.update(
+            hdr_idx=0,
+            col_start=0,
+            header=rows[0],
+            data_rows=data_rows,
+            last_row=_last_data_row(0, data_rows),
+        )
+        snap.pop("uid_index", None)
+    if not snap["header"]:
+        snap["header"] = ITEMS_HEADER
+    return snap
+
+
+def _items_uid_rows(layout: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Mapeia uid -> numero da linha na planilha (1-indexed) para um layout lido.
+    O indice e montado uma vez por snapshot (a coluna vem de layout["col_start"])
+    e reaproveitado por todas as escritas da operacao: append acrescenta as
+    novas linhas; exclusao/compactacao o descartam para ser remontado.
+    """
+    index = layout.get("uid_index")
+    if index is not None:
+        return index["rows"]
+    header = layout["header"]
+    uid_col = header.index("uid") if "uid" in header else 0
+    first_row = layout["hdr_idx"] + 2
+    out: Dict[str, int] = {}
+    for i, r in enumerate(layout["data_rows"]):
+        uid = r[uid_col].strip() if uid_col < len(r) else ""
+        if uid:
+            out[uid] = first_row + i
+    layout["uid_index"] = {"col": uid_col, "rows": out}
+    return out
+
+
+def fetch_items_from_sheet() -> Tuple[List[str], List[List[str]]]:
     """
-    Le todas as linhas da aba 'items' com cache in-memory.
+    Le todas as linhas da aba 'items' direto da planilha.
     Suporta layout formatado (header na linha 4, coluna B).
     Retorna: (header, body)
     """
+    layout = read_items_tab()
+    header = layout["header"]
+    body = [r + [""] * max(0, len(header) - len(r)) for r in layout["data_rows"]
+            if any(cell.strip() for cell in r)]
+    return header, body
+
+
+def sheet_items_append(layout: Dict[str, Any], rows: List[List[str]]) -> None:
+    """Escreve 'rows' logo apos a ultima linha com dados da aba 'items'."""
+    if not rows:
+        return
+    ws_items = layout["ws"]
+    header = layout["header"]
+    hdr_idx = layout["hdr_idx"]
+    if hdr_idx < 0:
+        ws_items.append_rows(rows, value_input_option="RAW")
+        _forget_snapshot(ws_items)
+        return
+    start_row = layout["last_row"] + 1
+    col_start = layout["col_start"]
+    col_letter = _col_letter(col_start)
+    end_col = _col_letter(col_start + len(header) - 1)
+    end_row = start_row + len(rows) - 1
+    rng = f"{col_letter}{start_row}:{end_col}{end_row}"
+    ws_items.update(rows, rng, value_input_option="RAW")
+    _snapshot_append(layout, start_row, rows)
+
+
+def sheet_items_update(layout: Dict[str, Any], cells: Dict[str, Dict[str, str]]) -> None:
+    """Aplica {uid: {coluna: valor}} na aba 'items' com um unico batch_update."""
+    ws_items = layout["ws"]
+    header = layout["header"]
+    uid_to_rownum = _items_uid_rows(layout)
+    batch: List[Tuple[str, List[List[str]]]] = []
+    written: List[Tuple[int, int, str]] = []
+    for uid, fields in cells.items():
+        rownum = uid_to_rownum.get(uid)
+        if not rownum:
+            continue
+        for col, val in fields.items():
+            if col not in header:
+                continue
+            col_idx = header.index(col)
+            letter = _col_letter(layout["col_start"] + col_idx)
+            batch.append((f"{ws_items.title}!{letter}{rownum}", [[val]]))
+            written.append((rownum, col_idx, val))
+    values_batch_update(ws_items, batch)
+    for rownum, col_idx, val in written:
+        _snapshot_set(layout, rownum, col_idx, val)
+
+
+def _contiguous_ranges(rownums: List[int]) -> List[Tuple[int, int]]:
+    """Agrupa numeros de linha em faixas contiguas (inicio, fim), de baixo para cima."""
+    ranges: List[Tuple[int, int]] = []
+    for rn in sorted(set(rownums)):
+        if ranges and rn == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], rn)
+        else:
+            ranges.append((rn, rn))
+    ranges.reverse()
+    return ranges
+
+
+def sheet_items_delete(layout: Dict[str, Any], uids: List[str]) -> None:
+    """
+    Remove as linhas dos uids informados com uma unica chamada a API.
+
+    - Normal: um batchUpdate com um deleteDimension por faixa contigua de
+      linhas (de baixo para cima, para os indices continuarem validos).
+    - Compactacao: se a fracao apagada passar de ITEMS_COMPACT_PERCENT
+      (padrao 50) e houver mais de uma faixa, reescreve as linhas que
+      sobram num unico values_batch_update e limpa o final. As linhas da
+      aba ficam no lugar (so os valores sobem, em toda a largura usada,
+      inclusive colunas alem do header); a formatacao por linha (cores,
+      validacoes) NAO acompanha os valores. Quem depende dela deve usar
+      ITEMS_COMPACT_PERCENT=101 para apagar sempre com deleteDimension.
+    """
+    ws_items = layout["ws"]
+    uid_to_rownum = _items_uid_rows(layout)
+    rownums = sorted({uid_to_rownum[u] for u in uids if u in uid_to_rownum})
+    if not rownums:
+        return
+
+    ranges = _contiguous_ranges(rownums)
+    first_row = layout["hdr_idx"] + 2
+    last_row = layout["last_row"]
+    total = max(1, last_row - first_row + 1)
+    compact_pct = config.get_int_setting("ITEMS_COMPACT_PERCENT", 50)
+
+    if len(ranges) > 1 and len(rownums) * 100 >= total * compact_pct:
+        _compact_items(layout, set(rownums))
+        return
+
+    requests = [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": ws_items.id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,  # 0-indexed, inclusivo
+                    "endIndex": end,          # exclusivo
+                }
+            }
+        }
+        for start, end in ranges
+    ]
     try:
-        _, _, ws_items, _ = open_sheet()
-        rows = ws_items.get_all_values()
+        ws_items.spreadsheet.batch_update({"requests": requests})
     except Exception as e:
-        push_error("read_items_cached", e)
-        rows = []
+        push_error("sheet_items_delete", e)
+        raise
+    _snapshot_delete_rows(layout, rownums)
 
-    if not rows:
-        return ITEMS_HEADER, []
 
-    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "uid")
+def _compact_items(layout: Dict[str, Any], deleted_rows: set) -> None:
+    """
+    Reescreve as linhas restantes de uma vez, sem as linhas apagadas.
+    Copia a largura inteira usada (colunas extras alem do header tambem);
+    so os valores se movem, a formatacao fica na linha original.
+    """
+    ws_items = layout["ws"]
+    first_row = layout["hdr_idx"] + 2
+    last_row = layout["last_row"]
+    region = layout["data_rows"][: last_row - first_row + 1]
+    width = max([len(layout["header"])] + [len(r) for r in region])
+
+    kept: List[List[str]] = []
+    for i, r in enumerate(region):
+        if first_row + i not in deleted_rows:
+            kept.append((list(r) + [""] * width)[:width])
+    blanks = [[""] * width for _ in range(last_row - first_row + 1 - len(kept))]
+
+    col_start = layout["col_start"]
+    rng = (
+        f"{ws_items.title}!{_col_letter(col_start)}{first_row}:"
+        f"{_col_letter(col_start + width - 1)}{last_row}"
+    )
+    values_batch_update(ws_items, [(rng, kept + blanks)])
+    layout["data_rows"] = kept
+    layout["last_row"] = _last_data_row(layout["hdr_idx"], kept)
+    layout.pop("uid_index", None)
+
+
+def sheet_items_clear(layout: Dict[str, Any]) -> None:
+    """
+    Limpa os dados da aba 'items' mas preserva o layout formatado.
+    """
+    ws_items = layout["ws"]
+    hdr_idx = layout["hdr_idx"]
     if hdr_idx < 0:
-        # Fallback: formato antigo
-        header = rows[0]
-        data_rows = rows[1:]
+        # Fallback
+        ws_items.clear()
+        ws_items.append_row(ITEMS_HEADER)
+        layout.update(hdr_idx=0, col_start=0, header=list(ITEMS_HEADER), data_rows=[], last_row=1)
+        layout.pop("uid_index", None)
+        return
+    # Limpa apenas as linhas de dados (preserva linhas 1-4)
+    data_start = hdr_idx + 2  # 1-indexed, primeira linha de dados
+    total_rows = ws_items.row_count
+    if total_rows >= data_start:
+        col_start = layout["col_start"]
+        col_letter = _col_letter(col_start)
+        end_col = _col_letter(col_start + len(layout["header"]) - 1)
+        rng = f"{col_letter}{data_start}:{end_col}{total_rows}"
+        ws_items.batch_clear([rng])
+    layout.update(data_rows=[], last_row=hdr_idx + 1)
+    layout.pop("uid_index", None)
 
-    body = [r + [""] * max(0, len(header) - len(r)) for r in data_rows
-            if any(cell.strip() for cell in r)]
-    return header, body
 
+def read_items_cached():
+    """
+    Le todos os itens a partir da base local (SQLite), servida por uma
+    copia em memoria indexada por uid que as escritas atualizam no lugar.
+    A base e reconciliada com a planilha na primeira leitura de cada
+    execucao e periodicamente (ver item_store).
+    Retorna: (header, body) -- nao altere as listas devolvidas.
+    """
+    from .item_store import ensure_loaded
 
-def invalidate_items_cache() -> None:
-    """Limpa o cache da leitura da aba 'items'."""
     try:
-        read_items_cached.cache_clear()
-    except Exception:
-        pass
+        return ensure_loaded().read_all()
+    except Exception as e:
+        push_error("read_items_cached", e)
+        return ITEMS_HEADER, []
+
+
+def refresh_items_from_sheet() -> Optional[Dict[str, int]]:
+    """
+    Reconcilia a base local com a planilha (ex.: apos escrever direto na aba
+    ou editar a planilha manualmente).
+    Retorna {added, removed, changed}, ou None se nao reconciliou
+    (nao reconcilia com escritas pendentes de envio).
+    """
+    from .item_store import pull_from_sheet
+
+    return pull_from_sheet()
 
 
 def append_items_dedup(
@@ -293,8 +616,11 @@ def append_items_dedup(
 ) -> None:
     """
     Adiciona novas linhas em 'items', sem duplicados por uid.
-    Escreve a partir da coluna B no layout formatado.
+    Grava na base local e enfileira o envio para a planilha
+    (escrita a partir da coluna B no layout formatado).
     """
+    from .item_store import get_item_store, request_sync
+
     seen = set(r[0] for r in body if r)
     to_add = []
     for r in new_rows:
@@ -305,27 +631,11 @@ def append_items_dedup(
 
     if to_add:
         try:
-            # Encontra onde inserir
-            rows = ws_items.get_all_values()
-            hdr_idx, col_start, _, data_rows = _find_data_in_tab(rows, "uid")
-            if hdr_idx < 0:
-                ws_items.append_rows(to_add, value_input_option="RAW")
-            else:
-                # Encontra ultima linha com dados
-                last_data_row = hdr_idx + 1
-                for i, r in enumerate(data_rows):
-                    if any(cell.strip() for cell in r):
-                        last_data_row = hdr_idx + 1 + i + 1
-                start_row = last_data_row + 1
-                col_letter = _col_letter(col_start)
-                end_col = _col_letter(col_start + len(header) - 1)
-                end_row = start_row + len(to_add) - 1
-                rng = f"{col_letter}{start_row}:{end_col}{end_row}"
-                ws_items.update(to_add, rng, value_input_option="RAW")
+            get_item_store().insert_rows(to_add)
         except Exception as e:
             push_error("append_items_dedup", e)
             return
-        invalidate_items_cache()
+        request_sync()
 
 
 def read_config() -> Dict[str, str]:
@@ -334,17 +644,16 @@ def read_config() -> Dict[str, str]:
     Suporta layout formatado.
     """
     _, ws_cfg, _, _ = open_sheet()
-    rows = ws_cfg.get_all_values()
-    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "key")
+    snap = tab_snapshot(ws_cfg, "key")
 
     data: Dict[str, str] = {}
-    if hdr_idx < 0:
+    if snap["hdr_idx"] < 0:
         # Fallback: formato antigo
-        for r in rows[1:]:
+        for r in snap["rows"][1:]:
             if len(r) >= 2 and r[0]:
                 data[r[0]] = r[1]
     else:
-        for r in data_rows:
+        for r in snap["data_rows"]:
             if len(r) >= 2 and r[0].strip():
                 data[r[0].strip()] = r[1].strip() if len(r) > 1 else ""
     return data
@@ -356,61 +665,43 @@ def upsert_config(key: str, value: str) -> None:
     Suporta layout formatado.
     """
     _, ws_cfg, _, _ = open_sheet()
-    rows = ws_cfg.get_all_values()
-    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "key")
+    snap = tab_snapshot(ws_cfg, "key")
+    hdr_idx, col_start = snap["hdr_idx"], snap["col_start"]
 
     if hdr_idx < 0:
         # Fallback
         ws_cfg.append_row([key, value])
+        _forget_snapshot(ws_cfg)
         return
 
     # Procura a chave existente
-    for i, r in enumerate(data_rows):
+    for i, r in enumerate(snap["data_rows"]):
         cell_key = r[0].strip() if r else ""
         if cell_key == key:
             sheet_row = hdr_idx + 1 + i + 1  # 1-indexed
             val_col = col_start + 2  # coluna 'value' = col_start + 1 + 1 (1-indexed)
             ws_cfg.update_cell(sheet_row, val_col, value)
+            _snapshot_set(snap, sheet_row, 1, value)
             return
 
     # Nao encontrou — insere nova linha
-    last_data_row = hdr_idx + 1
-    for i, r in enumerate(data_rows):
-        if any(cell.strip() for cell in r):
-            last_data_row = hdr_idx + 1 + i + 1
-    next_row = last_data_row + 1
+    next_row = snap["last_row"] + 1
     col_letter = _col_letter(col_start)
     end_col = _col_letter(col_start + 1)
     rng = f"{col_letter}{next_row}:{end_col}{next_row}"
     ws_cfg.update([[key, value]], rng, value_input_option="RAW")
+    _snapshot_append(snap, next_row, [[key, value]])
 
 
 def clear_items_sheet() -> None:
     """
-    Limpa os dados da aba 'items' mas preserva o layout formatado.
+    Limpa todos os itens (base local) e enfileira a limpeza da aba 'items',
+    preservando o layout formatado.
     """
-    _, _, ws_items, _ = open_sheet()
-    rows = ws_items.get_all_values()
-    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "uid")
+    from .item_store import get_item_store, request_sync
 
-    if hdr_idx < 0:
-        # Fallback
-        ws_items.clear()
-        ws_items.append_row(ITEMS_HEADER)
-    else:
-        # Limpa apenas as linhas de dados (preserva linhas 1-4)
-        data_start = hdr_idx + 2  # 1-indexed, primeira linha de dados
-        total_rows = ws_items.row_count
-        if total_rows >= data_start:
-            # Limpa range de dados
-            col_letter = _col_letter(col_start)
-            end_col = _col_letter(col_start + len(header) - 1)
-            rng = f"{col_letter}{data_start}:{end_col}{total_rows}"
-            try:
-                ws_items.batch_clear([rng])
-            except Exception:
-                pass
-    invalidate_items_cache()
+    get_item_store().clear()
+    request_sync()
 
 
 def get_logs_tail(limit: int = 200) -> List[List[str]]:
@@ -418,26 +709,31 @@ def get_logs_tail(limit: int = 200) -> List[List[str]]:
     Retorna as ultimas 'limit' linhas da aba 'logs'.
     Suporta layout formatado.
     """
+    from .log_sink import flush as flush_logs
+
     try:
         _, _, _, ws_log = open_sheet()
-        rows = ws_log.get_all_values()
+        # Envia o que ainda esta na fila para o resultado incluir as ultimas linhas
+        if flush_logs():
+            _forget_snapshot(ws_log)
+        snap = tab_snapshot(ws_log, "ts")
     except Exception as e:
         push_error("get_logs_tail", e)
         return []
 
+    rows = snap["rows"]
     if not rows:
         return []
 
-    hdr_idx, col_start, header, data_rows = _find_data_in_tab(rows, "ts")
-    if hdr_idx < 0:
+    if snap["hdr_idx"] < 0:
         # Fallback
         if len(rows) <= limit:
             return rows
         return rows[-limit:]
 
     # Filtra linhas vazias
-    filled = [r for r in data_rows if any(cell.strip() for cell in r)]
-    result = [header] + filled[-limit:]
+    filled = [r for r in snap["data_rows"] if any(cell.strip() for cell in r)]
+    result = [snap["header"]] + filled[-limit:]
     return result
 
 
@@ -496,6 +792,7 @@ LINKS_HEADER: List[str] = [
     "last_run",      # SISTEMA: Ultima execucao
     "last_status",   # SISTEMA: Status (ok/erro)
     "last_items",    # SISTEMA: Editais encontrados
+    "content_hash",  # SISTEMA: Impressao digital do texto da pagina na ultima execucao
 ]
 
 # Layout da aba (conforme formatacao manual):
@@ -508,50 +805,9 @@ LINKS_HEADER: List[str] = [
 LINKS_COL_OFFSET = 1   # Dados comecam na coluna B (indice 1)
 
 
-def _find_links_header_row(rows: List[List[str]]) -> int:
-    """
-    Encontra a linha do cabecalho na aba de links.
-    Procura 'nome' nas primeiras 10 linhas.
-    Retorna o indice 0-based da linha do header, ou -1 se nao encontrar.
-    """
-    for i, row in enumerate(rows[:10]):
-        # Procura 'nome' em qualquer coluna da linha
-        for cell in row:
-            if cell.strip().lower() == "nome":
-                return i
-    return -1
-
-
-def _parse_links_rows(rows: List[List[str]]):
-    """
-    Dado todo o conteudo da aba, retorna (header_row_idx, header, data_rows).
-    header e a lista de nomes de coluna.
-    data_rows sao as linhas de dados (ja alinhadas com o header).
-    """
-    hdr_idx = _find_links_header_row(rows)
-    if hdr_idx < 0:
-        return -1, [], []
-
-    raw_header = rows[hdr_idx]
-    # Encontra onde comeca o header real (pula celulas vazias a esquerda)
-    col_start = 0
-    for j, cell in enumerate(raw_header):
-        if cell.strip():
-            col_start = j
-            break
-
-    # Extrai header a partir de col_start
-    header = [c.strip() for c in raw_header[col_start:]]
-    # Remove celulas vazias do final
-    while header and not header[-1]:
-        header.pop()
-
-    data_rows = []
-    for r in rows[hdr_idx + 1:]:
-        aligned = r[col_start:] if len(r) > col_start else []
-        data_rows.append(aligned)
-
-    return hdr_idx, header, data_rows
+def _links_snapshot(ws) -> Dict[str, Any]:
+    """Snapshot da aba de links (cabecalho localizado pela coluna 'nome')."""
+    return tab_snapshot(ws, "nome")
 
 
 def ensure_ws_links():
@@ -606,7 +862,7 @@ def _seed_default_links(ws) -> int:
 
         rows_to_add.append([
             nome, url, grupo, uid,
-            "true", now, "", "", "",
+            "true", now, "", "", "", "",
         ])
 
     if rows_to_add:
@@ -632,17 +888,17 @@ def read_links() -> List[Dict[str, str]]:
     """
     try:
         ws = ensure_ws_links()
-        rows = ws.get_all_values()
+        snap = _links_snapshot(ws)
     except Exception as e:
         push_error("read_links", e)
         return []
 
-    hdr_idx, header, data_rows = _parse_links_rows(rows)
-    if hdr_idx < 0:
+    header = snap["header"]
+    if snap["hdr_idx"] < 0:
         return []
 
     result = []
-    for r in data_rows:
+    for r in snap["data_rows"]:
         # Pula linhas vazias
         if not r or not any(cell.strip() for cell in r):
             continue
@@ -674,30 +930,25 @@ def add_link(url: str, grupo: str = "Geral", nome: str = "") -> Dict[str, str]:
 
     new_data = [
         nome or "", url, grupo, uid,
-        "true", now, "", "", "",
+        "true", now, "", "", "", "",
     ]
 
     try:
-        rows = ws.get_all_values()
-        hdr_idx, header, data_rows = _parse_links_rows(rows)
-
-        if hdr_idx < 0:
+        snap = _links_snapshot(ws)
+        if snap["hdr_idx"] < 0:
             # Fallback: escreve na linha 5
             next_row = 5
         else:
-            # Proxima linha livre apos header + dados
-            next_row = hdr_idx + 1 + len(data_rows) + 1  # +1 para 1-indexed
-            # Porem precisamos pular linhas vazias no final
-            # Encontra a ultima linha com dados
-            last_data = hdr_idx + 1  # pelo menos a linha apos o header
-            for i, r in enumerate(data_rows):
-                if any(cell.strip() for cell in r):
-                    last_data = hdr_idx + 1 + i + 1  # 1-indexed
-            next_row = last_data + 1
+            # Proxima linha livre apos a ultima linha com dados
+            next_row = snap["last_row"] + 1
 
         end_col = _col_letter(LINKS_COL_OFFSET + len(new_data) - 1)
         rng = f"B{next_row}:{end_col}{next_row}"
         ws.update([new_data], rng, value_input_option="RAW")
+        if snap["hdr_idx"] < 0:
+            _forget_snapshot(ws)
+        else:
+            _snapshot_append(snap, next_row, [new_data])
     except Exception as e:
         push_error("add_link", e)
         raise
@@ -712,6 +963,7 @@ def add_link(url: str, grupo: str = "Geral", nome: str = "") -> Dict[str, str]:
         "last_run": "",
         "last_status": "",
         "last_items": "",
+        "content_hash": "",
     }
 
 
@@ -720,27 +972,58 @@ def update_link(uid: str, updates: Dict[str, str]) -> bool:
     Atualiza campos de um link existente por UID.
     Retorna True se encontrou e atualizou.
     """
+    result = update_links([{**updates, "uid": uid}])
+    return uid in result["updated"]
+
+
+def update_links(updates: List[Dict[str, str]]) -> Dict[str, List[str]]:
+    """
+    Atualiza varios links em uma unica chamada ao Google Sheets.
+    Cada item e {"uid": ..., campo: valor, ...}; campos fora do cabecalho
+    (e o proprio uid) sao ignorados.
+    Retorna {"updated": [uids], "not_found": [uids]}.
+    """
+    result: Dict[str, List[str]] = {"updated": [], "not_found": []}
+    if not updates:
+        return result
+
     ws = ensure_ws_links()
-    rows = ws.get_all_values()
+    snap = _links_snapshot(ws)
 
-    hdr_idx, header, data_rows = _parse_links_rows(rows)
+    hdr_idx, header = snap["hdr_idx"], snap["header"]
     if hdr_idx < 0 or "uid" not in header:
-        return False
+        result["not_found"] = [u.get("uid", "") for u in updates]
+        return result
 
     uid_col = header.index("uid")
-
-    for i, r in enumerate(data_rows):
+    uid_to_rownum: Dict[str, int] = {}
+    for i, r in enumerate(snap["data_rows"]):
         cell_uid = r[uid_col].strip() if uid_col < len(r) else ""
-        if cell_uid == uid:
-            sheet_row = hdr_idx + 1 + i + 1  # 1-indexed
-            for key, value in updates.items():
-                if key in header and key != "uid":
-                    col_idx = header.index(key) + LINKS_COL_OFFSET + 1  # 1-indexed
-                    ws.update_cell(sheet_row, col_idx, value)
-                    time.sleep(0.5)
-            return True
+        if cell_uid and cell_uid not in uid_to_rownum:
+            uid_to_rownum[cell_uid] = hdr_idx + 1 + i + 1  # 1-indexed
 
-    return False
+    batch: List[Tuple[str, List[List[str]]]] = []
+    written: List[Tuple[int, int, str]] = []
+    for upd in updates:
+        uid = upd.get("uid", "")
+        row_num = uid_to_rownum.get(uid)
+        if not row_num:
+            result["not_found"].append(uid)
+            continue
+        for key, value in upd.items():
+            if key in header and key != "uid":
+                col_idx = header.index(key)
+                col = _col_letter(col_idx + LINKS_COL_OFFSET)
+                batch.append((f"{ws.title}!{col}{row_num}", [[value]]))
+                written.append((row_num, col_idx, value))
+        result["updated"].append(uid)
+
+    if batch:
+        values_batch_update(ws, batch)
+        for row_num, col_idx, val in written:
+            _snapshot_set(snap, row_num, col_idx, val)
+
+    return result
 
 
 def delete_link(uid: str) -> bool:
@@ -749,108 +1032,70 @@ def delete_link(uid: str) -> bool:
     Retorna True se encontrou e removeu.
     """
     ws = ensure_ws_links()
-    rows = ws.get_all_values()
+    snap = _links_snapshot(ws)
 
-    hdr_idx, header, data_rows = _parse_links_rows(rows)
+    hdr_idx, header = snap["hdr_idx"], snap["header"]
     if hdr_idx < 0 or "uid" not in header:
         return False
 
     uid_col = header.index("uid")
 
-    for i, r in enumerate(data_rows):
+    for i, r in enumerate(snap["data_rows"]):
         cell_uid = r[uid_col].strip() if uid_col < len(r) else ""
         if cell_uid == uid:
             sheet_row = hdr_idx + 1 + i + 1  # 1-indexed
             ws.delete_rows(sheet_row)
+            _snapshot_delete_rows(snap, [sheet_row])
             return True
 
     return False
 
 
-def update_link_run_status(uid: str, status: str, items_count: int) -> bool:
+def update_link_run_status(uid: str, status: str, items_count: int, content_hash: str = "") -> bool:
     """
     Atualiza o status da ultima execucao de um link.
+    'content_hash' so e gravado se a aba tiver a coluna correspondente.
     """
-    return update_link(uid, {
+    updates = {
         "last_run": datetime.utcnow().isoformat(),
         "last_status": status,
         "last_items": str(items_count),
-    })
+    }
+    if content_hash:
+        updates["content_hash"] = content_hash
+    return update_link(uid, updates)
 
 
 def update_link_run_status_batch(statuses: List[Dict]) -> int:
     """
     Atualiza o status de multiplos links em uma unica chamada ao Google Sheets.
-    Usa _parse_links_rows para encontrar header e dados corretamente.
+    'content_hash' so e gravado se a aba tiver a coluna correspondente.
     """
     if not statuses:
         return 0
 
-    try:
-        ws = ensure_ws_links()
-        rows = ws.get_all_values()
-    except Exception as e:
-        push_error("update_link_run_status_batch.read", e)
-        return 0
-
-    hdr_idx, header, data_rows = _parse_links_rows(rows)
-    if hdr_idx < 0:
-        return 0
-
-    try:
-        uid_idx = header.index("uid")
-        run_idx = header.index("last_run")
-        status_idx = header.index("last_status")
-        items_idx = header.index("last_items")
-    except ValueError as e:
-        push_error("update_link_run_status_batch.header", e)
-        return 0
-
-    # Mapeia uid -> numero de linha (1-indexed na planilha)
-    uid_to_rownum: Dict[str, int] = {}
-    for i, r in enumerate(data_rows):
-        cell_uid = r[uid_idx].strip() if uid_idx < len(r) else ""
-        if cell_uid:
-            sheet_row = hdr_idx + 1 + i + 1  # 1-indexed
-            uid_to_rownum[cell_uid] = sheet_row
-
     now = datetime.utcnow().isoformat()
-    batch: List[Tuple[str, List[List[str]]]] = []
-    updated = 0
-
+    updates: List[Dict[str, str]] = []
     for item in statuses:
         uid = item.get("uid")
         if not uid:
             continue
-        row_num = uid_to_rownum.get(uid)
-        if not row_num:
-            continue
+        upd = {
+            "uid": uid,
+            "last_run": item.get("last_run", now),
+            "last_status": item.get("status", ""),
+            "last_items": str(item.get("items_count", "")),
+        }
+        if item.get("content_hash"):
+            upd["content_hash"] = item["content_hash"]
+        updates.append(upd)
 
-        status_val = item.get("status", "")
-        items_count = str(item.get("items_count", ""))
-        run_time = item.get("last_run", now)
-
-        ws_name = ws.title
-        # Colunas reais na planilha = indice no header + offset da coluna B
-        col_run = _col_letter(run_idx + LINKS_COL_OFFSET)
-        col_status = _col_letter(status_idx + LINKS_COL_OFFSET)
-        col_items = _col_letter(items_idx + LINKS_COL_OFFSET)
-
-        batch += [
-            (f"{ws_name}!{col_run}{row_num}", [[run_time]]),
-            (f"{ws_name}!{col_status}{row_num}", [[status_val]]),
-            (f"{ws_name}!{col_items}{row_num}", [[items_count]]),
-        ]
-        updated += 1
-
-    if batch:
-        try:
-            values_batch_update(ws, batch)
-        except Exception as e:
-            push_error("update_link_run_status_batch.write", e)
-            return 0
-
-    return updated
+    try:
+        result = update_links(updates)
+    except Exception as e:
+        push_error("update_link_run_status_batch", e)
+        return 0
+    return len(result["updated"])
 
 
 def _col_letter(zero_idx: int) -> str:
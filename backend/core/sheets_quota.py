@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Controle de cota para todas as chamadas do gspread à API do Google Sheets.
+
+O cliente criado em `sheets.get_gspread_client()` passa por aqui:
+
+- token bucket separado para leituras (GET) e escritas (demais métodos),
+  no ritmo da cota da API (SHEETS_READS_PER_MIN / SHEETS_WRITES_PER_MIN,
+  padrão 60 cada, com rajada de SHEETS_BURST chamadas, padrão 10)
+- nova tentativa com backoff exponencial com jitter (até SHEETS_MAX_RETRIES,
+  padrão 6): leituras em 429, 408, 5xx e erros de rede; escritas só em 429
+  (cota) ou quando a conexão nem chegou a ser aberta, porque um timeout ou
+  5xx numa escrita não garante que ela não foi aplicada (um append repetido
+  duplicaria linhas)
+- leituras idênticas simultâneas (mesmo endpoint e parâmetros) viram uma
+  única chamada; as outras threads recebem a mesma resposta
+- contadores (chamadas, tentativas extras, tempo esperando cota/backoff)
+  em `get_quota_stats()` e no formato Prometheus em `render_prometheus()`
+
+gspread 6: instalado como http_client (QuotaHTTPClient).
+gspread 5: o método `client.request` é embrulhado.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import gspread
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .config import get_int_setting
+
+try:  # gspread >= 6
+    from gspread.http_client import HTTPClient as _BaseHTTPClient
+except ImportError:  # gspread 5
+    _BaseHTTPClient = None
+
+_RETRY_STATUS = {408, 429}
+
+
+class TokenBucket:
+    """Token bucket simples e thread-safe: 'rate' fichas por segundo, até 'capacity'."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Consome uma ficha, esperando se preciso. Retorna o tempo esperado (s)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {
+    "calls_read": 0,
+    "calls_write": 0,
+    "retries": 0,
+    "errors": 0,
+    "coalesced_reads": 0,
+    "throttled_seconds": 0.0,
+    "backoff_seconds": 0.0,
+}
+
+# Leituras em andamento: chave -> {"event", "response", "error"}
+_inflight: Dict[Tuple, Dict[str, Any]] = {}
+_inflight_lock = threading.Lock()
+
+
+def _bucket(kind: str) -> TokenBucket:
+    with _buckets_lock:
+        if kind not in _buckets:
+            per_min = get_int_setting(
+                "SHEETS_READS_PER_MIN" if kind == "read" else "SHEETS_WRITES_PER_MIN", 60
+            )
+            _buckets[kind] = TokenBucket(per_min / 60.0, get_int_setting("SHEETS_BURST", 10))
+        return _buckets[kind]
+
+
+def _count(key: str, value: float = 1) -> None:
+    with _stats_lock:
+        _stats[key] += value
+
+
+def _status_of(exc: Exception) -> Optional[int]:
+    """Código HTTP de um erro do gspread/requests (None para erro de rede)."""
+    resp = getattr(exc, "response", None)
+    code = getattr(resp, "status_code", None)
+    if code is None:
+        code = getattr(exc, "code", None)
+    return code
+
+
+def _not_sent(exc: Exception) -> bool:
+    """True se a requisição falhou antes de sair (conexão não abriu)."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    # requests embrulha o erro do urllib3: ConnectionError(MaxRetryError(reason=...))
+    reason = exc.args[0] if exc.args else None
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _is_quota_error(code: Optional[int], exc: "gspread.exceptions.APIError") -> bool:
+    if code == 429:
+        return True
+    # Drive API responde 403 'usageLimits' quando estoura a cota
+    try:
+        errors = exc.error.get("errors") or []
+        return code == 403 and bool(errors) and errors[0].get("domain") == "usageLimits"
+    except Exception:
+        return False
+
+
+def _should_retry(exc: Exception, kind: str = "read") -> bool:
+    if kind != "read":
+        # Escritas podem não ser idempotentes (append, insert/delete de linhas)
+        if _not_sent(exc):
+            return True
+        return isinstance(exc, gspread.exceptions.APIError) and _is_quota_error(_status_of(exc), exc)
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, gspread.exceptions.APIError):
+        code = _status_of(exc)
+        if code in _RETRY_STATUS or (code is not None and code >= 500):
+            return True
+        return _is_quota_error(code, exc)
+    return False
+
+
+def _call_with_quota(kind: str, fn: Callable[[], Any]) -> Any:
+    """Executa 'fn' respeitando o bucket e refazendo em erros temporários."""
+    max_retries = max(0, get_int_setting("SHEETS_MAX_RETRIES", 6))
+    attempt = 0
+    while True:
+        waited = _bucket(kind).acquire()
+        if waited:
+            _count("throttled_seconds", waited)
+        _count("calls_read" if kind == "read" else "calls_write")
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not _should_retry(e, kind):
+                _count("errors")
+                raise
+            # Backoff exponencial com jitter (50-100% do passo), teto de 64 s
+            delay = random.uniform(0.5, 1.0) * min(64.0, 2.0 ** attempt)
+            attempt += 1
+            _count("retries")
+            _count("backoff_seconds", delay)
+            time.sleep(delay)
+
+
+def limited_request(method: str, endpoint: str, params: Any, fn: Callable[[], Any]) -> Any:
+    """
+    Ponto único por onde passam as requisições do gspread.
+    Leituras idênticas simultâneas compartilham a mesma chamada.
+    """
+    if method.upper() != "GET":
+        return _call_with_quota("write", fn)
+
+    key = (endpoint, repr(sorted(params.items())) if isinstance(params, dict) else repr(params))
+    with _inflight_lock:
+        entry = _inflight.get(key)
+        leader = entry is None
+        if leader:
+            entry = _inflight[key] = {"event": threading.Event(), "response": None, "error": None}
+
+    if not leader:
+        _count("coalesced_reads")
+        entry["event"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry["response"]
+
+    try:
+        entry["response"] = _call_with_quota("read", fn)
+        return entry["response"]
+    except Exception as e:
+        entry["error"] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        entry["event"].set()
+
+
+if _BaseHTTPClient is not None:
+
+    class QuotaHTTPClient(_BaseHTTPClient):
+        """HTTPClient do gspread 6 com cota, backoff e coalescência de leituras."""
+
+        def request(self, method: str, endpoint: str, params=None, *args: Any, **kwargs: Any):
+            parent = super().request
+            return limited_request(
+                method, endpoint, params,
+                lambda: parent(method, endpoint, params, *args, **kwargs),
+            )
+
+else:
+    QuotaHTTPClient = None
+
+
+def authorize_with_quota(credentials) -> gspread.Client:
+    """Equivalente a gspread.authorize(credentials), já com o controle de cota."""
+    if QuotaHTTPClient is not None:
+        return gspread.authorize(credentials, http_client=QuotaHTTPClient)
+
+    # gspread 5: embrulha client.request
+    gc = gspread.authorize(credentials)
+    original = gc.request
+
+    def request(method, endpoint, params=None, *args, **kwargs):
+        return limited_request(
+            method, endpoint, params,
+            lambda: original(method, endpoint, params, *args, **kwargs),
+        )
+
+    gc.request = request
+    return gc
+
+
+def get_quota_stats() -> Dict[str, Any]:
+    """Contadores acumulados desde o início do processo."""
+    with _stats_lock:
+        out: Dict[str, Any] = dict(_stats)
+    out["throttled_seconds"] = round(out["throttled_seconds"], 3)
+    out["backoff_seconds"] = round(out["backoff_seconds"], 3)
+    with _inflight_lock:
+        out["inflight_reads"] = len(_inflight)
+    return out
+
+
+def render_prometheus() -> str:
+    """Contadores no formato texto do Prometheus."""
+    stats = get_quota_stats()
+    lines = []
+    for key in ("calls_read", "calls_write", "retries", "errors", "coalesced_reads",
+                "throttled_seconds", "backoff_seconds"):
+        name = f"sheets_{key}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {stats[key]}")
+    lines.append("# TYPE sheets_inflight_reads gauge")
+    lines.append(f"sheets_inflight_reads {stats['inflight_reads']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+Extração determinística de editais de páginas estruturadas, antes da Perplexity.
+
+Muitas fontes já publicam a lista de chamadas num formato que dá para ler
+sem IA:
+
+- feeds RSS/Atom
+- sitemaps XML (só URLs com cara de edital: "edital", "chamada", "call"...)
+- JSON-LD (schema.org MonetaryGrant, Grant, Event, JobPosting, ItemList)
+- tabelas HTML com uma coluna de título e outra de prazo/data
+
+Linhas de tabela e nós JSON-LD genéricos (Event, JobPosting) só entram se
+o texto tiver cara de chamada, como já acontecia com feeds e sitemaps.
+
+`extract_structured` devolve os itens no mesmo formato que a Perplexity
+(title, link, deadline, published, value, agency, description) e
+`select_structured` decide o que a coleta usa: com algum prazo, os itens
+filtrados (sem chamar a API); sem nenhum prazo (Atom/RSS, tabelas só com data
+de publicação), a Perplexity lê a página; sitemaps, que só trazem URLs, ficam
+com as publicadas nos últimos STRUCTURED_RECENT_DAYS dias (padrão 60).
+STRUCTURED_EXTRACT=false no .env desliga a etapa.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from dateutil import parser as date_parser
+
+from .config import get_int_setting
+
+# Palavras que indicam uma chamada (filtro de feeds e sitemaps)
+_CALL_RE = re.compile(
+    r"edita(?:l|is)|chamada|sele[cç][aã]o|inscri[cç]|pr[eê]mio|fomento|bolsa|oportunidade"
+    r"|call|grant|funding|fellowship|award|tender|rfp|open-call|convocat",
+    re.IGNORECASE,
+)
+
+_TITLE_COLS = ("titulo", "edital", "chamada", "nome", "objeto", "programa", "title", "call", "name")
+_DEADLINE_COLS = (
+    "prazo", "encerramento", "inscricoes ate", "data limite", "data final", "termino",
+    "deadline", "closing", "close date", "due",
+)
+_PUBLISHED_COLS = ("publicacao", "abertura", "lancamento", "data de inicio", "published", "opening")
+_VALUE_COLS = ("valor", "recurso", "montante", "value", "amount", "funding")
+_AGENCY_COLS = ("orgao", "instituicao", "financiador", "agencia", "agency", "funder", "organization")
+
+_JSONLD_TYPES = {"monetarygrant", "grant", "fundingscheme", "event", "jobposting"}
+# Tipos que não são chamadas por definição: exigem _CALL_RE no texto
+_JSONLD_GENERIC_TYPES = {"event", "jobposting"}
+
+_MONTHS_PT = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+_PT_DATE_RE = re.compile(r"(\d{1,2})\s+de\s+([a-z]+)\s+de\s+(\d{4})")
+_NUM_DATE_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})\b")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _plain(text: str) -> str:
+    """Minúsculas sem acento, para comparar cabeçalhos."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def _clean_text(value: Any, limit: int = 0) -> str:
+    text = " ".join(_TAG_RE.sub(" ", str(value or "")).split())
+    return text[:limit] if limit else text
+
+
+def to_iso_date(value: Any) -> str:
+    """Data em YYYY-MM-DD (aceita ISO, dd/mm/aaaa, '30 de novembro de 2025', RFC 822)."""
+    text = _clean_text(value)
+    if not text:
+        return ""
+    m = _ISO_DATE_RE.search(text)
+    if m:
+        return m.group(0)
+    m = _NUM_DATE_RE.search(text)
+    if m:
+        day, month, year = (int(g) for g in m.groups())
+        year += 2000 if year < 100 else 0
+        try:
+            return datetime(year, month, day).strftime("%Y-%m-%d")
+        except ValueError:
+            return ""
+    m = _PT_DATE_RE.search(_plain(text))
+    if m and m.group(2) in _MONTHS_PT:
+        try:
+            return datetime(int(m.group(3)), _MONTHS_PT[m.group(2)], int(m.group(1))).strftime("%Y-%m-%d")
+        except ValueError:
+            return ""
+    try:
+        return date_parser.parse(text).strftime("%Y-%m-%d")
+    except (ValueError, OverflowError):
+        return ""
+
+
+def money_value(text: str) -> Optional[float]:
+    """Maior número de um texto de valor ('R$ 1,5 milhão', 'até R$ 500.000,00')."""
+    plain = _plain(text)
+    best = None
+    for m in re.finditer(r"(\d[\d.,]*)\s*(mil|milhao|milhoes|million|bilhao|bilhoes|billion|k)?\b", plain):
+        digits, scale = m.group(1), m.group(2)
+        if "," in digits and "." in digits:
+            digits = digits.replace(".", "").replace(",", ".") if digits.rfind(",") > digits.rfind(".") \
+                else digits.replace(",", "")
+        elif "," in digits:
+            digits = digits.replace(",", ".") if len(digits.split(",")[-1]) != 3 else digits.replace(",", "")
+        elif digits.count(".") > 1 or (len(digits.split(".")[-1]) == 3 and "." in digits):
+            digits = digits.replace(".", "")
+        try:
+            number = float(digits)
+        except ValueError:
+            continue
+        factor = {"mil": 1e3, "k": 1e3, "milhao": 1e6, "milhoes": 1e6, "million": 1e6,
+                  "bilhao": 1e9, "bilhoes": 1e9, "billion": 1e9}.get(scale or "", 1)
+        number *= factor
+        best = number if best is None else max(best, number)
+    return best
+
+
+def _item(**fields: Any) -> Dict[str, str]:
+    return {
+        "title": _clean_text(fields.get("title"), 300),
+        "link": str(fields.get("link") or "").strip(),
+        "deadline": to_iso_date(fields.get("deadline")),
+        "published": to_iso_date(fields.get("published")),
+        "value": _clean_text(fields.get("value"), 100),
+        "agency": _clean_text(fields.get("agency"), 200),
+        "description": _clean_text(fields.get("description"), 200),
+    }
+
+
+# ---------- RSS / Atom / sitemap ----------
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+def _child_text(el, *names: str) -> str:
+    for child in el:
+        if _local(child.tag) in names:
+            return (child.text or "").strip()
+    return ""
+
+
+def _from_xml(url: str, raw: bytes) -> Optional[Dict[str, Any]]:
+    from lxml import etree
+
+    try:
+        root = etree.fromstring(raw, parser=etree.XMLParser(recover=True, resolve_entities=False, no_network=True))
+    except Exception:
+        return None
+    if root is None:
+        return None
+    kind = _local(root.tag)
+
+    items: List[Dict[str, str]] = []
+    if kind in ("rss", "rdf"):
+        for el in root.iter():
+            if _local(el.tag) != "item":
+                continue
+            title = _child_text(el, "title")
+            link = _child_text(el, "link", "guid")
+            description = _child_text(el, "description")
+            if not _CALL_RE.search(f"{title} {link} {description}"):
+                continue
+            items.append(_item(
+                title=title,
+                link=urljoin(url, link),
+                published=_child_text(el, "pubdate", "date"),
+                description=description,
+            ))
+        return {"kind": "rss", "items": items}
+
+    if kind == "feed":
+        for el in root:
+            if _local(el.tag) != "entry":
+                continue
+            title = _child_text(el, "title")
+            link = ""
+            for child in el:
+                if _local(child.tag) == "link" and child.get("rel", "alternate") == "alternate":
+                    link = child.get("href", "")
+                    break
+            description = _child_text(el, "summary", "content")
+            if not _CALL_RE.search(f"{title} {link} {description}"):
+                continue
+            items.append(_item(
+                title=title,
+                link=urljoin(url, link),
+                published=_child_text(el, "published", "updated"),
+                description=description,
+            ))
+        return {"kind": "atom", "items": items}
+
+    if kind == "urlset":
+        for el in root:
+            if _local(el.tag) != "url":
+                continue
+            loc = _child_text(el, "loc")
+            path = urlparse(loc).path
+            if not loc or not _CALL_RE.search(path):
+                continue
+            slug = [p for p in path.split("/") if p]
+            title = re.sub(r"\.\w+$", "", slug[-1]) if slug else loc
+            items.append(_item(
+                title=re.sub(r"[-_]+", " ", title).strip().capitalize(),
+                link=loc,
+                published=_child_text(el, "lastmod"),
+            ))
+        return {"kind": "sitemap", "items": items}
+
+    return None
+
+
+# ---------- JSON-LD ----------
+
+def _jsonld_nodes(data: Any):
+    if isinstance(data, list):
+        for entry in data:
+            yield from _jsonld_nodes(entry)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "itemListElement", "item"):
+            if key in data:
+                yield from _jsonld_nodes(data[key])
+
+
+def _name_of(value: Any) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        return str(value.get("name") or value.get("legalName") or "")
+    return str(value or "")
+
+
+def _amount_of(node: Dict[str, Any]) -> str:
+    amount = node.get("amount") or node.get("baseSalary") or node.get("value")
+    if isinstance(amount, dict):
+        number = amount.get("value") or amount.get("maxValue") or amount.get("minValue") or ""
+        currency = amount.get("currency") or ""
+        return f"{currency} {number}".strip()
+    return str(amount or "")
+
+
+def _from_jsonld(url: str, doc) -> List[Dict[str, str]]:
+    items: List[Dict[str, str]] = []
+    for script in doc.xpath("//script[contains(@type, 'ld+json')]"):
+        try:
+            data = json.loads(script.text or "")
+        except (ValueError, TypeError):
+            continue
+        for node in _jsonld_nodes(data):
+            types = node.get("@type") or ""
+            types = {str(t).lower() for t in (types if isinstance(types, list) else [types])}
+            if not types & _JSONLD_TYPES:
+                continue
+            title = node.get("name") or node.get("headline") or node.get("title")
+            if not title:
+                continue
+            if types <= _JSONLD_GENERIC_TYPES and not _CALL_RE.search(
+                f"{title} {node.get('url') or ''} {_clean_text(node.get('description'))}"
+            ):
+                continue
+            items.append(_item(
+                title=title,
+                link=urljoin(url, str(node.get("url") or "")),
+                deadline=node.get("applicationDeadline") or node.get("validThrough") or node.get("endDate"),
+                published=node.get("datePosted") or node.get("datePublished") or node.get("startDate"),
+                value=_amount_of(node),
+                agency=_name_of(node.get("funder") or node.get("sponsor") or node.get("organizer")
+                                or node.get("hiringOrganization")),
+                description=node.get("description"),
+            ))
+    return items
+
+
+# ---------- Tabelas HTML ----------
+
+def _find_col(headers: List[str], names) -> int:
+    for i, h in enumerate(headers):
+        if any(name in h for name in names):
+            return i
+    return -1
+
+
+def _cell_text(cell) -> str:
+    return " ".join(" ".join(cell.itertext()).split())
+
+
+def _from_tables(url: str, doc) -> List[Dict[str, str]]:
+    items: List[Dict[str, str]] = []
+    for table in doc.xpath("//table"):
+        rows = table.xpath(".//tr")
+        if len(rows) < 2:
+            continue
+        headers = [_plain(_cell_text(c)) for c in rows[0].xpath("./th|./td")]
+        title_col = _find_col(headers, _TITLE_COLS)
+        deadline_col = _find_col(headers, _DEADLINE_COLS)
+        published_col = _find_col(headers, _PUBLISHED_COLS)
+        if published_col == title_col:
+            published_col = -1
+        if title_col < 0 or (deadline_col < 0 and published_col < 0) or deadline_col == title_col:
+            continue
+        value_col = _find_col(headers, _VALUE_COLS)
+        agency_col = _find_col(headers, _AGENCY_COLS)
+
+        for row in rows[1:]:
+            cells = row.xpath("./th|./td")
+            if len(cells) <= max(title_col, deadline_col, published_col):
+                continue
+
+            def col(i: int) -> str:
+                return _cell_text(cells[i]) if 0 <= i < len(cells) else ""
+
+            hrefs = cells[title_col].xpath(".//a/@href") or row.xpath(".//a/@href")
+            deadline = col(deadline_col)
+            published = col(published_col)
+            if not col(title_col) or not (to_iso_date(deadline) or to_iso_date(published)):
+                continue
+            # Tabelas de notícias/eventos também têm título e data: a linha (ou o
+            # cabeçalho da coluna de título, ex. "Edital") precisa ter cara de chamada
+            if not _CALL_RE.search(f"{headers[title_col]} {_cell_text(row)} {' '.join(hrefs)}"):
+                continue
+            items.append(_item(
+                title=col(title_col),
+                link=urljoin(url, hrefs[0]) if hrefs else "",
+                deadline=deadline,
+                published=published,
+                value=col(value_col),
+                agency=col(agency_col),
+            ))
+    return items
+
+
+# ---------- Entrada ----------
+
+def _is_xml(content_type: str, head: str) -> bool:
+    if any(t in content_type for t in ("rss", "atom", "xml")) and "html" not in content_type:
+        return True
+    if head.startswith("<?xml") and "<html" not in head.lower():
+        return True
+    return head.startswith(("<rss", "<feed", "<urlset", "<rdf:"))
+
+
+def extract_structured(url: str, resp) -> Optional[Dict[str, Any]]:
+    """
+    Lê feeds, sitemaps, JSON-LD e tabelas da resposta HTTP.
+    Retorna {"kind", "items"} quando achou itens, senão None.
+    """
+    content_type = (resp.headers.get("Content-Type") or "").lower()
+    if "pdf" in content_type or url.lower().endswith(".pdf"):
+        return None
+    raw = resp.content or b""
+    head = raw[:1000].decode("utf-8", errors="ignore").lstrip("\ufeff \r\n\t")
+
+    if _is_xml(content_type, head):
+        found = _from_xml(url, raw)
+        return found if found and found["items"] else None
+
+    text = resp.text or ""
+    has_jsonld = "ld+json" in text
+    has_table = "<table" in text.lower()
+    if not (has_jsonld or has_table):
+        return None
+
+    import lxml.html
+
+    try:
+        doc = lxml.html.document_fromstring(text)
+    except Exception:
+        return None
+    if has_jsonld:
+        items = _from_jsonld(url, doc)
+        if items:
+            return {"kind": "jsonld", "items": items}
+    if has_table:
+        items = _from_tables(url, doc)
+        if items:
+            return {"kind": "table", "items": items}
+    return None
+
+
+def apply_filters(items: List[Dict[str, str]], min_days: int = 0,
+                  max_value: Optional[float] = None) -> List[Dict[str, str]]:
+    """
+    Aplica localmente os filtros que a Perplexity aplicaria pelo prompt:
+    prazo já vencido (ou antes de hoje + min_days) e valor acima do máximo.
+    Itens sem prazo/valor legível ficam.
+    """
+    limit = (datetime.now() + timedelta(days=max(0, min_days))).strftime("%Y-%m-%d")
+    out = []
+    for item in items:
+        deadline = to_iso_date(item.get("deadline"))
+        if deadline and deadline < limit:
+            continue
+        if max_value and item.get("value"):
+            amount = money_value(item["value"])
+            if amount is not None and amount > max_value:
+                continue
+        out.append(item)
+    return out
+
+
+def select_structured(found: Optional[Dict[str, Any]], min_days: int = 0,
+                      max_value: Optional[float] = None) -> Optional[List[Dict[str, str]]]:
+    """
+    Itens estruturados que a coleta deve usar, ou None para chamar a Perplexity.
+
+    - algum item com prazo: apply_filters (prazo e valor)
+    - nenhum prazo em sitemap: só as URLs com lastmod nos últimos
+      STRUCTURED_RECENT_DAYS dias (a página não tem mais texto para a IA ler)
+    - nenhum prazo nos demais (Atom/RSS, JSON-LD, tabela só com publicação):
+      None, porque sem prazo não dá para descartar chamadas já encerradas
+    """
+    if not found or not found.get("items"):
+        return None
+    items = found["items"]
+    if any(item.get("deadline") for item in items):
+        return apply_filters(items, min_days=min_days, max_value=max_value)
+    if found.get("kind") != "sitemap":
+        return None
+    days = max(1, get_int_setting("STRUCTURED_RECENT_DAYS", 60))
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    recent = [item for item in items if item.get("published") and item["published"] >= since]
+    return apply_filters(recent, min_days=min_days, max_value=max_value)
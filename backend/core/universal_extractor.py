@@ -18,16 +18,28 @@ Custo estimado: ~$0.0004 por extração (modelo sonar)
 
 from __future__ import annotations
 
+import contextvars
+import hashlib
 import json
 import re
+import threading
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import requests
 
-from .config import get_perplexity_api_key
+from . import llm_cache
+from .config import get_bool_setting, get_int_setting, get_perplexity_api_key
+from .content_select import CHARS_PER_TOKEN, select_content, split_blocks
 from .errors import push_error
+from .html_clean import clean_html
+from .http_client import fetch_url
+from .local_cache import JsonCache
 from .sheets import update_link_run_status, update_link_run_status_batch
+from .structured_extract import apply_filters, extract_structured, select_structured
 
 
 # Prompt de sistema otimizado para extração estruturada
@@ -56,80 +68,120 @@ FORMATO DE SAÍDA (JSON):
 
 Retorne APENAS o JSON, sem explicações adicionais."""
 
+# Variante para várias páginas curtas numa única chamada (ver _ExtractionBatcher)
+BATCH_SYSTEM_PROMPT = """Você é um especialista em análise de páginas de editais e chamadas públicas.
+Você receberá VÁRIAS páginas, cada uma entre os marcadores
+===== PÁGINA <id> ===== e ===== FIM PÁGINA <id> =====.
+Para CADA página, extraia TODOS os editais/chamadas/oportunidades encontrados NELA.
+
+REGRAS IMPORTANTES:
+1. Extraia SOMENTE editais/chamadas que estejam ATUALMENTE ativos/abertos
+2. Nunca misture páginas: cada edital fica na lista da página onde aparece
+3. Página sem editais tem lista vazia []
+4. Seja preciso nas datas - use formato ISO (YYYY-MM-DD)
+5. Links devem ser absolutos (com https://)
+
+FORMATO DE SAÍDA (um objeto JSON, uma chave por <id> de página):
+{
+  "<id>": [
+    {
+      "title": "Título do edital",
+      "link": "https://link-direto-para-o-edital",
+      "deadline": "2025-12-31",
+      "published": "2025-01-01",
+      "value": "até R$ 500.000",
+      "agency": "Órgão/Fundação responsável",
+      "description": "Breve descrição do objetivo (max 200 chars)"
+    }
+  ]
+}
+
+Retorne APENAS o JSON, sem explicações adicionais."""
+
+
+def _filter_lines(min_days: int, max_value: Optional[float]) -> List[str]:
+    """Bloco 'FILTROS A APLICAR' do prompt (vazio se não houver filtros)."""
+    prazo_minimo = (datetime.now() + timedelta(days=min_days)).strftime("%Y-%m-%d")
+    filtros = []
+    if min_days > 0:
+        filtros.append(f"- Deadline mínimo: {prazo_minimo} (pelo menos {min_days} dias no futuro)")
+    if max_value:
+        filtros.append(f"- Valor máximo: R$ {max_value:,.2f}")
+    if not filtros:
+        return []
+    return ["FILTROS A APLICAR:"] + filtros + [""]
+
 
 def build_extraction_prompt(
     url: str,
     content_preview: str,
     min_days: int = 0,
     max_value: Optional[float] = None,
+    part_label: str = "",
 ) -> str:
     """
     Constrói o prompt de extração com filtros aplicados.
-    Preview limitado a 6000 chars para economizar tokens.
+    'part_label' (ex: "parte 2 de 4") indica que o conteúdo é um trecho da página.
+    'content_preview' entra como veio: quem chama já escolheu o trecho
+    (content_select.select_content ou uma parte de extract_chunked).
     """
     hoje = datetime.now().strftime("%Y-%m-%d")
-    prazo_minimo = (datetime.now() + timedelta(days=min_days)).strftime("%Y-%m-%d")
     
     prompt_parts = [
         f"Analise a página: {url}",
         f"Data de hoje: {hoje}",
         "",
-        "CONTEÚDO DA PÁGINA (preview):",
-        content_preview[:6000],  # Reduzido de 15000 para economizar tokens
+        f"CONTEÚDO DA PÁGINA ({part_label or 'preview'}):",
+        content_preview,
         "",
     ]
     
     # Adiciona filtros
-    filtros = []
-    if min_days > 0:
-        filtros.append(f"- Deadline mínimo: {prazo_minimo} (pelo menos {min_days} dias no futuro)")
-    if max_value:
-        filtros.append(f"- Valor máximo: R$ {max_value:,.2f}")
-    
-    if filtros:
-        prompt_parts.append("FILTROS A APLICAR:")
-        prompt_parts.extend(filtros)
-        prompt_parts.append("")
+    prompt_parts.extend(_filter_lines(min_days, max_value))
     
     prompt_parts.append("Extraia todos os editais encontrados e retorne em formato JSON.")
     
     return "\n".join(prompt_parts)
 
 
-# Tags irrelevantes a remover do HTML antes de enviar ao Perplexity
-_TAGS_TO_REMOVE = [
-    "script", "style", "nav", "footer", "header", "aside",
-    "noscript", "iframe", "svg", "form", "button",
-]
+def build_batch_extraction_prompt(
+    pages: List[Dict[str, str]],
+    min_days: int = 0,
+    max_value: Optional[float] = None,
+) -> str:
+    """
+    Prompt com várias páginas curtas, cada uma entre marcadores com seu id.
+    'pages': lista de {"id", "url", "content"}.
+    """
+    hoje = datetime.now().strftime("%Y-%m-%d")
+    prompt_parts = [f"Data de hoje: {hoje}", ""]
+    for page in pages:
+        prompt_parts += [
+            f"===== PÁGINA {page['id']} =====",
+            f"URL: {page['url']}",
+            page["content"],
+            f"===== FIM PÁGINA {page['id']} =====",
+            "",
+        ]
+    prompt_parts.extend(_filter_lines(min_days, max_value))
+    ids = ", ".join(f'"{p["id"]}"' for p in pages)
+    prompt_parts.append(
+        f"Extraia os editais de cada página e retorne um objeto JSON com as chaves {ids}."
+    )
+    return "\n".join(prompt_parts)
 
-# Seletores CSS de elementos de cookie/banner a remover
-_SELECTORS_TO_REMOVE = [
-    "[class*='cookie']", "[id*='cookie']",
-    "[class*='banner']", "[class*='popup']",
-    "[class*='gdpr']", "[class*='consent']",
-    "[class*='newsletter']", "[class*='subscribe']",
-    "[role='navigation']", "[role='banner']",
-    "[role='complementary']",
-]
 
+# Cache HTTP condicional (ETag/Last-Modified + texto limpo) por URL
+_page_cache = JsonCache("http_cache")
+# Último resultado de extração por link_uid (reaproveitado quando a página não mudou)
+_extraction_cache = JsonCache("extractions")
 
-def fetch_page_content(url: str) -> Tuple[str, Optional[str]]:
+
+def _page_text(url: str, resp) -> Tuple[str, Optional[str]]:
     """
-    Baixa o conteúdo de uma página para análise.
-    Remove menus, rodapés, banners e elementos irrelevantes para
-    economizar tokens na chamada à Perplexity.
-    
+    Converte a resposta HTTP em texto limpo (PDF ou HTML).
     Retorna: (conteúdo_texto, erro_ou_none)
     """
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        resp = requests.get(url, headers=headers, timeout=30)
-        resp.raise_for_status()
-    except Exception as e:
-        return "", f"Erro ao baixar página: {e}"
-    
     content_type = (resp.headers.get("Content-Type") or "").lower()
     
     # PDF: tenta extrair texto
@@ -140,9 +192,11 @@ def fetch_page_content(url: str) -> Tuple[str, Optional[str]]:
             
             reader = PdfReader(BytesIO(resp.content))
             parts = []
-            for page in reader.pages[:10]:  # Limita a 10 páginas de PDF
+            # Limita as páginas lidas (PDF_MAX_PAGES); o texto longo é dividido
+            # em partes na extração (ver extract_chunked)
+            for page in reader.pages[:max(1, get_int_setting("PDF_MAX_PAGES", 40))]:
                 parts.append(page.extract_text() or "")
-            return " ".join(parts), None
+            return "\n".join(parts), None
         except Exception as e:
             return "", f"Erro ao ler PDF: {e}"
     
@@ -150,55 +204,136 @@ def fetch_page_content(url: str) -> Tuple[str, Optional[str]]:
     raw = resp.text or ""
     if "html" in content_type or "<html" in raw.lower():
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(raw, "html.parser")
-            
-            # Remove tags irrelevantes (nav, footer, scripts, etc)
-            for tag_name in _TAGS_TO_REMOVE:
-                for el in soup.find_all(tag_name):
-                    el.decompose()
-            
-            # Remove banners de cookie, pop-ups, etc
-            for selector in _SELECTORS_TO_REMOVE:
-                try:
-                    for el in soup.select(selector):
-                        el.decompose()
-                except Exception:
-                    pass
-            
-            # Tenta pegar só o conteúdo principal
-            main = soup.find("main") or soup.find("article") or soup.find(role="main")
-            if main and len(main.get_text(strip=True)) > 200:
-                text = main.get_text(separator=" ", strip=True)
-            else:
-                text = soup.get_text(separator=" ", strip=True)
-            
-            # Comprime espaços múltiplos
-            import re as _re
-            text = _re.sub(r'\s{3,}', '  ', text)
-            
-            return text, None
+            # Remove nav/footer/scripts/banners e pega o conteúdo principal
+            # (selectolax/lxml/bs4, ver html_clean)
+            return clean_html(raw), None
         except Exception as e:
             return raw, None
     
     return raw, None
 
 
-def call_perplexity_extraction(
-    prompt: str,
-    model_id: str = "sonar",
-    temperature: float = 0.1,
-    max_tokens: int = 4000,
-) -> Tuple[List[Dict], Optional[str], Dict[str, int]]:
+_TIME_OF_DAY_RE = re.compile(r"\b\d{1,2}:\d{2}(:\d{2})?\b")
+
+
+def content_fingerprint(text: str) -> str:
     """
-    Chama a API da Perplexity para extração.
+    Gera uma impressão digital do texto limpo de uma página.
+
+    Normaliza antes do hash (NFKC, minúsculas, espaços, horários do tipo
+    12:34) para que relógios e diferenças de espaçamento não contem como
+    mudança de conteúdo.
+    """
+    if not text:
+        return ""
+    norm = unicodedata.normalize("NFKC", text).lower()
+    norm = _TIME_OF_DAY_RE.sub(" ", norm)
+    norm = " ".join(norm.split())
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()[:16]
+
+
+def fetch_page(url: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Baixa uma página usando GET condicional.
+
+    Se já existe cópia em cache com ETag/Last-Modified, envia
+    If-None-Match/If-Modified-Since; um 304 devolve o texto limpo salvo
+    sem baixar o corpo de novo.
+
+    Também procura itens já estruturados na resposta (feed, sitemap, JSON-LD,
+    tabela; ver structured_extract), guardados junto no cache.
+
+    Retorna dict: {"text", "error", "not_modified", "structured"}
+    """
+    cached = _page_cache.get(url) if use_cache else None
+    headers: Dict[str, str] = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        # Pool compartilhado (keep-alive / HTTP/2) em vez de requests.get avulso
+        resp = fetch_url(url, headers=headers or None, timeout=30)
+        if resp.status_code == 304 and cached:
+            return {
+                "text": cached.get("text", ""),
+                "error": None,
+                "not_modified": True,
+                "structured": cached.get("structured"),
+            }
+        resp.raise_for_status()
+    except Exception as e:
+        return {"text": "", "error": f"Erro ao baixar página: {e}", "not_modified": False, "structured": None}
+
+    text, error = _page_text(url, resp)
+
+    structured = None
+    if get_bool_setting("STRUCTURED_EXTRACT", True):
+        try:
+            structured = extract_structured(url, resp)
+        except Exception as e:
+            push_error("structured_extract", e)
+
+    if use_cache and not error and text:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            _page_cache.set(url, {
+                "etag": etag or "",
+                "last_modified": last_modified or "",
+                "text": text,
+                "structured": structured,
+                "fetched_at": datetime.utcnow().isoformat(),
+            })
+        elif cached:
+            # Servidor deixou de mandar validadores: descarta a cópia antiga
+            _page_cache.delete(url)
+
+    return {"text": text, "error": error, "not_modified": False, "structured": structured}
+
+
+def fetch_page_content(url: str) -> Tuple[str, Optional[str]]:
+    """
+    Baixa o conteúdo de uma página para análise.
+    Remove menus, rodapés, banners e elementos irrelevantes para
+    economizar tokens na chamada à Perplexity.
     
-    Retorna: (lista_de_editais, erro_ou_none, token_usage)
-    token_usage = {"input_tokens": X, "output_tokens": Y}
+    Retorna: (conteúdo_texto, erro_ou_none)
+    """
+    page = fetch_page(url)
+    return page["text"], page["error"]
+
+
+def _call_perplexity(
+    prompt: str,
+    model_id: str,
+    system_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    parse: Callable[[str], Tuple[Any, Optional[str]]],
+) -> Tuple[Any, Optional[str], Dict[str, int]]:
+    """
+    Uma chamada de chat à Perplexity, com a resposta interpretada por
+    'parse(texto) -> (resultado, erro_ou_none)'.
+    Respostas repetidas vêm do cache em disco (ver llm_cache), com
+    token_usage zerado: nada foi gasto. Só entra no cache a resposta que
+    'parse' aceitou; uma entrada que não passa mais é descartada e a API é
+    chamada de novo.
+    Retorna: (resultado, erro_ou_none, token_usage)
     """
+    key = llm_cache.cache_key(model_id, temperature, max_tokens, system_prompt, prompt)
+    hit = llm_cache.lookup(key)
+    if hit is not None:
+        parsed, error = parse(hit["content"])
+        if error is None:
+            return parsed, None, {"input_tokens": 0, "output_tokens": 0}
+        llm_cache.forget(key)
+    
     api_key = get_perplexity_api_key()
     if not api_key:
-        return [], "API key da Perplexity não configurada", {"input_tokens": 0, "output_tokens": 0}
+        return "", "API key da Perplexity não configurada", {"input_tokens": 0, "output_tokens": 0}
     
     url = "https://api.perplexity.ai/chat/completions"
     headers = {
@@ -211,7 +346,7 @@ def call_perplexity_extraction(
         "temperature": temperature,
         "max_tokens": max_tokens,
         "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt},
         ],
     }
@@ -221,7 +356,7 @@ def call_perplexity_extraction(
     try:
         resp = requests.post(url, headers=headers, json=body, timeout=120)
         if resp.status_code >= 400:
-            return [], f"Erro API: {resp.status_code} - {resp.text[:500]}", token_usage
+            return "", f"Erro API: {resp.status_code} - {resp.text[:500]}", token_usage
         data = resp.json()
         
         # Extrai tokens da resposta (Perplexity retorna em "usage")
@@ -230,7 +365,7 @@ def call_perplexity_extraction(
         token_usage["output_tokens"] = usage.get("completion_tokens", 0)
         
     except Exception as e:
-        return [], f"Exceção na API: {e}", token_usage
+        return "", f"Exceção na API: {e}", token_usage
     
     # Extrai resposta
     try:
@@ -243,34 +378,398 @@ def call_perplexity_extraction(
         content = ""
     
     if not content:
-        return [], "Resposta vazia da API", token_usage
+        return "", "Resposta vazia da API", token_usage
+    parsed, error = parse(content)
+    if error is None:
+        llm_cache.store(key, content, token_usage)
+    return parsed, error, token_usage
+
+
+def _strip_code_fence(content: str) -> str:
+    """Remove possíveis marcadores de código (```json ... ```)."""
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+
+def call_perplexity_extraction(
+    prompt: str,
+    model_id: str = "sonar",
+    temperature: float = 0.1,
+    max_tokens: int = 4000,
+) -> Tuple[List[Dict], Optional[str], Dict[str, int]]:
+    """
+    Chama a API da Perplexity para extração.
     
-    # Tenta parsear JSON da resposta
+    Retorna: (lista_de_editais, erro_ou_none, token_usage)
+    token_usage = {"input_tokens": X, "output_tokens": Y}
+    """
+    items, error, token_usage = _call_perplexity(
+        prompt, model_id, SYSTEM_PROMPT, temperature, max_tokens, parse=_parse_items,
+    )
+    if error:
+        return [], error, token_usage
+    return items, None, token_usage
+
+
+def _parse_items(content: str) -> Tuple[List[Dict], Optional[str]]:
+    """Lista de editais da resposta (JSON, talvez cercado de texto)."""
     try:
-        # Remove possíveis marcadores de código
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
+        content = _strip_code_fence(content)
         
         items = json.loads(content)
         if not isinstance(items, list):
             items = [items] if items else []
-        return items, None, token_usage
+        return items, None
     except json.JSONDecodeError as e:
         # Tenta extrair JSON de dentro do texto
         match = re.search(r'\[[\s\S]*\]', content)
         if match:
             try:
                 items = json.loads(match.group())
-                return items, None, token_usage
+                return items, None
             except:
                 pass
-        return [], f"Erro ao parsear JSON: {e}", token_usage
+        return [], f"Erro ao parsear JSON: {e}"
+
+
+def call_perplexity_batch_extraction(
+    pages: List[Dict[str, str]],
+    min_days: int = 0,
+    max_value: Optional[float] = None,
+    model_id: str = "sonar",
+    temperature: float = 0.1,
+) -> Tuple[Dict[str, List[Dict]], Optional[str], Dict[str, int]]:
+    """
+    Extrai editais de várias páginas curtas numa única chamada.
+    'pages': lista de {"id", "url", "content"}.
+    
+    Retorna: ({id: lista_de_editais}, erro_ou_none, token_usage). Páginas
+    ausentes da resposta (ou com valor que não é lista) ficam fora do dict.
+    """
+    prompt = build_batch_extraction_prompt(pages, min_days=min_days, max_value=max_value)
+    data, error, token_usage = _call_perplexity(
+        prompt, model_id, BATCH_SYSTEM_PROMPT, temperature,
+        max_tokens=min(8000, 2500 * len(pages)), parse=_parse_batch,
+    )
+    if error:
+        return {}, error, token_usage
+    
+    ids = {p["id"] for p in pages}
+    by_page = {
+        str(k): v for k, v in data.items()
+        if str(k) in ids and isinstance(v, list)
+    }
+    return by_page, None, token_usage
+
+
+def _parse_batch(content: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Objeto {id: editais} da resposta em lote (JSON, talvez cercado de texto)."""
+    content = _strip_code_fence(content)
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        match = re.search(r'\{[\s\S]*\}', content)
+        try:
+            data = json.loads(match.group()) if match else None
+        except json.JSONDecodeError:
+            data = None
+        if data is None:
+            return {}, f"Erro ao parsear JSON: {e}"
+    
+    if not isinstance(data, dict):
+        return {}, "Resposta em lote fora do formato esperado"
+    return data, None
+
+
+class _ExtractionBatcher:
+    """
+    Junta páginas curtas de threads diferentes numa única chamada à Perplexity.
+
+    Cada thread chama submit() e espera: o lote é enviado quando junta
+    'max_pages' páginas, ou quando a primeira página do lote espera 'wait_s'.
+    Páginas que não voltarem na resposta (ou se o JSON do lote falhar) são
+    extraídas sozinhas, como antes. Os tokens do lote são divididos entre as
+    páginas pelo tamanho do texto.
+    """
+
+    def __init__(self, max_pages: int, max_chars: int, wait_s: float,
+                 model_id: str, min_days: int, max_value: Optional[float]):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.wait_s = wait_s
+        self.model_id = model_id
+        self.min_days = min_days
+        self.max_value = max_value
+        self._lock = threading.Lock()
+        self._current: Optional[Dict[str, Any]] = None
+        self.stats = {"batches": 0, "batched_pages": 0, "fallbacks": 0}
+
+    def accepts(self, content: str) -> bool:
+        return len(content) <= self.max_chars
+
+    def submit(self, url: str, link_uid: str, content: str) -> Tuple[List[Dict], Optional[str], Dict[str, int]]:
+        with self._lock:
+            batch = self._current
+            if batch is None:
+                batch = self._current = {"pages": [], "results": {}, "done": threading.Event()}
+            page_id = link_uid or f"p{len(batch['pages']) + 1}"
+            if any(p["id"] == page_id for p in batch["pages"]):
+                page_id = f"{page_id}-{len(batch['pages']) + 1}"
+            batch["pages"].append({"id": page_id, "url": url, "content": content})
+            first = len(batch["pages"]) == 1
+            full = len(batch["pages"]) >= self.max_pages
+            if full:
+                self._current = None
+
+        if full:
+            self._run(batch)
+        elif first and not batch["done"].wait(self.wait_s):
+            # Ninguém completou o lote a tempo: envia o que tem
+            with self._lock:
+                mine = self._current is batch
+                if mine:
+                    self._current = None
+            if mine:
+                self._run(batch)
+        batch["done"].wait()
+        return batch["results"][page_id]
+
+    def _run(self, batch: Dict[str, Any]) -> None:
+        pages = batch["pages"]
+        try:
+            if len(pages) == 1:
+                batch["results"][pages[0]["id"]] = self._single(pages[0])
+                return
+            by_page, error, usage = call_perplexity_batch_extraction(
+                pages, min_days=self.min_days, max_value=self.max_value, model_id=self.model_id,
+            )
+            if error:
+                push_error("extract_batch", Exception(error))
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["batched_pages"] += len(pages)
+            total_chars = sum(len(p["content"]) for p in pages) or 1
+            for p in pages:
+                share = len(p["content"]) / total_chars
+                part = {
+                    "input_tokens": int(round(usage.get("input_tokens", 0) * share)),
+                    "output_tokens": int(round(usage.get("output_tokens", 0) * share)),
+                }
+                if p["id"] in by_page:
+                    batch["results"][p["id"]] = (by_page[p["id"]], None, part)
+                    continue
+                # Fallback: extrai a página sozinha (soma os tokens já gastos no lote)
+                with self._lock:
+                    self.stats["fallbacks"] += 1
+                items, err, single = self._single(p)
+                part = {k: part[k] + single.get(k, 0) for k in part}
+                batch["results"][p["id"]] = (items, err, part)
+        except Exception as e:
+            push_error("extract_batch", e)
+            for p in pages:
+                batch["results"].setdefault(p["id"], ([], f"Erro no lote: {e}", {"input_tokens": 0, "output_tokens": 0}))
+        finally:
+            batch["done"].set()
+
+    def _single(self, page: Dict[str, str]) -> Tuple[List[Dict], Optional[str], Dict[str, int]]:
+        prompt = build_extraction_prompt(
+            url=page["url"],
+            content_preview=page["content"],
+            min_days=self.min_days,
+            max_value=self.max_value,
+        )
+        return call_perplexity_extraction(prompt=prompt, model_id=self.model_id)
+
+
+def _chunk_block_chars(chunk_chars: int) -> int:
+    return max(100, min(500, chunk_chars // 4))
+
+
+def split_chunks(text: str, chunk_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Divide o texto em partes de até ~'chunk_chars' caracteres, cortando entre
+    blocos (ver content_select.split_blocks). Cada parte repete no início os
+    últimos ~'overlap_chars' caracteres da anterior, para que um edital no
+    limite entre duas partes apareça inteiro em pelo menos uma.
+    """
+    blocks = split_blocks(text, _chunk_block_chars(chunk_chars))
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for block in blocks:
+        if current and size + len(block) + 1 > chunk_chars:
+            chunks.append(" ".join(current))
+            # Sobreposição: últimos blocos da parte anterior
+            tail: List[str] = []
+            tail_size = 0
+            for prev in reversed(current):
+                if tail_size + len(prev) > overlap_chars:
+                    if not tail and overlap_chars > 0:
+                        # Bloco maior que a sobreposição: só o final dele
+                        cut = prev.find(" ", len(prev) - overlap_chars)
+                        tail = [prev[cut + 1:]] if cut >= 0 else []
+                        tail_size = len(tail[0]) + 1 if tail else 0
+                    break
+                tail.insert(0, prev)
+                tail_size += len(prev) + 1
+            current, size = tail, tail_size
+        current.append(block)
+        size += len(block) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _dedup_key(item: Dict[str, Any], page_url: str) -> str:
+    link = str(item.get("link") or item.get("url") or "").strip().lower().rstrip("/")
+    if link and link != page_url.strip().lower().rstrip("/"):
+        return "link:" + link
+    title = str(item.get("title") or item.get("titulo") or "")
+    title = unicodedata.normalize("NFKC", title).lower()
+    return "title:" + " ".join(re.sub(r"[^\w\s]", " ", title).split())
+
+
+def merge_chunk_items(parts: List[List[Dict]], page_url: str) -> List[Dict]:
+    """
+    Junta os itens das partes, sem duplicados (mesmo link, ou mesmo título
+    quando o link é vazio ou é a própria página). Campos vazios de um item
+    são completados pelos duplicados das outras partes.
+    """
+    merged: Dict[str, Dict] = {}
+    for items in parts:
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            key = _dedup_key(item, page_url)
+            if key in ("link:", "title:"):
+                continue
+            if key not in merged:
+                merged[key] = dict(item)
+                continue
+            kept = merged[key]
+            for field, value in item.items():
+                if value and not kept.get(field):
+                    kept[field] = value
+    return list(merged.values())
+
+
+def extract_chunked(
+    url: str,
+    content: str,
+    min_days: int = 0,
+    max_value: Optional[float] = None,
+    model_id: str = "sonar",
+) -> Tuple[List[Dict], Optional[str], Dict[str, int], Dict[str, Any]]:
+    """
+    Extração map-reduce para páginas/PDFs longos: o texto é dividido em
+    partes sobrepostas, cada parte é extraída em paralelo e os itens são
+    unidos sem duplicados.
+
+    Limites de custo por link:
+    - EXTRACT_MAX_CHUNKS partes no máximo (padrão 4); se o texto não couber,
+      ficam os blocos mais relevantes (content_select) até esse total
+    - EXTRACT_LINK_MAX_TOKENS (padrão 20000): partes ainda não enviadas são
+      descartadas quando os tokens do link passam desse valor
+
+    Retorna: (itens, erro_ou_none, token_usage, content_kept). Só dá erro se
+    nenhuma parte der certo.
+    """
+    budget_tokens = max(1, get_int_setting("EXTRACT_PREVIEW_TOKENS", 1500))
+    chunk_chars = budget_tokens * CHARS_PER_TOKEN
+    max_chunks = max(1, get_int_setting("EXTRACT_MAX_CHUNKS", 4))
+    overlap = max(0, get_int_setting("EXTRACT_CHUNK_OVERLAP", 300))
+    max_link_tokens = get_int_setting("EXTRACT_LINK_MAX_TOKENS", 20000)
+
+    # Texto maior que o total das partes: fica com os blocos mais relevantes
+    # (descontando a sobreposição, que se repete em cada parte, e a sobra no
+    # fim de cada parte, que corta entre blocos)
+    per_chunk = chunk_chars - overlap - _chunk_block_chars(chunk_chars)
+    select_tokens = max_chunks * max(per_chunk, chunk_chars // 2) // CHARS_PER_TOKEN
+    text, kept = select_content(content, budget_tokens=select_tokens)
+    all_chunks = split_chunks(text, chunk_chars, overlap)
+    chunks = all_chunks[:max_chunks]
+    total = len(chunks)
+    if len(all_chunks) > total:
+        kept["truncated"] = True
+
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    usage_lock = threading.Lock()
+
+    def _extract_part(index: int, chunk: str) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        with usage_lock:
+            spent = usage["input_tokens"] + usage["output_tokens"]
+        if max_link_tokens > 0 and spent >= max_link_tokens:
+            return None  # limite de custo do link: parte não enviada
+        prompt = build_extraction_prompt(
+            url=url,
+            content_preview=chunk,
+            min_days=min_days,
+            max_value=max_value,
+            part_label=f"parte {index + 1} de {total}",
+        )
+        items, error, token_usage = call_perplexity_extraction(prompt=prompt, model_id=model_id)
+        with usage_lock:
+            usage["input_tokens"] += token_usage.get("input_tokens", 0)
+            usage["output_tokens"] += token_usage.get("output_tokens", 0)
+        return items, error
+
+    workers = max(1, min(total, get_int_setting("EXTRACT_CHUNK_WORKERS", 2)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _extract_part, i, chunk)
+            for i, chunk in enumerate(chunks)
+        ]
+        outcomes = []
+        for fut in futures:
+            try:
+                outcomes.append(fut.result())
+            except Exception as e:
+                push_error("extract_chunked", e)
+                outcomes.append(([], str(e)))
+
+    skipped = sum(1 for o in outcomes if o is None)
+    outcomes = [o for o in outcomes if o is not None]
+    parts = [items for items, error in outcomes if not error]
+    errors = [error for items, error in outcomes if error]
+    kept.update(
+        chunks=total,
+        chunks_ok=len(parts),
+        chunks_skipped=skipped,
+        chunks_dropped=len(all_chunks) - total,
+    )
+    if not parts:
+        return [], errors[0] if errors else "Nenhuma parte extraída", usage, kept
+    for error in errors:
+        push_error("extract_chunked", Exception(f"{url}: {error}"))
+    return merge_chunk_items(parts, url), None, usage, kept
+
+
+def _extraction_fresh(previous: Dict[str, Any]) -> bool:
+    """Extração guardada ainda dentro de EXTRACTION_CACHE_MAX_DAYS (padrão 7)?"""
+    max_days = get_int_setting("EXTRACTION_CACHE_MAX_DAYS", 7)
+    if max_days <= 0:
+        return True
+    try:
+        extracted_at = datetime.fromisoformat(previous.get("extracted_at", ""))
+    except (TypeError, ValueError):
+        return False
+    return datetime.utcnow() - extracted_at <= timedelta(days=max_days)
+
+
+def _notify_stage(on_stage: Optional[callable], stage: str, info: Dict[str, Any]) -> None:
+    """Avisa quem acompanha a extração (ex.: checkpoints do job) sem nunca quebrá-la."""
+    if on_stage is None:
+        return
+    try:
+        on_stage(stage, info)
+    except Exception as e:
+        push_error("extract_from_url.on_stage", e)
 
 
 def extract_from_url(
@@ -281,6 +780,8 @@ def extract_from_url(
     max_value: Optional[float] = None,
     model_id: str = "sonar",
     _skip_status_update: bool = False,
+    on_stage: Optional[callable] = None,
+    batcher: Optional[_ExtractionBatcher] = None,
 ) -> Dict[str, Any]:
     """
     Função principal: extrai editais de uma URL.
@@ -292,9 +793,17 @@ def extract_from_url(
         min_days: Prazo mínimo em dias
         max_value: Valor máximo em R$
         model_id: Modelo Perplexity a usar (sonar, sonar-pro, etc)
+        on_stage: chamado a cada etapa concluída com (etapa, dados):
+            "fetched" {content_hash} e "extracted" {items, content_hash,
+            input_tokens, output_tokens, cached}
+        batcher: se informado, páginas curtas vão em lote com outras
+            (ver _ExtractionBatcher)
     
     Returns:
-        Dict com: items, count, error, url, grupo, input_tokens, output_tokens
+        Dict com: items, count, error, url, grupo, input_tokens, output_tokens,
+        cached (True quando a extração anterior foi reaproveitada), content_hash,
+        content_kept (quanto do texto foi para o prompt; ausente se não chamou a API),
+        structured (tipo da fonte quando os itens vieram de feed/sitemap/JSON-LD/tabela)
     """
     result = {
         "url": url,
@@ -304,10 +813,13 @@ def extract_from_url(
         "error": None,
         "input_tokens": 0,
         "output_tokens": 0,
+        "cached": False,
+        "content_hash": "",
     }
     
     # 1. Baixa conteúdo da página (já limpo de nav/footer/banners)
-    content, error = fetch_page_content(url)
+    page = fetch_page(url)
+    content, error = page["text"], page["error"]
     if error:
         result["error"] = error
         if link_uid and not _skip_status_update:
@@ -320,19 +832,75 @@ def extract_from_url(
             update_link_run_status(link_uid, "erro", 0)
         return result
     
-    # 2. Constrói prompt com filtros
-    prompt = build_extraction_prompt(
-        url=url,
-        content_preview=content,
-        min_days=min_days,
-        max_value=max_value,
-    )
+    # Página não mudou (HTTP 304 ou mesmo texto limpo de antes):
+    # reaproveita a última extração deste link sem chamar a Perplexity
+    content_hash = content_fingerprint(content)
+    result["content_hash"] = content_hash
+    _notify_stage(on_stage, "fetched", {"content_hash": content_hash})
+    extraction_sig = {
+        "url": url,
+        "grupo": grupo,
+        "min_days": min_days,
+        "max_value": max_value,
+        "model_id": model_id,
+    }
+    if link_uid and (page["not_modified"] or get_bool_setting("CONTENT_HASH_SKIP", True)):
+        previous = _extraction_cache.get(link_uid)
+        if (
+            previous
+            and previous.get("sig") == extraction_sig
+            and (page["not_modified"] or previous.get("content_hash") == content_hash)
+            and _extraction_fresh(previous)
+        ):
+            # Prazos que venceram desde a extração anterior saem aqui
+            result["items"] = apply_filters(previous.get("items", []), min_days=min_days, max_value=max_value)
+            result["count"] = len(result["items"])
+            result["cached"] = True
+            _notify_stage(on_stage, "extracted", {
+                "items": result["items"],
+                "content_hash": content_hash,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached": True,
+            })
+            if not _skip_status_update:
+                update_link_run_status(link_uid, "ok", result["count"], content_hash)
+            return result
     
-    # 3. Chama Perplexity
-    items, error, token_usage = call_perplexity_extraction(
-        prompt=prompt,
-        model_id=model_id,
-    )
+    structured = page.get("structured") or {}
+    # None: nada estruturado, ou itens sem prazo (a Perplexity lê a página)
+    structured_items = select_structured(structured, min_days=min_days, max_value=max_value)
+    if structured_items is None:
+        # Trecho que vai no prompt (páginas longas: só os blocos mais relevantes)
+        preview, result["content_kept"] = select_content(content)
+
+    if structured_items is not None:
+        # 2-3. Feed/sitemap/JSON-LD/tabela: itens lidos direto, sem Perplexity
+        result["structured"] = structured.get("kind", "")
+        items = structured_items
+        error, token_usage = None, {"input_tokens": 0, "output_tokens": 0}
+    elif batcher is not None and batcher.accepts(content):
+        # 2-3. Página curta: vai junto com outras numa única chamada
+        items, error, token_usage = batcher.submit(url, link_uid, content)
+    elif result["content_kept"]["truncated"] and get_int_setting("EXTRACT_MAX_CHUNKS", 4) > 1:
+        # 2-3. Página longa: várias partes em paralelo, itens unidos sem duplicados
+        items, error, token_usage, result["content_kept"] = extract_chunked(
+            url, content, min_days=min_days, max_value=max_value, model_id=model_id,
+        )
+    else:
+        # 2. Constrói prompt com filtros
+        prompt = build_extraction_prompt(
+            url=url,
+            content_preview=preview,
+            min_days=min_days,
+            max_value=max_value,
+        )
+        
+        # 3. Chama Perplexity
+        items, error, token_usage = call_perplexity_extraction(
+            prompt=prompt,
+            model_id=model_id,
+        )
     
     # Armazena tokens usados
     result["input_tokens"] = token_usage.get("input_tokens", 0)
@@ -340,7 +908,8 @@ def extract_from_url(
     
     if error:
         result["error"] = error
-        if link_uid:
+        # Em lote (extract_from_links), o status de erro é gravado junto no final
+        if link_uid and not _skip_status_update:
             update_link_run_status(link_uid, "erro", 0)
         return result
     
@@ -365,33 +934,85 @@ def extract_from_url(
     
     result["items"] = valid_items
     result["count"] = len(valid_items)
+    _notify_stage(on_stage, "extracted", {
+        "items": valid_items,
+        "content_hash": content_hash,
+        "input_tokens": result["input_tokens"],
+        "output_tokens": result["output_tokens"],
+        "cached": False,
+    })
+    
+    if link_uid:
+        _extraction_cache.set(link_uid, {
+            "sig": extraction_sig,
+            "content_hash": content_hash,
+            "items": valid_items,
+            "extracted_at": datetime.utcnow().isoformat(),
+        })
     
     # 5. Atualiza status do link
     if link_uid and not _skip_status_update:
-        update_link_run_status(link_uid, "ok", len(valid_items))
+        update_link_run_status(link_uid, "ok", len(valid_items), content_hash)
     
     return result
 
 
+def _host_of(url: str) -> str:
+    """Retorna o host (netloc) de uma URL, usado para limitar conexões por site."""
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+
 def extract_from_links(
     links: List[Dict],
     min_days: int = 0,
     max_value: Optional[float] = None,
     model_id: str = "sonar",
     callback: Optional[callable] = None,
+    max_workers: Optional[int] = None,
+    per_host_limit: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    sink: Optional[callable] = None,
+    on_stage: Optional[callable] = None,
+    *,
+    on_progress: Optional[callable] = None,
 ) -> Dict[str, Any]:
     """
     Extrai editais de múltiplos links cadastrados.
+
+    Os links são processados em paralelo por um pool de threads limitado
+    (download + Perplexity), com no máximo 'per_host_limit' requisições
+    simultâneas para o mesmo site. Só ficam em andamento EXTRACT_QUEUE
+    links por vez (padrão: 2x o número de workers); o próximo é enviado
+    quando um termina.
     
     Args:
         links: Lista de dicts com uid, url, grupo, ativo
         min_days: Prazo mínimo em dias
         max_value: Valor máximo
         model_id: Modelo Perplexity
-        callback: Função chamada após cada link (para progresso)
+        callback: Função chamada após cada link como callback(processed, total, url)
+        max_workers: Links processados em paralelo (padrão: EXTRACT_WORKERS no .env, ou 4)
+        per_host_limit: Máximo simultâneo por host (padrão: EXTRACT_PER_HOST no .env, ou 2)
+        cancel_event: se setado, links ainda não iniciados são descartados
+            (os que já estão em andamento terminam normalmente)
+        sink: modo streaming. Chamado na thread que chamou, logo que cada link
+            termina, com {"link", "ok", "items", "status"}; quem recebe grava os
+            itens e o status do link. Nesse modo 'all_items' volta vazio e o
+            status dos links não é atualizado aqui.
+        on_stage: chamado com (link, etapa, dados) a cada etapa de cada link
+            (ver extract_from_url). Roda nas threads do pool.
+        on_progress: como 'callback', mas com um dict: processed, total, url,
+            uid, ok, input_tokens, output_tokens (acumulados). Usado pelos jobs.
     
     Returns:
-        Dict com: all_items, stats_by_group, errors, total_input_tokens, total_output_tokens
+        Dict com: all_items, stats_by_group, errors, total_input_tokens, total_output_tokens,
+        cancelled, batch_stats (lotes enviados, páginas em lote, fallbacks),
+        content_kept ({uid ou url: quanto do texto da página foi para o prompt}),
+        structured_hits (links lidos de feed/sitemap/JSON-LD/tabela, sem Perplexity),
+        llm_cache (acertos/erros do cache de respostas e tokens economizados)
     """
     
     results = {
@@ -402,7 +1023,13 @@ def extract_from_links(
         "total": len(links),
         "total_input_tokens": 0,
         "total_output_tokens": 0,
+        "cache_hits": 0,
+        "structured_hits": 0,
+        "cancelled": False,
+        "content_kept": {},
     }
+    # Contadores do cache de respostas desta coleta (vale para as threads do pool)
+    results["llm_cache"] = llm_cache.start_run_stats()
     
     active_links = [l for l in links if l.get("ativo", "true") == "true"]
     results["total"] = len(active_links)
@@ -411,22 +1038,62 @@ def extract_from_links(
     pending_status_updates: list = []
     from datetime import datetime as _dt
     now_iso = _dt.utcnow().isoformat()
-    
-    for i, link in enumerate(active_links):
+
+    workers = max(1, max_workers or get_int_setting("EXTRACT_WORKERS", 4))
+    per_host = max(1, per_host_limit or get_int_setting("EXTRACT_PER_HOST", 2))
+
+    # Semáforo por host: evita martelar o mesmo site com várias conexões
+    host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    host_slots_lock = threading.Lock()
+
+    def _slot_for(url: str) -> threading.BoundedSemaphore:
+        host = _host_of(url)
+        with host_slots_lock:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(per_host)
+            return host_slots[host]
+
+    # Lote de páginas curtas por chamada (só faz sentido com links em paralelo)
+    batch_pages = min(get_int_setting("EXTRACT_BATCH_PAGES", 4), workers)
+    batcher = None
+    if batch_pages > 1:
+        batcher = _ExtractionBatcher(
+            max_pages=batch_pages,
+            max_chars=get_int_setting("EXTRACT_BATCH_MAX_CHARS", 2000),
+            wait_s=max(0, get_int_setting("EXTRACT_BATCH_WAIT_MS", 2000)) / 1000.0,
+            model_id=model_id,
+            min_days=min_days,
+            max_value=max_value,
+        )
+
+    def _run_link(link: Dict) -> Dict[str, Any]:
         url = link.get("url", "")
-        grupo = link.get("grupo", "")
-        uid = link.get("uid", "")
-        
-        try:
-            extracted = extract_from_url(
+        with _slot_for(url):
+            return extract_from_url(
                 url=url,
-                grupo=grupo,
-                link_uid=uid,
+                grupo=link.get("grupo", ""),
+                link_uid=link.get("uid", ""),
                 min_days=min_days,
                 max_value=max_value,
                 model_id=model_id,
                 _skip_status_update=True,  # Acumula, não atualiza individual
+                on_stage=(lambda stage, info: on_stage(link, stage, info)) if on_stage else None,
+                batcher=batcher,
             )
+
+    # Itens guardados por posição do link para manter a ordem de saída estável
+    items_by_pos: Dict[int, List[Dict]] = {}
+
+    def _handle(fut, pos: int, link: Dict) -> None:
+        url = link.get("url", "")
+        link_ok = False
+        grupo = link.get("grupo", "")
+        uid = link.get("uid", "")
+        link_items: List[Dict] = []
+        status: Optional[Dict[str, Any]] = None
+
+        try:
+            extracted = fut.result()
             
             # Acumula tokens
             results["total_input_tokens"] += extracted.get("input_tokens", 0)
@@ -442,14 +1109,21 @@ def extract_from_links(
                 })
                 # Acumula status de erro
                 if uid:
-                    pending_status_updates.append({
+                    status = {
                         "uid": uid,
                         "status": "erro",
                         "items_count": 0,
                         "last_run": now_iso,
-                    })
+                    }
             else:
-                results["all_items"].extend(extracted.get("items", []))
+                link_ok = True
+                link_items = extracted.get("items", [])
+                if extracted.get("content_kept"):
+                    results["content_kept"][uid or url] = extracted["content_kept"]
+                if extracted.get("cached"):
+                    results["cache_hits"] += 1
+                if extracted.get("structured"):
+                    results["structured_hits"] += 1
                 
                 # Estatísticas por grupo
                 if grupo not in results["stats_by_group"]:
@@ -461,12 +1135,13 @@ def extract_from_links(
                 
                 # Acumula status de sucesso
                 if uid:
-                    pending_status_updates.append({
+                    status = {
                         "uid": uid,
                         "status": "ok",
                         "items_count": extracted.get("count", 0),
                         "last_run": now_iso,
-                    })
+                        "content_hash": extracted.get("content_hash", ""),
+                    }
             
         except Exception as e:
             push_error("extract_from_links", e)
@@ -476,21 +1151,81 @@ def extract_from_links(
                 "error": str(e),
             })
             if uid:
-                pending_status_updates.append({
+                status = {
                     "uid": uid,
                     "status": "erro",
                     "items_count": 0,
                     "last_run": now_iso,
-                })
+                }
+
+        if sink is not None:
+            try:
+                sink({"link": link, "ok": link_ok, "items": link_items, "status": status})
+            except Exception as e:
+                push_error("extract_from_links.sink", e)
+        else:
+            if link_items:
+                items_by_pos[pos] = link_items
+            if status:
+                pending_status_updates.append(status)
         
-        results["processed"] = i + 1
+        results["processed"] += 1
         
-        # Callback para progresso
+        # Callback para progresso (sempre na thread que chamou)
         if callback:
             try:
                 callback(results["processed"], results["total"], url)
-            except:
-                pass
+            except Exception as e:
+                push_error("extract_from_links.callback", e)
+        if on_progress:
+            try:
+                on_progress({
+                    "processed": results["processed"],
+                    "total": results["total"],
+                    "url": url,
+                    "uid": uid,
+                    "ok": link_ok,
+                    "input_tokens": results["total_input_tokens"],
+                    "output_tokens": results["total_output_tokens"],
+                })
+            except Exception as e:
+                push_error("extract_from_links.on_progress", e)
+
+    max_in_flight = max(workers, get_int_setting("EXTRACT_QUEUE", workers * 2))
+    queue = iter(enumerate(active_links))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures: Dict[Any, Tuple[int, Dict]] = {}
+
+        def _submit_more() -> None:
+            while len(futures) < max_in_flight:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                nxt = next(queue, None)
+                if nxt is None:
+                    return
+                # copy_context: erros das threads caem no Error Bus da requisição
+                fut = pool.submit(contextvars.copy_context().run, _run_link, nxt[1])
+                futures[fut] = nxt
+
+        _submit_more()
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for fut in done:
+                pos, link = futures.pop(fut)
+                _handle(fut, pos, link)
+            if cancel_event is not None and cancel_event.is_set():
+                results["cancelled"] = True
+                # Descarta os que ainda não começaram
+                for pending in list(futures):
+                    if pending.cancel():
+                        futures.pop(pending)
+            _submit_more()
+
+    for pos in sorted(items_by_pos):
+        results["all_items"].extend(items_by_pos[pos])
+    if batcher is not None:
+        results["batch_stats"] = dict(batcher.stats)
     
     # 💾 Batch update no Google Sheets: UMA única chamada para todos os links
     # (evita N x get_all_values + N x 3 x update_cell que causa erro 429)
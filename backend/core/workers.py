@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de threads gerenciado para tirar trabalho bloqueante do event loop.
+
+Os endpoints são `async def`, mas Sheets (gspread), Perplexity e downloads
+são síncronos. Chamá-los direto congela o worker do uvicorn inteiro: uma
+coleta universal travava até o /api/items dos outros usuários.
+
+Uso nos endpoints:
+    data = await run_blocking("items_read", get_items_for_group, group)
+
+- Todas as chamadas rodam num único ThreadPoolExecutor (API_WORKERS, padrão 16).
+- Cada "faixa" (lane) tem um limite próprio de chamadas simultâneas; quem
+  passa do limite espera na fila da faixa, sem ocupar thread do pool.
+- O contexto da requisição (ex.: Error Bus) é copiado para a thread.
+
+Limites opcionais (.env): API_LIMIT_<FAIXA>, ex.: API_LIMIT_COLLECT=1
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .config import get_int_setting
+
+# Chamadas simultâneas por faixa
+LANE_DEFAULTS: Dict[str, int] = {
+    "collect": 1,        # coletas (providers e universal)
+    "perplexity": 4,     # chamadas avulsas à Perplexity / contagem de tokens
+    "items_read": 8,     # leitura de itens (base local)
+    "items_write": 4,    # atualização / exclusão de itens
+    "sheets": 4,         # links, config, diagnóstico (leitura/escrita na planilha)
+    "auth": 4,           # login (download da base de usuários)
+    "jobs": 4,           # estado dos jobs de coleta (arquivos em data/jobs/)
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_lanes: Dict[str, asyncio.Semaphore] = {}
+_lane_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, get_int_setting("API_WORKERS", 16)),
+                    thread_name_prefix="api-worker",
+                )
+    return _executor
+
+
+def lane_limit(lane: str) -> int:
+    """Limite de chamadas simultâneas da faixa (padrão ou API_LIMIT_<FAIXA>)."""
+    return max(1, get_int_setting(f"API_LIMIT_{lane.upper()}", LANE_DEFAULTS.get(lane, 4)))
+
+
+def _get_lane(lane: str) -> asyncio.Semaphore:
+    sem = _lanes.get(lane)
+    if sem is None:
+        sem = _lanes[lane] = asyncio.Semaphore(lane_limit(lane))
+        _lane_stats[lane] = {"running": 0, "waiting": 0, "done": 0}
+    return sem
+
+
+async def run_blocking(lane: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Executa fn(*args, **kwargs) no pool, respeitando o limite da faixa.
+    Exceções de fn são propagadas normalmente para o endpoint.
+    """
+    sem = _get_lane(lane)
+    stats = _lane_stats[lane]
+    stats["waiting"] += 1
+    async with sem:
+        stats["waiting"] -= 1
+        stats["running"] += 1
+        try:
+            ctx = contextvars.copy_context()
+            call = functools.partial(ctx.run, fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+        finally:
+            stats["running"] -= 1
+            stats["done"] += 1
+
+
+def get_worker_status() -> Dict[str, Any]:
+    """Ocupação de cada faixa (para diagnóstico)."""
+    return {
+        lane: {"limit": lane_limit(lane), **_lane_stats.get(lane, {"running": 0, "waiting": 0, "done": 0})}
+        for lane in sorted(set(LANE_DEFAULTS) | set(_lanes))
+    }
+
+
+def shutdown_workers() -> None:
+    """Encerra o pool (chamado no shutdown da aplicação)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da limpeza de HTML da coleta universal: bs4 (original) x lxml x selectolax.
+
+Usa um corpus de páginas reais salvas em disco (um .html por página) e mede,
+para cada implementação, o tempo de CPU por página e se o texto gerado é
+equivalente ao da bs4 (idêntico, ou % de palavras em comum na mesma ordem).
+
+Uso:
+    # 1) salva as páginas no corpus (uma vez)
+    python bench_clean.py --fetch https://www.gov.br/... https://www.worldbank.org/...
+    python bench_clean.py --fetch-file urls.txt
+
+    # 2) compara
+    python bench_clean.py [--corpus data/html_corpus] [--repeat 3]
+"""
+import sys, os, time, argparse, hashlib, difflib
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.core import html_clean
+from backend.core.config import get_data_dir
+
+
+def _save_pages(urls, corpus):
+    from backend.core import http_client
+
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        try:
+            resp = http_client.fetch_url(url, timeout=30)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"ERRO  {url}: {e}")
+            continue
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        with open(os.path.join(corpus, name), "w", encoding="utf-8") as f:
+            f.write(f"<!-- {url} -->\n" + (resp.text or ""))
+        print(f"ok    {url} -> {name} ({len(resp.text or '') // 1024} KB)")
+    http_client.close_fetcher()
+
+
+def _similarity(a, b):
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", default=str(get_data_dir() / "html_corpus"))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--fetch", nargs="*", default=[], help="URLs a baixar para o corpus")
+    ap.add_argument("--fetch-file", help="arquivo com uma URL por linha")
+    args = ap.parse_args()
+
+    urls = list(args.fetch)
+    if args.fetch_file:
+        with open(args.fetch_file, encoding="utf-8") as f:
+            urls += [l.strip() for l in f if l.strip() and not l.startswith("#")]
+    if urls:
+        _save_pages(urls, args.corpus)
+        return
+
+    files = sorted(
+        os.path.join(args.corpus, n) for n in os.listdir(args.corpus) if n.endswith(".html")
+    ) if os.path.isdir(args.corpus) else []
+    if not files:
+        print(f"Corpus vazio em {args.corpus}. Salve páginas com --fetch URL ...")
+        return
+    pages = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    total_kb = sum(len(p[1]) for p in pages) // 1024
+    print(f"{len(pages)} páginas ({total_kb} KB), {args.repeat} repetições\n")
+
+    backends = [n for n in html_clean.BACKENDS if html_clean._installed(n)]
+    reference = {name: html_clean.clean_bs4(raw) for name, raw in pages}
+
+    base = None
+    for backend in ["bs4"] + [b for b in backends if b != "bs4"]:
+        fn = html_clean.BACKENDS[backend]
+        t0 = time.process_time()
+        for _ in range(args.repeat):
+            outputs = {name: fn(raw) for name, raw in pages}
+        dt = (time.process_time() - t0) / args.repeat
+        base = base or dt
+        sims = [_similarity(reference[n], outputs[n]) for n, _ in pages]
+        identical = sum(1 for s in sims if s == 1.0)
+        print(f"{backend:<11} {dt * 1000 / len(pages):8.1f} ms/pág  {base / dt:5.1f}x  "
+              f"texto idêntico {identical}/{len(pages)}  similaridade mín {min(sims):.3f}")
+
+        worst = sorted(zip(sims, (n for n, _ in pages)))[:3]
+        for sim, name in worst:
+            if sim < 0.98:
+                print(f"    {name}: similaridade {sim:.3f} "
+                      f"({len(reference[name])} x {len(outputs[name])} caracteres)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do download de páginas: requests.get avulso x pool compartilhado.
+
+Sobe um servidor HTTP local (stand-in dos sites cadastrados) que simula o
+custo do handshake TCP+TLS com um atraso em cada conexão NOVA, e mede:
+
+1. requests.get sem sessão (comportamento antigo)  -> 1 conexão por página
+2. http_client.fetch_url sequencial (pool keep-alive)
+3. http_client.fetch_many concorrente (pool + limite por host)
+
+Uso:
+    python bench_fetch.py [--pages 60] [--hosts 3] [--handshake-ms 80]
+"""
+import sys, os, time, argparse, threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from backend.core import http_client
+
+BODY = ("<html><body><main>" + "<p>Edital de teste com prazo 2026-12-31.</p>" * 200
+        + "</main></body></html>").encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    handshake_s = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        # Conexão nova: simula o custo de TCP + TLS
+        with _Handler.lock:
+            _Handler.connections += 1
+        time.sleep(_Handler.handshake_s)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_servers(n_hosts):
+    servers = []
+    for _ in range(n_hosts):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        srv.daemon_threads = True
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+    return servers
+
+
+def _run(label, fn, urls):
+    _Handler.connections = 0
+    t0 = time.perf_counter()
+    fn(urls)
+    dt = time.perf_counter() - t0
+    print(f"{label:<38} {dt:8.3f}s  {_Handler.connections:4d} conexões  "
+          f"{len(urls) / dt:8.1f} pág/s")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=60)
+    ap.add_argument("--hosts", type=int, default=3)
+    ap.add_argument("--handshake-ms", type=float, default=80.0)
+    args = ap.parse_args()
+
+    _Handler.handshake_s = args.handshake_ms / 1000.0
+    servers = _start_servers(args.hosts)
+    urls = [
+        f"http://127.0.0.1:{servers[i % len(servers)].server_address[1]}/pagina/{i}"
+        for i in range(args.pages)
+    ]
+
+    print(f"{args.pages} páginas em {args.hosts} host(s), handshake simulado de "
+          f"{args.handshake_ms:.0f} ms\n")
+
+    def old_requests(us):
+        for u in us:
+            requests.get(u, timeout=30).raise_for_status()
+
+    def pooled_sequential(us):
+        for u in us:
+            http_client.fetch_url(u).raise_for_status()
+
+    def pooled_concurrent(us):
+        for r in http_client.fetch_many(us):
+            if isinstance(r, Exception):
+                raise r
+            r.raise_for_status()
+
+    backend = type(http_client.get_fetcher()).__name__
+    base = _run("requests.get (sem sessão)", old_requests, urls)
+    seq = _run(f"fetch_url sequencial ({backend})", pooled_sequential, urls)
+    http_client.close_fetcher()
+    http_client.get_fetcher()
+    conc = _run(f"fetch_many concorrente ({backend})", pooled_concurrent, urls)
+
+    print(f"\nGanho sequencial: {base / seq:.1f}x   Ganho concorrente: {base / conc:.1f}x")
+    http_client.close_fetcher()
+    for srv in servers:
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,11 @@ const state = {
     outputTokens: 0,
     costUsd: 0,
     costBrl: 0,
+    // Cache de respostas da Perplexity (backend/core/llm_cache.py)
+    cacheHits: 0,
+    cacheMisses: 0,
+    tokensSaved: 0,
+    savedBrl: 0,
   },
 };
 
@@ -63,12 +68,17 @@ function updateCostTracker(costData) {
   state.sessionCost.outputTokens += costData.output_tokens || 0;
   state.sessionCost.costUsd += costData.cost_usd || 0;
   state.sessionCost.costBrl += costData.cost_brl || 0;
+  state.sessionCost.cacheHits += costData.cache_hits || 0;
+  state.sessionCost.cacheMisses += costData.cache_misses || 0;
+  state.sessionCost.tokensSaved += costData.tokens_saved || 0;
+  state.sessionCost.savedBrl += costData.saved_brl || 0;
 
   // Atualiza elementos da UI
   const tracker = document.getElementById("cost-tracker");
   const costBrl = document.getElementById("cost-brl");
   const costUsd = document.getElementById("cost-usd");
   const tokensCount = document.getElementById("cost-tokens-count");
+  const cacheInfo = document.getElementById("cost-cache");
 
   if (tracker) {
     tracker.classList.remove("hidden");
@@ -88,6 +98,15 @@ function updateCostTracker(costData) {
     const total = state.sessionCost.inputTokens + state.sessionCost.outputTokens;
     tokensCount.textContent = total.toLocaleString('pt-BR');
   }
+
+  if (cacheInfo) {
+    const { cacheHits, cacheMisses, tokensSaved, savedBrl } = state.sessionCost;
+    const calls = cacheHits + cacheMisses;
+    cacheInfo.classList.toggle("hidden", calls === 0);
+    cacheInfo.textContent = `♻️ cache: ${cacheHits} de ${calls} chamada(s) | ` +
+      `${tokensSaved.toLocaleString('pt-BR')} tokens economizados ` +
+      `(R$ ${savedBrl.toFixed(4).replace('.', ',')})`;
+  }
 }
 
 // Mostra custo parcial (durante a coleta, antes de terminar)
@@ -202,6 +221,9 @@ function saveOneClickPresets(presets) {
 
 // flags de controle de long running tasks
 let collectCancelRequested = false;
+let currentCollectJobId = null;
+// Custo já somado ao rastreador por job (nesta sessão), para retomadas não contarem de novo
+const countedCollectCost = {};
 let diagAbortController = null;
 let diagWindow = null;
 
@@ -226,7 +248,10 @@ async function apiPost(path, body, options = {}) {
     signal: options.signal,
   });
   if (!resp.ok) {
-    throw new Error(`POST ${path} -> ${resp.status}`);
+    const err = new Error(`POST ${path} -> ${resp.status}`);
+    err.status = resp.status;
+    err.detail = await resp.json().then((d) => d.detail).catch(() => null);
+    throw err;
   }
   return await resp.json();
 }
@@ -444,7 +469,11 @@ async function renderGroups() {
   }
 }
 
-// Carrega itens de um grupo e desenha cards
+// Tamanho da página de itens e campos pedidos ao backend
+const ITEMS_PAGE_SIZE = 200;
+const ITEM_FIELDS = "uid,title,link,agency,region,deadline_iso,status,notes,seen,do_not_show";
+
+// Carrega itens de um grupo (paginado) e desenha cards
 async function loadGroupItems(group, statusFilter) {
   const bodyDiv = document.querySelector(
     `[data-group-body="${CSS.escape(group)}"]`
@@ -456,12 +485,13 @@ async function loadGroupItems(group, statusFilter) {
   if (statusFilter && statusFilter !== "Todos") {
     params.set("status", statusFilter);
   }
+  params.set("limit", String(ITEMS_PAGE_SIZE));
+  params.set("fields", ITEM_FIELDS);
 
   try {
     const data = await apiGet(`/api/items?${params.toString()}`);
     const itemsData = data.items;
     renderErrors(data.errors);
-    const sources = itemsData.sources || [];
     const total = itemsData.items_count || 0;
 
     if (total === 0) {
@@ -486,18 +516,30 @@ async function loadGroupItems(group, statusFilter) {
       return isNaN(n) ? null : n;
     };
 
+    // Botão "Carregar mais" (fica sempre no fim da lista)
+    const moreDiv = document.createElement("div");
+    moreDiv.className = "items-more";
+    bodyDiv.appendChild(moreDiv);
+
+    const renderSources = (sources) => {
     for (const src of sources) {
-      const sDiv = document.createElement("div");
-      sDiv.className = "source-card";
-      const rawItems = src.items || [];
-      const filtered = rawItems; // NÃO filtra aqui; só na UI
-      const count = filtered.length;
-      sDiv.innerHTML = `
-        <div class="source-header">
-          <strong>${src.source}</strong> — ${count} itens
-        </div>
-        <div class="source-body"></div>
-      `;
+      // Uma fonte pode continuar na página seguinte: reaproveita o card dela
+      let sDiv = bodyDiv.querySelector(
+        `.source-card[data-source="${CSS.escape(src.source)}"]`
+      );
+      if (!sDiv) {
+        sDiv = document.createElement("div");
+        sDiv.className = "source-card";
+        sDiv.dataset.source = src.source;
+        sDiv.innerHTML = `
+          <div class="source-header">
+            <strong>${src.source}</strong> — <span class="source-count">0</span> itens
+          </div>
+          <div class="source-body"></div>
+        `;
+        bodyDiv.insertBefore(sDiv, moreDiv);
+      }
+      const filtered = src.items || []; // NÃO filtra aqui; só na UI
       const sb = sDiv.querySelector(".source-body");
       for (const it of filtered) {
         const card = document.createElement("div");
@@ -621,10 +663,39 @@ async function loadGroupItems(group, statusFilter) {
           });
         }
       }
-      bodyDiv.appendChild(sDiv);
+      const countEl = sDiv.querySelector(".source-count");
+      if (countEl) countEl.textContent = sb.querySelectorAll(".item-card").length;
     }
     // aplica filtros atuais nos itens recém-renderizados
     filterVisibleItems();
+    };
+
+    const renderMore = (nextOffset) => {
+      moreDiv.innerHTML = "";
+      if (nextOffset === null || nextOffset === undefined) return;
+      const shown = bodyDiv.querySelectorAll(".item-card").length;
+      const btn = document.createElement("button");
+      btn.textContent = `Carregar mais (${shown} de ${total})`;
+      btn.addEventListener("click", async () => {
+        btn.disabled = true;
+        btn.textContent = "Carregando...";
+        try {
+          params.set("cursor", String(nextOffset));
+          const page = await apiGet(`/api/items?${params.toString()}`);
+          renderErrors(page.errors);
+          renderSources(page.items.sources || []);
+          renderMore(page.items.next_offset);
+        } catch (err) {
+          btn.disabled = false;
+          btn.textContent = "Carregar mais";
+          alert("Erro ao carregar mais itens: " + err);
+        }
+      });
+      moreDiv.appendChild(btn);
+    };
+
+    renderSources(itemsData.sources || []);
+    renderMore(itemsData.next_offset);
 
   } catch (e) {
     bodyDiv.innerHTML = `<span style="color:#f88">Erro ao carregar itens: ${e}</span>`;
@@ -843,138 +914,111 @@ async function handleRunCollect() {
   resultDiv.innerHTML = "";
   btn.disabled = true;
 
-  setManageInteractivity(true);
   // Lê o limite de links do seletor (0 = todos)
   const maxLinks = parseInt(document.getElementById("links-limit")?.value || "0", 10);
-  const effectiveCount = (maxLinks > 0 && maxLinks < eligibleLinks.length) ? maxLinks : eligibleLinks.length;
-
-  if (progressOverlay && progressBar && progressLabel) {
-    progressOverlay.classList.remove("hidden");
-    progressBar.max = 100;
-    progressBar.value = 0;
-    progressLabel.textContent = `Iniciando coleta de ${effectiveCount} link(s) em ${selectedGroups.length} grupo(s)…`;
-  }
 
-  let totalExtracted = 0;
-  const summaryLines = [];
+  // Obtém valor máximo do filtro, se configurado
+  const maxValue = state.valueMax || null;
 
   try {
-    if (progressLabel) {
-      progressLabel.textContent = `🤖 Processando ${effectiveCount} link(s) via IA…`;
-    }
-    if (progressBar) {
-      progressBar.value = 10;
+    // A coleta roda em segundo plano no servidor; aqui só criamos o job
+    let data;
+    try {
+      data = await apiPost("/api/collect/universal", {
+        min_days: state.minDays,
+        max_value: maxValue,
+        model_id: "sonar", // Modelo mais barato e rápido
+        groups: selectedGroups, // Filtra pelos grupos selecionados
+        max_links: maxLinks,    // 0 = todos; >0 = limita a N links
+        skip_already_run: true,
+      });
+    } catch (e) {
+      // 409: já há uma coleta rodando (outra aba/usuário); passa a acompanhá-la
+      if (e.status === 409 && e.detail && e.detail.job) {
+        await followCollectJob(e.detail.job);
+        return;
+      }
+      throw e;
     }
+    renderErrors(data.errors);
+    await followCollectJob(data.job);
+  } catch (e) {
+    btn.disabled = false;
+    resultDiv.innerHTML = `
+      <div style="padding:20px;background:rgba(239,71,111,0.2);border-radius:8px;border:1px solid rgba(239,71,111,0.4);">
+        <strong>❌ Erro na coleta:</strong><br/><br/>
+        ${e.message || e}
+      </div>
+    `;
+  }
+}
 
-    // Obtém valor máximo do filtro, se configurado
-    const maxValue = state.valueMax || null;
+// ---------- Jobs de coleta (execução em segundo plano no servidor) ----------
 
-    const data = await apiPost("/api/collect/universal", {
-      min_days: state.minDays,
-      max_value: maxValue,
-      model_id: "sonar", // Modelo mais barato e rápido
-      groups: selectedGroups, // Filtra pelos grupos selecionados
-      max_links: maxLinks,    // 0 = todos; >0 = limita a N links
-      skip_already_run: true,
+const COLLECT_ACTIVE_STATES = ["queued", "running", "cancelling"];
+
+// Acompanha o job via SSE; resolve com o job final (evento "done")
+function watchCollectJob(jobId, onProgress) {
+  return new Promise((resolve, reject) => {
+    const es = new EventSource(`/api/collect/jobs/${encodeURIComponent(jobId)}/events`);
+    es.addEventListener("progress", (ev) => onProgress(JSON.parse(ev.data)));
+    es.addEventListener("done", (ev) => {
+      es.close();
+      resolve(JSON.parse(ev.data));
     });
+    es.onerror = () => {
+      // O EventSource reconecta sozinho; só desiste se a conexão foi encerrada
+      if (es.readyState === EventSource.CLOSED) {
+        reject(new Error("Conexão com o progresso da coleta perdida."));
+      }
+    };
+  });
+}
 
-    if (progressBar) {
-      progressBar.value = 90;
-    }
+// Mostra progresso do job até terminar e depois o resultado
+async function followCollectJob(job) {
+  const btn = document.getElementById("btn-run-collect");
+  const resultDiv = document.getElementById("collect-result");
+  const progressOverlay = document.getElementById("collect-progress");
+  const progressBar = document.getElementById("collect-progress-bar");
+  const progressLabel = document.getElementById("collect-progress-label");
+  if (!resultDiv) return;
 
-    const res = data.result || {};
-    renderErrors(data.errors);
+  currentCollectJobId = job.id;
+  if (btn) btn.disabled = true;
+  setManageInteractivity(true);
 
-    // Atualiza contador de custo
-    if (res.cost) {
-      updateCostTracker(res.cost);
+  const showProgress = (j) => {
+    const p = j.progress || {};
+    const total = p.total || 0;
+    const processed = p.processed || 0;
+    if (progressBar) {
+      progressBar.value = total ? Math.round((processed / total) * 100) : 0;
     }
-
-    totalExtracted = res.items_saved || res.all_items?.length || 0;
-
-    // Estatísticas por grupo
-    const successLines = [];
-    const errorLines = [];
-
-    if (res.stats_by_group) {
-      for (const [grupo, stats] of Object.entries(res.stats_by_group)) {
-        successLines.push({
-          type: 'success',
-          text: `<strong>${grupo}</strong>: ${stats.total} editais de ${stats.links} link(s)`
-        });
-      }
+    if (progressLabel) {
+      const tokens = (p.input_tokens || 0) + (p.output_tokens || 0);
+      const current = p.current_url ? ` — ${p.current_url}` : "";
+      progressLabel.textContent = j.state === "cancelling"
+        ? `Cancelando… aguardando os links em andamento (${processed}/${total}).`
+        : `🤖 ${processed} de ${total} link(s) processados via IA • ${tokens.toLocaleString("pt-BR")} tokens${current}`;
     }
+  };
 
-    // Erros específicos
-    if (res.errors && res.errors.length > 0) {
-      for (const err of res.errors) {
-        const shortUrl = err.url.length > 50 ? err.url.substring(0, 50) + "…" : err.url;
-        errorLines.push({
-          type: 'error',
-          text: `❌ ${shortUrl}: ${err.error}`
-        });
-      }
-    }
+  if (progressOverlay && progressBar && progressLabel) {
+    progressOverlay.classList.remove("hidden");
+    progressBar.max = 100;
+    showProgress(job);
+  }
 
+  try {
+    // Só soma o custo ao rastreador se o job terminou enquanto esta página acompanhava
+    const watched = COLLECT_ACTIVE_STATES.includes(job.state);
+    const finalJob = watched ? await watchCollectJob(job.id, showProgress) : job;
     if (progressBar) {
       progressBar.value = 100;
     }
-
-    // Recarrega links para atualizar status
-    await loadLinks();
-
-    // Monta resultado
-    const cancelou = collectCancelRequested;
-    const headerLine = cancelou
-      ? "⚠️ Coleta cancelada."
-      : "✅ Coleta concluída!";
-
-    // Monta custo formatado
-    const costInfo = res.cost ? `
-      <div style="margin-top:12px;padding-top:12px;border-top:1px solid rgba(255,255,255,0.1);">
-        💰 <strong>Custo desta coleta:</strong> R$ ${res.cost.cost_brl.toFixed(4).replace('.', ',')} 
-        <span style="color:#888;">(${res.cost.total_tokens.toLocaleString('pt-BR')} tokens)</span>
-      </div>
-    ` : '';
-
-    const skippedAlreadyRun = res.skipped_already_run || 0;
-
-    let resultHtml = `
-      <div style="padding:20px;background:rgba(6,214,160,0.15);border-radius:8px;border:1px solid rgba(6,214,160,0.3);margin-bottom:16px;">
-        <strong style="font-size:1.1rem;">${headerLine}</strong><br/><br/>
-        📊 <strong>Editais extraídos:</strong> ${totalExtracted}<br/>
-        🔗 <strong>Links processados:</strong> ${res.processed || effectiveCount} de ${res.total || effectiveCount}
-        ${skippedAlreadyRun > 0 ? `<br/>⏭️ <strong>Links pulados (já executados):</strong> ${skippedAlreadyRun}` : ""}
-        ${costInfo}
-      </div>
-    `;
-
-    // Renderiza cards dismissíveis
-    const allCards = [...successLines, ...errorLines];
-    if (allCards.length > 0) {
-      resultHtml += `
-        <div id="collect-details-container" style="padding:16px;background:rgba(255,255,255,0.05);border-radius:8px;">
-          <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:12px;">
-            <strong>📋 Detalhes por grupo:</strong>
-            <button onclick="clearAllCollectCards()" style="background:rgba(239,71,111,0.2);border:1px solid rgba(239,71,111,0.4);color:#EF476F;padding:4px 12px;border-radius:4px;cursor:pointer;font-size:0.85rem;">
-              ✕ Limpar Todos
-            </button>
-          </div>
-          <div id="collect-cards-list">
-            ${allCards.map((card, idx) => `
-              <div class="collect-card ${card.type}" id="collect-card-${idx}" style="display:flex;justify-content:space-between;align-items:center;padding:8px 12px;margin-bottom:6px;border-radius:4px;${card.type === 'error' ? 'background:rgba(239,71,111,0.1);border:1px solid rgba(239,71,111,0.3);' : 'background:rgba(6,214,160,0.1);border:1px solid rgba(6,214,160,0.3);'}">
-                <span style="${card.type === 'error' ? 'color:#EF476F;' : ''}">${card.text}</span>
-                <button onclick="dismissCollectCard(${idx})" style="background:transparent;border:none;color:${card.type === 'error' ? '#EF476F' : '#06D6A0'};cursor:pointer;font-size:1.2rem;padding:0 4px;opacity:0.7;" onmouseover="this.style.opacity='1'" onmouseout="this.style.opacity='0.7'">✕</button>
-              </div>
-            `).join('')}
-          </div>
-        </div>
-      `;
-    }
-
-    resultDiv.innerHTML = resultHtml;
-
-    await renderGroups();
+    renderErrors(finalJob.errors);
+    await renderCollectResult(finalJob, { countCost: watched });
   } catch (e) {
     resultDiv.innerHTML = `
       <div style="padding:20px;background:rgba(239,71,111,0.2);border-radius:8px;border:1px solid rgba(239,71,111,0.4);">
@@ -983,7 +1027,8 @@ async function handleRunCollect() {
       </div>
     `;
   } finally {
-    btn.disabled = false;
+    currentCollectJobId = null;
+    if (btn) btn.disabled = false;
     setManageInteractivity(false);
     if (progressOverlay) {
       progressOverlay.classList.add("hidden");
@@ -991,6 +1036,155 @@ async function handleRunCollect() {
   }
 }
 
+// Retoma um job interrompido/cancelado (só os links pendentes)
+async function resumeCollectJob(jobId) {
+  try {
+    const data = await apiPost(`/api/collect/jobs/${encodeURIComponent(jobId)}/resume`, {});
+    await followCollectJob(data.job);
+  } catch (e) {
+    if (e.status === 409 && e.detail && e.detail.job) {
+      await followCollectJob(e.detail.job);
+      return;
+    }
+    alert("Erro ao retomar coleta: " + e);
+  }
+}
+
+// Ao abrir a página: reconecta a uma coleta em andamento ou oferece retomar
+async function checkPendingCollectJob() {
+  try {
+    const data = await apiGet("/api/collect/jobs?limit=1");
+    const job = (data.jobs || [])[0];
+    if (!job) return;
+    if (COLLECT_ACTIVE_STATES.includes(job.state)) {
+      await followCollectJob(job);
+    } else if (job.state === "interrupted" && job.resumable) {
+      await renderCollectResult(job);
+    }
+  } catch (e) {
+    console.warn("Não foi possível consultar coletas pendentes:", e);
+  }
+}
+
+// Soma ao rastreador só a parte do custo do job ainda não contada nesta sessão
+// (o resultado de um job retomado acumula os tokens das execuções anteriores)
+function addCollectJobCost(jobId, cost) {
+  const counted = countedCollectCost[jobId] || {};
+  const delta = {};
+  for (const key of ["input_tokens", "output_tokens", "cost_usd", "cost_brl",
+    "cache_hits", "cache_misses", "tokens_saved", "saved_brl"]) {
+    delta[key] = Math.max(0, (cost[key] || 0) - (counted[key] || 0));
+  }
+  countedCollectCost[jobId] = { ...cost };
+  updateCostTracker(delta);
+}
+
+// Monta o resumo de um job de coleta terminado.
+// countCost: só quando o job terminou nesta sessão (evita contar de novo ao
+// reabrir a página e mostrar um job antigo)
+async function renderCollectResult(job, { countCost = false } = {}) {
+  const resultDiv = document.getElementById("collect-result");
+  if (!resultDiv) return;
+  const res = job.result || {};
+
+  // Atualiza contador de custo
+  if (res.cost && countCost) {
+    addCollectJobCost(job.id, res.cost);
+  }
+
+  const totalExtracted = res.items_saved || res.items_found || 0;
+
+  // Estatísticas por grupo
+  const successLines = [];
+  const errorLines = [];
+
+  if (res.stats_by_group) {
+    for (const [grupo, stats] of Object.entries(res.stats_by_group)) {
+      successLines.push({
+        type: 'success',
+        text: `<strong>${grupo}</strong>: ${stats.total} editais de ${stats.links} link(s)`
+      });
+    }
+  }
+
+  // Erros específicos
+  if (res.errors && res.errors.length > 0) {
+    for (const err of res.errors) {
+      const shortUrl = err.url.length > 50 ? err.url.substring(0, 50) + "…" : err.url;
+      errorLines.push({
+        type: 'error',
+        text: `❌ ${shortUrl}: ${err.error}`
+      });
+    }
+  }
+
+  // Recarrega links para atualizar status
+  await loadLinks();
+
+  // Monta resultado
+  const headerByState = {
+    cancelled: "⚠️ Coleta cancelada.",
+    interrupted: "⚠️ Coleta interrompida (o servidor foi reiniciado).",
+    error: "❌ Coleta interrompida por erro.",
+  };
+  const headerLine = headerByState[job.state] || "✅ Coleta concluída!";
+
+  // Monta custo formatado
+  const costInfo = res.cost ? `
+    <div style="margin-top:12px;padding-top:12px;border-top:1px solid rgba(255,255,255,0.1);">
+      💰 <strong>Custo desta coleta:</strong> R$ ${res.cost.cost_brl.toFixed(4).replace('.', ',')} 
+      <span style="color:#888;">(${res.cost.total_tokens.toLocaleString('pt-BR')} tokens)</span>
+      ${res.cost.cache_hits ? `<br/><span style="color:#888;">♻️ ${res.cost.cache_hits} resposta(s) do cache: ${res.cost.tokens_saved.toLocaleString('pt-BR')} tokens economizados (R$ ${res.cost.saved_brl.toFixed(4).replace('.', ',')})</span>` : ''}
+    </div>
+  ` : '';
+
+  const skippedAlreadyRun = res.skipped_already_run || 0;
+  const resumeInfo = job.resumable ? `
+    <div style="margin-top:12px;">
+      <button onclick="resumeCollectJob('${job.id}')">▶️ Retomar coleta (${job.remaining} link(s) pendentes)</button>
+    </div>
+  ` : '';
+
+  let resultHtml = `
+    <div style="padding:20px;background:rgba(6,214,160,0.15);border-radius:8px;border:1px solid rgba(6,214,160,0.3);margin-bottom:16px;">
+      <strong style="font-size:1.1rem;">${headerLine}</strong><br/><br/>
+      ${res.message ? `ℹ️ ${res.message}<br/>` : ""}
+      📊 <strong>Editais extraídos:</strong> ${totalExtracted}<br/>
+      🔗 <strong>Links processados:</strong> ${res.processed || 0} de ${res.total || 0}
+      ${skippedAlreadyRun > 0 ? `<br/>⏭️ <strong>Links pulados (já executados):</strong> ${skippedAlreadyRun}` : ""}
+      ${costInfo}
+      ${resumeInfo}
+    </div>
+  `;
+
+  // Renderiza cards dismissíveis
+  const allCards = [...successLines, ...errorLines];
+  if (allCards.length > 0) {
+    resultHtml += `
+      <div id="collect-details-container" style="padding:16px;background:rgba(255,255,255,0.05);border-radius:8px;">
+        <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:12px;">
+          <strong>📋 Detalhes por grupo:</strong>
+          <button onclick="clearAllCollectCards()" style="background:rgba(239,71,111,0.2);border:1px solid rgba(239,71,111,0.4);color:#EF476F;padding:4px 12px;border-radius:4px;cursor:pointer;font-size:0.85rem;">
+            ✕ Limpar Todos
+          </button>
+        </div>
+        <div id="collect-cards-list">
+          ${allCards.map((card, idx) => `
+            <div class="collect-card ${card.type}" id="collect-card-${idx}" style="display:flex;justify-content:space-between;align-items:center;padding:8px 12px;margin-bottom:6px;border-radius:4px;${card.type === 'error' ? 'background:rgba(239,71,111,0.1);border:1px solid rgba(239,71,111,0.3);' : 'background:rgba(6,214,160,0.1);border:1px solid rgba(6,214,160,0.3);'}">
+              <span style="${card.type === 'error' ? 'color:#EF476F;' : ''}">${card.text}</span>
+              <button onclick="dismissCollectCard(${idx})" style="background:transparent;border:none;color:${card.type === 'error' ? '#EF476F' : '#06D6A0'};cursor:pointer;font-size:1.2rem;padding:0 4px;opacity:0.7;" onmouseover="this.style.opacity='1'" onmouseout="this.style.opacity='0.7'">✕</button>
+            </div>
+          `).join('')}
+        </div>
+      </div>
+    `;
+  }
+
+  resultDiv.innerHTML = resultHtml;
+
+  await renderGroups();
+}
+
 // Funções para dismiss dos cards de resultado
 function dismissCollectCard(idx) {
   const card = document.getElementById(`collect-card-${idx}`);
@@ -1019,8 +1213,14 @@ function clearAllCollectCards() {
   }
 }
 
-// Recarregar apenas da planilha
+// Recarregar apenas da planilha (reconcilia a base local com edições manuais)
 async function handleRefreshItems() {
+  try {
+    const data = await apiPost("/api/items/reconcile", {});
+    renderErrors(data.errors);
+  } catch (e) {
+    console.warn("Erro ao reconciliar itens com a planilha:", e);
+  }
   await renderGroups();
 }
 
@@ -1365,6 +1565,20 @@ async function handleRunPerplexity() {
     }
 
     summaryDiv.innerText = res.summary || "—";
+    if (res.cached) {
+      const note = document.createElement("div");
+      note.style.color = "#888";
+      note.textContent = `♻️ Resposta do cache: ${(res.tokens_saved || 0).toLocaleString('pt-BR')} tokens economizados.`;
+      summaryDiv.prepend(note);
+    }
+
+    // Aba Perplexity: só o cache entra no rastreador (o custo da busca aparece nas métricas)
+    updateCostTracker({
+      cache_hits: res.cached ? 1 : 0,
+      cache_misses: res.cached ? 0 : 1,
+      tokens_saved: res.tokens_saved || 0,
+      saved_brl: res.saved_cost_brl || 0,
+    });
 
     linksUl.innerHTML = "";
     (res.links || []).forEach((u) => {
@@ -1611,7 +1825,11 @@ window.addEventListener("DOMContentLoaded", async () => {
     btnCancelCollect.addEventListener("click", () => {
       collectCancelRequested = true;
       const label = document.getElementById("collect-progress-label");
-      if (label) label.textContent = "Cancelando… aguardando finalizar o grupo atual.";
+      if (label) label.textContent = "Cancelando… aguardando os links em andamento.";
+      if (currentCollectJobId) {
+        apiPost(`/api/collect/jobs/${encodeURIComponent(currentCollectJobId)}/cancel`, {})
+          .catch((err) => console.warn("Erro ao cancelar coleta:", err));
+      }
     });
   }
   if (btnCancelDiag) {
@@ -1733,6 +1951,9 @@ window.addEventListener("DOMContentLoaded", async () => {
   }
   markInitialDeadline();
 
+  // Reconecta a uma coleta que ainda esteja rodando no servidor
+  checkPendingCollectJob();
+
   // --- NOVO CÓDIGO ADICIONADO ---
   // Após carregar a config (que define o R$ padrão),
   // busca a cotação real e atualiza o state e a UI.
@@ -1994,6 +2215,31 @@ function updateDeleteSelectedButton() {
   const count = linksState.selectedUids.size;
   btn.textContent = `🗑️ Excluir Selecionados (${count})`;
   btn.disabled = count === 0;
+
+  ["btn-activate-selected", "btn-deactivate-selected"].forEach((id) => {
+    const b = document.getElementById(id);
+    if (b) b.disabled = count === 0;
+  });
+}
+
+// Ativa/desativa os links selecionados em uma única chamada
+async function setSelectedLinksActive(active) {
+  const uids = Array.from(linksState.selectedUids);
+  if (uids.length === 0) return;
+
+  const ativo = active ? "true" : "false";
+  const updates = uids.map((uid) => ({ uid, ativo }));
+
+  try {
+    const data = await apiPost("/api/links/update", { updates });
+    const updated = new Set((data.result && data.result.updated) || []);
+    linksState.links.forEach((l) => {
+      if (updated.has(l.uid)) l.ativo = ativo;
+    });
+    renderLinksModal();
+  } catch (e) {
+    alert("Erro ao atualizar links: " + e);
+  }
 }
 
 // Excluir links selecionados
@@ -2219,6 +2465,16 @@ function initLinksModal() {
     btnDeleteSelected.addEventListener("click", deleteSelectedLinks);
   }
 
+  // Botões ativar/desativar selecionados
+  const btnActivateSelected = document.getElementById("btn-activate-selected");
+  if (btnActivateSelected) {
+    btnActivateSelected.addEventListener("click", () => setSelectedLinksActive(true));
+  }
+  const btnDeactivateSelected = document.getElementById("btn-deactivate-selected");
+  if (btnDeactivateSelected) {
+    btnDeactivateSelected.addEventListener("click", () => setSelectedLinksActive(false));
+  }
+
   // Botão expandir todos
   const btnExpandAll = document.getElementById("btn-expand-all");
   if (btnExpandAll) {
@@ -106,6 +106,11 @@ hidden_imports = [
     'urllib3.util.retry',
     'certifi',
     'charset_normalizer',
+    'httpx',
+    'httpcore',
+    'h2',
+    'hpack',
+    'hyperframe',
     'idna',
     'dateparser',
     'dateparser.data',
@@ -221,6 +226,8 @@ collect_submodules_pkgs = [
     'bs4',               # BeautifulSoup
     'lxml',              # Parser XML/HTML
     'requests',          # HTTP
+    'httpx',             # HTTP (pool async / HTTP/2)
+    'httpcore',          # HTTP
     'urllib3',           # HTTP
     'certifi',           # Certificados SSL
 ]
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Configuração comum dos testes: raiz do projeto no sys.path (pacote 'backend')."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+O event loop não pode travar durante uma coleta: com uma coleta bloqueante
+rodando na faixa "collect", o GET /api/items precisa responder logo.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+
+from backend import api
+
+COOKIES = {api.SECRET_COOKIE_NAME: "authenticated"}
+
+# Folga generosa para máquinas lentas; a coleta falsa fica presa bem mais que isso
+ITEMS_BOUND_S = 2.0
+COLLECT_HOLD_S = 10.0
+
+
+def test_items_respond_while_collect_blocks(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_collect(min_days, groups_filter=None):
+        started.set()
+        release.wait(COLLECT_HOLD_S)
+        return {"new_items": 0}
+
+    monkeypatch.setattr(api, "run_collect", blocking_collect)
+    monkeypatch.setattr(api, "get_app_config", lambda: {"config": {}})
+    monkeypatch.setattr(api, "get_items_for_group", lambda group, **kw: {"group": group, "sources": []})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies=COOKIES) as client:
+            collect = asyncio.create_task(client.post("/api/collect", json={"min_days": 1}))
+            # Espera a coleta entrar na thread sem bloquear o loop
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+
+            t0 = time.monotonic()
+            resp = await asyncio.wait_for(client.get("/api/items", params={"group": "G"}), ITEMS_BOUND_S)
+            elapsed = time.monotonic() - t0
+            assert not collect.done()
+
+            release.set()
+            collect_resp = await collect
+            return resp, elapsed, collect_resp
+
+    try:
+        resp, elapsed, collect_resp = asyncio.run(scenario())
+    finally:
+        release.set()
+
+    assert resp.status_code == 200
+    assert resp.json()["items"]["group"] == "G"
+    assert elapsed < ITEMS_BOUND_S
+    assert collect_resp.status_code == 200
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Extração em partes de páginas longas: divisão com sobreposição e junção dos
+itens das partes sem duplicados.
+"""
+
+import pytest
+
+from backend.core import universal_extractor as ue
+
+PAGE = "https://fund.org/editais"
+
+
+@pytest.mark.parametrize("parts, expected", [
+    # Mesmo link (maiúsculas e barra final não contam): um item só
+    ([[{"title": "Edital A", "link": "https://fund.org/a"}],
+      [{"title": "Edital A (cont.)", "link": "HTTPS://fund.org/a/"}]],
+     [{"title": "Edital A", "link": "https://fund.org/a"}]),
+    # Sem link, ou link da própria página: compara o título normalizado
+    ([[{"title": "Edital  B!", "link": ""}],
+      [{"title": "edital b", "link": PAGE + "/"}]],
+     [{"title": "Edital  B!", "link": PAGE + "/"}]),
+    # Campos vazios são completados pelo duplicado de outra parte
+    ([[{"title": "Edital C", "link": "https://fund.org/c", "deadline": ""}],
+      [{"title": "Edital C", "link": "https://fund.org/c", "deadline": "2026-12-01", "value": "R$ 1 mil"}]],
+     [{"title": "Edital C", "link": "https://fund.org/c", "deadline": "2026-12-01", "value": "R$ 1 mil"}]),
+    # Campo já preenchido não é trocado
+    ([[{"title": "Edital D", "link": "https://fund.org/d", "deadline": "2026-10-01"}],
+      [{"title": "Edital D", "link": "https://fund.org/d", "deadline": "2026-11-01"}]],
+     [{"title": "Edital D", "link": "https://fund.org/d", "deadline": "2026-10-01"}]),
+    # Links diferentes com o mesmo título: dois itens, na ordem das partes
+    ([[{"title": "Chamada", "link": "https://fund.org/1"}],
+      [{"title": "Chamada", "link": "https://fund.org/2"}]],
+     [{"title": "Chamada", "link": "https://fund.org/1"}, {"title": "Chamada", "link": "https://fund.org/2"}]),
+    # Sem título nem link, ou lixo no lugar do item: descartados
+    ([[{"title": "", "link": ""}, "texto solto", None], []], []),
+])
+def test_merge_chunk_items(parts, expected):
+    assert ue.merge_chunk_items(parts, PAGE) == expected
+
+
+@pytest.mark.parametrize("chunk_chars, overlap", [(400, 0), (400, 100), (1000, 200)])
+def test_split_chunks_sizes_and_overlap(chunk_chars, overlap):
+    text = "\n".join(f"Edital {i:03d} com inscrições até 30/11/2026." for i in range(100))
+
+    chunks = ue.split_chunks(text, chunk_chars, overlap)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= chunk_chars for c in chunks)
+    # Todo edital aparece inteiro em alguma parte
+    for i in range(100):
+        assert any(f"Edital {i:03d} com" in c for c in chunks)
+    # Com sobreposição, cada parte começa com o final da anterior
+    for prev, cur in zip(chunks, chunks[1:]):
+        first = cur.split(" com ")[0]
+        assert (first in prev) == (overlap > 0)
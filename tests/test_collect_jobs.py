@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Retenção dos jobs de coleta: ao criar um job, além dele só os
+COLLECT_JOBS_KEEP encerrados mais recentes ficam em memória e em data/jobs/;
+ativos nunca saem.
+"""
+
+import pytest
+
+from backend.core import collect_jobs
+from backend.core.errors import init_error_bus
+from backend.core.local_cache import JsonCache
+
+
+@pytest.fixture
+def jobs(monkeypatch, tmp_path):
+    init_error_bus()
+    files = JsonCache("jobs")
+    files._dir = tmp_path
+    monkeypatch.setattr(collect_jobs, "_job_files", files)
+    monkeypatch.setattr(collect_jobs, "_jobs", {})
+    monkeypatch.setattr(collect_jobs, "_cancel_events", {})
+    monkeypatch.setattr(collect_jobs, "_loaded", True)
+    return files
+
+
+def _old_job(files, job_id, state, day):
+    job = {"id": job_id, "state": state, "created_at": f"2026-01-{day:02d}T00:00:00"}
+    collect_jobs._jobs[job_id] = job
+    files.set(job_id, job)
+
+
+def test_keeps_only_most_recent_finished_jobs(jobs, monkeypatch):
+    monkeypatch.setenv("COLLECT_JOBS_KEEP", "2")
+    for day, state in enumerate(["done", "error", "cancelled", "done"], start=1):
+        _old_job(jobs, f"j{day}", state, day)
+
+    new = collect_jobs.start_collect_job([], 1, None, "sonar", message="nada")
+
+    kept = sorted([new["id"], "j3", "j4"])
+    assert sorted(collect_jobs._jobs) == kept
+    assert sorted(k for k, _ in jobs.items()) == kept
+
+
+def test_active_jobs_are_never_pruned(jobs, monkeypatch):
+    monkeypatch.setenv("COLLECT_JOBS_KEEP", "0")
+    _old_job(jobs, "velho", "done", 1)
+    _old_job(jobs, "rodando", "running", 2)
+
+    with pytest.raises(collect_jobs.ActiveJobError):
+        collect_jobs.start_collect_job([], 1, None, "sonar")
+    assert "rodando" in collect_jobs._jobs
+
+    collect_jobs._jobs["rodando"]["state"] = "interrupted"
+    collect_jobs._jobs["rodando"]["checkpoints"] = {}
+    new = collect_jobs.start_collect_job([], 1, None, "sonar")
+    assert list(collect_jobs._jobs) == [new["id"]]
+    assert [k for k, _ in jobs.items()] == [new["id"]]
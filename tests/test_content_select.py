@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Seleção do trecho que vai no prompt: blocos de até N caracteres, os de maior
+nota dentro do orçamento, na ordem original e com "[...]" nos cortes.
+"""
+
+import pytest
+
+from backend.core import universal_extractor as ue
+from backend.core.content_select import (
+    CHARS_PER_TOKEN,
+    GAP_MARKER,
+    score_block,
+    select_content,
+    split_blocks,
+)
+
+FILLER = "Notícias institucionais da fundação e agenda cultural do mês."
+RELEVANT = "Edital {n}/2026 chamada de propostas com inscrições até 30/11/2026 e valor de R$ 50.000"
+
+
+@pytest.mark.parametrize("text, block_chars, expected", [
+    ("", 100, []),
+    ("Curto.", 100, ["Curto."]),
+    ("Uma frase. Outra frase.", 100, ["Uma frase. Outra frase."]),
+    ("Uma frase. Outra frase.", 12, ["Uma frase.", "Outra frase."]),
+    ("linha 1\nlinha 2", 100, ["linha 1 linha 2"]),
+    ("a" * 250, 100, ["a" * 100, "a" * 100, "a" * 50]),
+    ("palavra " * 30, 50, None),  # corta em espaço: nenhum bloco passa de 50
+])
+def test_split_blocks(text, block_chars, expected):
+    blocks = split_blocks(text, block_chars)
+    if expected is not None:
+        assert blocks == expected
+    assert all(len(b) <= block_chars for b in blocks)
+    # Nada se perde nem se repete (só espaços mudam)
+    assert "".join("".join(blocks).split()) == "".join(text.split())
+
+
+@pytest.mark.parametrize("block, relevant", [
+    (RELEVANT.format(n=1), True),
+    ("Deadline: March 3, 2026. Open call for grants.", True),
+    (FILLER, False),
+])
+def test_score_block(block, relevant):
+    assert (score_block(block) > 0) == relevant
+
+
+def test_short_text_goes_whole():
+    text, stats = select_content("Edital aberto.", budget_tokens=100)
+    assert text == "Edital aberto."
+    assert not stats["truncated"]
+
+
+@pytest.mark.parametrize("budget_tokens, relevant_at", [
+    (50, [3]),
+    (100, [0, 17]),
+    (100, [2, 9, 19]),
+])
+def test_keeps_high_scoring_blocks_within_budget(monkeypatch, budget_tokens, relevant_at):
+    # Blocos de 100 caracteres: cada linha da página vira um bloco
+    monkeypatch.setenv("EXTRACT_BLOCK_CHARS", "100")
+    blocks = [RELEVANT.format(n=i) if i in relevant_at else FILLER for i in range(20)]
+    page = "\n".join(blocks)
+
+    text, stats = select_content(page, budget_tokens=budget_tokens)
+
+    assert stats["truncated"]
+    assert len(text) <= budget_tokens * CHARS_PER_TOKEN
+    # Todos os blocos relevantes entram, na ordem da página
+    positions = [text.index(f"Edital {i}/2026") for i in relevant_at]
+    assert positions == sorted(positions)
+    assert GAP_MARKER in text
+    assert stats["blocks_kept"] < stats["blocks_total"]
+
+
+def test_prompt_keeps_content_as_given():
+    # O trecho já vem escolhido por quem chama: nada é cortado de novo
+    content = "\n".join([FILLER] * 200 + [RELEVANT.format(n=1)])
+    prompt = ue.build_extraction_prompt("https://a", content, part_label="parte 1 de 2")
+    assert content in prompt
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Error bus: cada requisição zera só a própria lista; erros de threads sem
+contexto (sincronização, jobs) ficam na lista global.
+"""
+
+import contextvars
+import threading
+
+from backend.core import errors
+
+
+def _push_from_background(where):
+    # Thread nova sem copiar o contexto: cai na lista global
+    t = threading.Thread(target=lambda: errors.push_error(where, RuntimeError("x")))
+    t.start()
+    t.join()
+
+
+def test_request_reset_keeps_background_errors():
+    _push_from_background("sync_thread")
+
+    def request():
+        errors.init_error_bus()
+        errors.push_error("endpoint", ValueError("y"))
+        return [e["where"] for e in errors.get_errors()]
+
+    assert contextvars.Context().run(request) == ["endpoint"]
+    assert "sync_thread" in [e["where"] for e in errors._global_bus]
+
+
+def test_global_bus_is_capped():
+    for i in range(errors._GLOBAL_BUS_MAX + 10):
+        _push_from_background(f"bg {i}")
+    assert len(errors._global_bus) == errors._GLOBAL_BUS_MAX
+    assert errors._global_bus[-1]["where"] == f"bg {errors._GLOBAL_BUS_MAX + 9}"
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+As três limpezas de HTML (selectolax, lxml, bs4) têm de dar o mesmo texto:
+a escolha de HTML_CLEAN_BACKEND muda só o tempo, nunca o que vai no prompt.
+"""
+
+import pytest
+
+from backend.core import html_clean
+
+MAIN_TEXT = (
+    "Edital 05/2026 de apoio à pesquisa. Inscrições abertas até 15/12/2026. "
+    "Valor total de R$ 2.000.000,00 para projetos de até 24 meses. "
+    "Podem participar instituições públicas e privadas sem fins lucrativos."
+)
+
+PAGE_WITH_MAIN = f"""<!DOCTYPE html>
+<html><head><title>Fundação</title><style>body {{ color: red }}</style>
+<script>var x = "não deve aparecer";</script></head>
+<body>
+  <header>Cabeçalho do site</header>
+  <nav><a href="/">Início</a> <a href="/editais">Editais</a></nav>
+  <div class="cookie-bar">Usamos cookies</div>
+  <main>
+    <h1>Chamadas abertas</h1>
+    <p>{MAIN_TEXT}</p>
+    <form><button>Enviar</button></form>
+    <ul><li>Edital 06/2026 &ndash; prazo 20/01/2027</li><li>Prêmio Jovem Cientista</li></ul>
+  </main>
+  <aside>Veja também</aside>
+  <footer>Rodapé &copy; 2026</footer>
+</body></html>"""
+
+PAGE_WITHOUT_MAIN = """<html><body>
+  <div role="navigation">Menu principal</div>
+  <div id="conteudo">
+    <h2>Oportunidades</h2>
+    <table><tr><td>Chamada 1/2026</td><td>30/11/2026</td></tr>
+    <tr><td>Chamada 2/2026</td><td>15/12/2026</td></tr></table>
+    <p>Texto com   espaços    repetidos e <b>negrito</b> no meio.</p>
+  </div>
+  <div class="newsletter-box">Assine nossa newsletter</div>
+  <noscript>Ative o JavaScript</noscript>
+</body></html>"""
+
+# <main> curto demais: vale a página toda
+PAGE_SHORT_MAIN = """<html><body>
+  <p>Introdução da página de fomento.</p>
+  <main><p>Lista vazia.</p></main>
+  <p>Mais editais em breve.</p>
+  <svg><text>ícone</text></svg>
+</body></html>"""
+
+# (nome, html, trechos que devem estar, trechos que não podem estar)
+PAGES = [
+    ("com_main", PAGE_WITH_MAIN,
+     ["Chamadas abertas", "Edital 05/2026", "R$ 2.000.000,00", "Prêmio Jovem Cientista"],
+     ["Cabeçalho", "Editais", "cookies", "Rodapé", "Veja também", "não deve aparecer", "Enviar"]),
+    ("sem_main", PAGE_WITHOUT_MAIN,
+     ["Oportunidades", "Chamada 1/2026", "15/12/2026", "negrito"],
+     ["Menu principal", "newsletter", "JavaScript"]),
+    ("main_curto", PAGE_SHORT_MAIN,
+     ["Introdução", "Lista vazia", "Mais editais"],
+     ["ícone"]),
+]
+
+BACKENDS = ["selectolax", "lxml", "bs4"]
+
+
+def _require(backend):
+    if not html_clean._installed(backend):
+        pytest.skip(f"{backend} não instalado")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name, page, present, absent", PAGES, ids=[p[0] for p in PAGES])
+def test_backend_matches_bs4(backend, name, page, present, absent):
+    _require(backend)
+    text = html_clean.BACKENDS[backend](page)
+
+    assert text == html_clean.clean_bs4(page)
+    for snippet in present:
+        assert snippet in text
+    for snippet in absent:
+        assert snippet not in text
+
+
+def test_main_content_preferred():
+    text = html_clean.clean_bs4(PAGE_WITH_MAIN)
+    assert text.startswith("Chamadas abertas")
+
+
+@pytest.mark.parametrize("wanted, expected", [
+    ("bs4", "bs4"),
+    ("lxml", "lxml"),
+    ("nao-existe", None),
+])
+def test_backend_choice(monkeypatch, wanted, expected):
+    monkeypatch.setenv("HTML_CLEAN_BACKEND", wanted)
+    monkeypatch.setattr(html_clean, "_resolved", {})
+    name = html_clean.get_backend_name()
+    if expected is None:
+        # Nome desconhecido: a mais rápida instalada
+        assert name == next(n for n in BACKENDS if html_clean._installed(n))
+    else:
+        _require(expected)
+        assert name == expected
+
+
+def test_falls_back_to_bs4_when_backend_fails(monkeypatch):
+    def broken(raw):
+        raise ValueError("parser quebrou")
+
+    monkeypatch.setitem(html_clean.BACKENDS, "lxml", broken)
+    assert html_clean.clean_html(PAGE_WITH_MAIN, backend="lxml") == html_clean.clean_bs4(PAGE_WITH_MAIN)
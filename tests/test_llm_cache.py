@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de respostas da Perplexity na extração: só respostas que viram JSON
+válido são guardadas; uma resposta quebrada não é repetida a partir do cache.
+"""
+
+import pytest
+
+from backend.core import llm_cache, universal_extractor as ue
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, content):
+        self._content = content
+
+    def json(self):
+        return {
+            "choices": [{"message": {"content": self._content}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+        }
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    """Cache vazio em tmp_path e API falsa; devolve a fila de respostas e as chamadas."""
+    cache = llm_cache._ResponseCache("llm_cache")
+    cache._dir = tmp_path
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    monkeypatch.setenv("LLM_CACHE", "true")
+    monkeypatch.setattr(ue, "get_perplexity_api_key", lambda: "chave")
+    replies, calls = [], []
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        calls.append(json)
+        return _Resp(replies.pop(0))
+
+    monkeypatch.setattr(ue.requests, "post", fake_post)
+    return replies, calls
+
+
+@pytest.mark.parametrize("bad_reply", [
+    '[{"title": "Edital truncado", "link": "https://x',
+    "Não encontrei editais nesta página.",
+])
+def test_bad_reply_is_not_served_from_cache(api, bad_reply):
+    replies, calls = api
+    replies.extend([bad_reply, '[{"title": "Edital A"}]'])
+
+    items, error, usage = ue.call_perplexity_extraction("prompt")
+    assert items == [] and error.startswith("Erro ao parsear JSON")
+    assert usage["input_tokens"] == 100
+
+    # Mesmo prompt: vai à API de novo em vez de repetir o erro
+    items, error, usage = ue.call_perplexity_extraction("prompt")
+    assert error is None and items == [{"title": "Edital A"}]
+    assert len(calls) == 2
+
+
+def test_good_reply_is_served_from_cache(api):
+    replies, calls = api
+    replies.append('```json\n[{"title": "Edital A"}]\n```')
+
+    first = ue.call_perplexity_extraction("prompt")
+    second = ue.call_perplexity_extraction("prompt")
+
+    assert first[0] == second[0] == [{"title": "Edital A"}]
+    assert second[2] == {"input_tokens": 0, "output_tokens": 0}
+    assert len(calls) == 1
+
+
+def test_stale_bad_entry_is_dropped(api):
+    replies, calls = api
+    key = llm_cache.cache_key("sonar", 0.1, 4000, ue.SYSTEM_PROMPT, "prompt")
+    llm_cache.store(key, "resposta cortada [", {"input_tokens": 1, "output_tokens": 1})
+    replies.append('[{"title": "Edital A"}]')
+
+    items, error, _ = ue.call_perplexity_extraction("prompt")
+
+    assert error is None and items == [{"title": "Edital A"}]
+    assert len(calls) == 1
+    assert llm_cache.lookup(key)["content"] == '[{"title": "Edital A"}]'
+
+
+def test_bad_batch_reply_is_not_cached(api):
+    replies, calls = api
+    pages = [{"id": "1", "url": "https://a", "content": "texto"}]
+    replies.extend(['["não é um objeto"]', '{"1": [{"title": "Edital A"}]}'])
+
+    by_page, error, _ = ue.call_perplexity_batch_extraction(pages)
+    assert by_page == {} and error
+
+    by_page, error, _ = ue.call_perplexity_batch_extraction(pages)
+    assert error is None and by_page == {"1": [{"title": "Edital A"}]}
+    assert len(calls) == 2
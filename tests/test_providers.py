@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Providers da coleta clássica: carga da pasta (PROVIDERS_DIR) e execução em
+paralelo com limite de tempo por provider e limite total da rodada.
+"""
+
+import threading
+import time
+
+import pytest
+
+from backend.core import domain
+from backend.core.errors import get_errors, init_error_bus
+
+
+class FakeProvider:
+    def __init__(self, name, delay=0.0, items=None, fail=False):
+        self.PROVIDER = {"name": name, "group": "G"}
+        self.delay = delay
+        self.items = items if items is not None else [{"title": name}]
+        self.fail = fail
+        self.release = threading.Event()
+
+    def fetch(self, cfg):
+        # Espera 'delay' (ou até o teste liberar, para não deixar thread presa)
+        self.release.wait(self.delay)
+        if self.fail:
+            raise RuntimeError("fonte fora do ar")
+        return self.items
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    init_error_bus()
+
+    def _set(workers, timeout_s):
+        monkeypatch.setenv("PROVIDER_WORKERS", str(workers))
+        monkeypatch.setenv("PROVIDER_TIMEOUT_S", str(timeout_s))
+
+    return _set
+
+
+def _release(providers):
+    for p in providers:
+        p.release.set()
+
+
+def test_results_in_order_with_errors(settings):
+    settings(workers=4, timeout_s=5)
+    providers = [FakeProvider("a", 0.05), FakeProvider("b", fail=True), FakeProvider("c")]
+
+    results = domain._fetch_providers(providers, {})
+
+    assert [r["provider"] for r in results] == providers
+    assert results[0]["items"] == [{"title": "a"}]
+    assert results[1]["items"] is None and "fonte fora do ar" in results[1]["error"]
+    assert results[2]["items"] == [{"title": "c"}]
+    assert any("b fetch" in e["where"] for e in get_errors())
+
+
+def test_slow_provider_times_out_without_holding_others(settings):
+    settings(workers=4, timeout_s=1)
+    slow, fast = FakeProvider("lento", delay=30), FakeProvider("rapido")
+    t0 = time.monotonic()
+    try:
+        results = domain._fetch_providers([slow, fast], {})
+    finally:
+        _release([slow])
+
+    assert time.monotonic() - t0 < 5
+    assert results[0]["timeout"] and results[0]["items"] is None
+    assert results[1]["items"] == [{"title": "rapido"}]
+
+
+def test_queued_providers_abandoned_at_overall_deadline(settings):
+    # Um worker preso no provider lento: os da fila nunca começam
+    settings(workers=1, timeout_s=1)
+    providers = [FakeProvider("lento", delay=30), FakeProvider("a"), FakeProvider("b")]
+    t0 = time.monotonic()
+    try:
+        results = domain._fetch_providers(providers, {})
+    finally:
+        _release(providers)
+
+    # Limite total: 1 s x 3 rodadas (+ folga do laço de espera)
+    assert time.monotonic() - t0 < 6
+    assert all(r["timeout"] for r in results)
+    assert "não começou" in results[1]["error"]
+
+
+def test_load_providers_from_folder(monkeypatch, tmp_path):
+    init_error_bus()
+    (tmp_path / "fonte_a.py").write_text(
+        'PROVIDER = {"name": "Fonte A", "group": "G"}\n'
+        "def fetch(cfg):\n    return []\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "util.py").write_text("X = 1\n", encoding="utf-8")
+    (tmp_path / "_privado.py").write_text('PROVIDER = {}\ndef fetch(cfg): return []\n', encoding="utf-8")
+    (tmp_path / "quebrado.py").write_text("def (\n", encoding="utf-8")
+    monkeypatch.setenv("PROVIDERS_DIR", str(tmp_path))
+    domain.reload_provider_modules()
+    try:
+        mods = domain.load_providers()
+    finally:
+        domain.reload_provider_modules()
+
+    assert [m.PROVIDER["name"] for m in mods] == ["Fonte A"]
+    assert any("quebrado.py" in e["where"] for e in get_errors())
+
+
+def test_missing_folder_means_no_providers(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROVIDERS_DIR", str(tmp_path / "nao-existe"))
+    domain.reload_provider_modules()
+    try:
+        assert domain.load_providers() == []
+    finally:
+        domain.reload_provider_modules()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Escritas na aba 'items' (sheet_items_update / sheet_items_delete) contra uma
+planilha em memória, nos dois layouts suportados:
+
+- antigo: header na linha 1, coluna A
+- formatado: título na linha 1, header na linha 4, dados a partir da coluna B
+"""
+
+import re
+
+import pytest
+
+from backend.core import sheets
+from backend.core.errors import init_error_bus
+
+HEADER = ["uid", "group", "title", "status"]
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def _parse_cell(a1: str):
+    """'B5' -> (linha 0-based, coluna 0-based)."""
+    m = re.match(r"([A-Z]+)(\d+)$", a1)
+    return int(m.group(2)) - 1, _col_index(m.group(1))
+
+
+class FakeSpreadsheet:
+    """Só o que os helpers de escrita usam de gspread.Spreadsheet."""
+
+    def __init__(self):
+        self.tabs = {}
+        self.batch_requests = []
+        self.value_updates = []
+
+    def values_batch_update(self, body):
+        for d in body["data"]:
+            title, rng = d["range"].split("!")
+            self.value_updates.append(d["range"])
+            self.tabs[title].write(rng, d["values"])
+
+    def batch_update(self, body):
+        self.batch_requests.append(body)
+        for req in body["requests"]:
+            rng = req["deleteDimension"]["range"]
+            ws = next(t for t in self.tabs.values() if t.id == rng["sheetId"])
+            del ws.grid[rng["startIndex"]:rng["endIndex"]]
+
+
+class FakeWorksheet:
+    """Aba em memória: uma lista de linhas (listas de strings)."""
+
+    def __init__(self, spreadsheet, title, grid, sheet_id=7):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.grid = [list(r) for r in grid]
+        spreadsheet.tabs[title] = self
+
+    @property
+    def row_count(self):
+        return max(len(self.grid), 100)
+
+    def get_all_values(self):
+        rows = [list(r) for r in self.grid]
+        while rows and not any(c for c in rows[-1]):
+            rows.pop()
+        width = max([len(r) for r in rows] + [0])
+        return [r + [""] * (width - len(r)) for r in rows]
+
+    def write(self, rng, values):
+        r0, c0 = _parse_cell(rng.split(":")[0])
+        for i, row in enumerate(values):
+            for j, v in enumerate(row):
+                self.cell_set(r0 + i, c0 + j, v)
+
+    def cell_set(self, r, c, v):
+        while len(self.grid) <= r:
+            self.grid.append([])
+        row = self.grid[r]
+        while len(row) <= c:
+            row.append("")
+        row[c] = v
+
+    def cell(self, a1):
+        r, c = _parse_cell(a1)
+        row = self.grid[r] if r < len(self.grid) else []
+        return row[c] if c < len(row) else ""
+
+
+def _items(n):
+    # Última coluna sem header: anotação manual que as escritas não podem perder
+    return [[f"u{i}", "G", f"Edital {i}", "pendente", f"nota {i}"] for i in range(1, n + 1)]
+
+
+def _legacy_grid(n):
+    return [list(HEADER)] + _items(n)
+
+
+def _formatted_grid(n):
+    title = ["", "ITENS COLETADOS"]
+    return [title, [], []] + [[""] + r for r in [HEADER] + _items(n)]
+
+
+# (nome, montador da grade, linha do 1º item, letra da coluna 'uid')
+LAYOUTS = [
+    ("antigo", _legacy_grid, 2, "A"),
+    ("formatado", _formatted_grid, 5, "B"),
+]
+
+
+@pytest.fixture(params=LAYOUTS, ids=[layout[0] for layout in LAYOUTS])
+def tab(request, monkeypatch):
+    """Devolve (ws, layout, primeira_linha, coluna_uid) para 6 itens."""
+    _, build, first_row, uid_col = request.param
+    init_error_bus()
+    ws = FakeWorksheet(FakeSpreadsheet(), "items", build(6))
+    monkeypatch.setattr(sheets, "open_sheet", lambda: (None, None, ws, None))
+    with sheets.sheet_operation():
+        layout = sheets.read_items_tab()
+        yield ws, layout, first_row, uid_col
+
+
+def _col_of(uid_col, offset):
+    return chr(ord(uid_col) + offset)
+
+
+def _uids(ws, first_row, uid_col):
+    out = []
+    row = first_row
+    while ws.cell(f"{uid_col}{row}"):
+        out.append(ws.cell(f"{uid_col}{row}"))
+        row += 1
+    return out
+
+
+def test_layout_detected(tab):
+    ws, layout, first_row, uid_col = tab
+    assert layout["header"] == HEADER
+    assert layout["last_row"] == first_row + 5
+    assert ws.cell(f"{uid_col}{first_row}") == "u1"
+
+
+def test_update_writes_the_right_cells(tab):
+    ws, layout, first_row, uid_col = tab
+    status_col = _col_of(uid_col, HEADER.index("status"))
+    title_col = _col_of(uid_col, HEADER.index("title"))
+
+    sheets.sheet_items_update(layout, {"u3": {"status": "aprovado"}, "u5": {"title": "Novo"}})
+
+    assert ws.cell(f"{status_col}{first_row + 2}") == "aprovado"
+    assert ws.cell(f"{title_col}{first_row + 4}") == "Novo"
+    # Vizinhas intactas
+    assert ws.cell(f"{status_col}{first_row + 1}") == "pendente"
+    assert ws.cell(f"{status_col}{first_row + 3}") == "pendente"
+    assert ws.cell(f"{title_col}{first_row + 2}") == "Edital 3"
+    # Só as duas células vão na chamada
+    assert len(ws.spreadsheet.value_updates) == 2
+
+
+def test_update_ignores_unknown_uid_and_column(tab):
+    ws, layout, first_row, uid_col = tab
+    before = [list(r) for r in ws.grid]
+    sheets.sheet_items_update(layout, {"nao-existe": {"status": "x"}, "u1": {"coluna_nova": "x"}})
+    assert ws.grid == before
+
+
+def test_delete_contiguous_rows_with_delete_dimension(tab):
+    ws, layout, first_row, uid_col = tab
+
+    sheets.sheet_items_delete(layout, ["u2", "u3"])
+
+    (body,) = ws.spreadsheet.batch_requests
+    (req,) = body["requests"]
+    rng = req["deleteDimension"]["range"]
+    assert (rng["startIndex"], rng["endIndex"]) == (first_row, first_row + 2)
+    assert _uids(ws, first_row, uid_col) == ["u1", "u4", "u5", "u6"]
+    # Snapshot acompanha: uma escrita seguinte acha a linha certa
+    sheets.sheet_items_update(layout, {"u5": {"status": "ok"}})
+    assert ws.cell(f"{_col_of(uid_col, 3)}{first_row + 2}") == "ok"
+
+
+def test_delete_scattered_rows_bottom_up(tab, monkeypatch):
+    ws, layout, first_row, uid_col = tab
+    monkeypatch.setenv("ITEMS_COMPACT_PERCENT", "101")
+
+    sheets.sheet_items_delete(layout, ["u1", "u4", "u6"])
+
+    (body,) = ws.spreadsheet.batch_requests
+    starts = [r["deleteDimension"]["range"]["startIndex"] for r in body["requests"]]
+    assert starts == sorted(starts, reverse=True)
+    assert _uids(ws, first_row, uid_col) == ["u2", "u3", "u5"]
+
+
+def test_delete_compacts_values_and_keeps_extra_columns(tab, monkeypatch):
+    ws, layout, first_row, uid_col = tab
+    monkeypatch.setenv("ITEMS_COMPACT_PERCENT", "50")
+    extra_col = _col_of(uid_col, len(HEADER))
+
+    sheets.sheet_items_delete(layout, ["u1", "u3", "u5", "u6"])
+
+    assert ws.spreadsheet.batch_requests == []
+    assert _uids(ws, first_row, uid_col) == ["u2", "u4"]
+    assert ws.cell(f"{extra_col}{first_row}") == "nota 2"
+    assert ws.cell(f"{extra_col}{first_row + 1}") == "nota 4"
+    # O final da faixa fica em branco
+    for k in range(2, 6):
+        assert ws.cell(f"{uid_col}{first_row + k}") == ""
+        assert ws.cell(f"{extra_col}{first_row + k}") == ""
+    assert layout["last_row"] == first_row + 1
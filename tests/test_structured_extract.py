@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Extração estruturada (feeds, sitemaps, tabelas): datas, valores, filtros
+locais e a decisão entre usar os itens ou chamar a Perplexity.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.core import structured_extract as se
+
+
+def _day(offset: int) -> str:
+    return (datetime.now() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+class FakeResponse:
+    def __init__(self, body: str, content_type: str):
+        self.text = body
+        self.content = body.encode("utf-8")
+        self.headers = {"Content-Type": content_type}
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-11-30", "2026-11-30"),
+    ("2026-11-30T23:59:00-03:00", "2026-11-30"),
+    ("30/11/2026", "2026-11-30"),
+    ("Inscrições até 5.3.26", "2026-03-05"),
+    ("30 de novembro de 2026", "2026-11-30"),
+    ("Mon, 02 Nov 2026 10:00:00 GMT", "2026-11-02"),
+    ("31/02/2026", ""),
+    ("fluxo contínuo", ""),
+    ("", ""),
+    (None, ""),
+])
+def test_to_iso_date(value, expected):
+    assert se.to_iso_date(value) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("R$ 500.000,00", 500000.0),
+    ("até R$ 1,5 milhão", 1500000.0),
+    ("US$ 2 million", 2000000.0),
+    ("R$ 50 mil por projeto", 50000.0),
+    ("$1,000,000", 1000000.0),
+    ("sem valor definido", None),
+])
+def test_money_value(text, expected):
+    assert se.money_value(text) == expected
+
+
+@pytest.mark.parametrize("item, min_days, max_value, kept", [
+    ({"deadline": _day(10)}, 0, None, True),
+    ({"deadline": _day(-1)}, 0, None, False),
+    ({"deadline": _day(10)}, 30, None, False),
+    ({"deadline": _day(40)}, 30, None, True),
+    ({"deadline": ""}, 30, None, True),
+    ({"deadline": "fluxo contínuo"}, 30, None, True),
+    ({"deadline": _day(10), "value": "R$ 2 milhões"}, 0, 1000000, False),
+    ({"deadline": _day(10), "value": "R$ 500 mil"}, 0, 1000000, True),
+    ({"deadline": _day(10), "value": "a definir"}, 0, 1000000, True),
+])
+def test_apply_filters(item, min_days, max_value, kept):
+    assert se.apply_filters([item], min_days=min_days, max_value=max_value) == ([item] if kept else [])
+
+
+@pytest.mark.parametrize("kind", ["rss", "atom", "jsonld", "table"])
+def test_no_deadline_falls_back_to_perplexity(kind):
+    found = {"kind": kind, "items": [{"title": "Edital 1", "deadline": "", "published": _day(-1)}]}
+    assert se.select_structured(found) is None
+
+
+@pytest.mark.parametrize("found", [None, {"kind": "table", "items": []}])
+def test_nothing_found(found):
+    assert se.select_structured(found) is None
+
+
+def test_any_deadline_uses_filtered_items():
+    items = [
+        {"title": "Aberto", "deadline": _day(20)},
+        {"title": "Encerrado", "deadline": _day(-3)},
+        {"title": "Sem prazo", "deadline": ""},
+    ]
+    selected = se.select_structured({"kind": "table", "items": items})
+    assert [i["title"] for i in selected] == ["Aberto", "Sem prazo"]
+
+
+@pytest.mark.parametrize("recent_days, lastmod_offsets, kept", [
+    (60, [-1, -59, -61, -400], [-1, -59]),
+    (7, [-1, -6, -8], [-1, -6]),
+    (30, [-45, -90], []),
+])
+def test_sitemap_recency_window(monkeypatch, recent_days, lastmod_offsets, kept):
+    monkeypatch.setenv("STRUCTURED_RECENT_DAYS", str(recent_days))
+    urls = "".join(
+        f"<url><loc>https://fund.org/editais/chamada-{abs(o)}</loc><lastmod>{_day(o)}T10:00:00+00:00</lastmod></url>"
+        for o in lastmod_offsets
+    )
+    body = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{urls}<url><loc>https://fund.org/sobre-nos</loc><lastmod>{_day(-1)}</lastmod></url>"
+        "</urlset>"
+    )
+    found = se.extract_structured("https://fund.org/sitemap.xml", FakeResponse(body, "application/xml"))
+    assert found["kind"] == "sitemap"
+    assert len(found["items"]) == len(lastmod_offsets)  # "sobre-nos" não tem cara de chamada
+
+    selected = se.select_structured(found)
+    assert [i["link"] for i in selected] == [f"https://fund.org/editais/chamada-{abs(o)}" for o in kept]
+
+
+def test_table_rows_need_a_call():
+    body = f"""<html><body><table>
+      <tr><th>Título</th><th>Prazo</th><th>Valor</th></tr>
+      <tr><td><a href="/e1">Edital 01/2026 Pesquisa</a></td><td>{_day(30)}</td><td>R$ 100 mil</td></tr>
+      <tr><td>Festa junina do instituto</td><td>{_day(30)}</td><td></td></tr>
+      <tr><td>Chamada sem data</td><td>em breve</td><td></td></tr>
+    </table></body></html>"""
+    found = se.extract_structured("https://fund.org/editais", FakeResponse(body, "text/html"))
+
+    assert found["kind"] == "table"
+    (item,) = found["items"]
+    assert item["title"] == "Edital 01/2026 Pesquisa"
+    assert item["link"] == "https://fund.org/e1"
+    assert item["value"] == "R$ 100 mil"